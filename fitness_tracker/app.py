@@ -10,8 +10,7 @@ from config import APP_TITLE, APP_LAYOUT
 
 # Import database setup
 sys.path.insert(0, str(Path(__file__).parent))
-from database.db_manager import db_manager
-from database.schema import init_schema
+from database.startup import startup
 
 # Import services
 from services.student_service import StudentService
@@ -21,8 +20,8 @@ from services.analytics_service import AnalyticsService
 # Import utilities
 from utils.sample_data import load_sample_data
 
-# Initialize database schema
-init_schema()
+# Initialize the database once per process (a no-op on reruns)
+startup()
 
 # Streamlit page configuration
 st.set_page_config(
@@ -150,10 +149,3 @@ with st.sidebar:
     st.markdown("✅ Goal Setting")
     st.markdown("✅ Personalized Recommendations")
     st.markdown("✅ Achievement Tracking")
-
-# Close database connection when the app exits
-def on_shutdown():
-    db_manager.close()
-
-import atexit
-atexit.register(on_shutdown)
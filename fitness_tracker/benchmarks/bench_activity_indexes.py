@@ -0,0 +1,54 @@
+"""
+Benchmark: Activity.get_by_student latency as the activity table grows,
+with and without the managed (student_id, date) index.
+
+Usage: python benchmarks/bench_activity_indexes.py [rows ...]
+"""
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database, seed_activity, time_calls, summarize
+from database.db_manager import db_manager
+from database.models.activity import Activity
+from database.schema import Schema
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+NUM_DAYS = 365
+NUM_QUERIES = 200
+
+
+def run(total_rows):
+    num_students = max(1, total_rows // NUM_DAYS)
+    date_from = (date.today() - timedelta(days=29)).isoformat()
+    date_to = date.today().isoformat()
+    rng = random.Random(1)
+    queries = [(rng.randint(1, num_students), None, date_from, date_to) for _ in range(NUM_QUERIES)]
+
+    with temp_database(create_indexes=False):
+        seed_activity(num_students, NUM_DAYS)
+        before = summarize(time_calls(Activity.get_by_student, queries))
+
+        Schema.create_indexes()
+        db_manager.execute("ANALYZE")
+        db_manager.commit()
+        after = summarize(time_calls(Activity.get_by_student, queries))
+        plan = Schema.explain(Schema.MODEL_QUERIES[0][1], Schema.MODEL_QUERIES[0][2])
+
+    return before, after, plan
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'rows':>10} {'no index (ms)':>15} {'indexed (ms)':>14} {'speedup':>9}")
+    for total_rows in sizes:
+        before, after, plan = run(total_rows)
+        speedup = before["median_ms"] / after["median_ms"] if after["median_ms"] else float("inf")
+        print(f"{total_rows:>10,} {before['median_ms']:>15.3f} {after['median_ms']:>14.3f} {speedup:>8.1f}x")
+    print("Indexed plan:", "; ".join(plan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: Activity.bulk_insert throughput versus saving rows one by one.
+
+Usage: python benchmarks/bench_bulk_insert.py [rows]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database
+from database.models.activity import Activity
+
+DEFAULT_ROWS = 500_000
+SINGLE_ROW_SAMPLE = 2_000
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=365 * 3)
+    num_students = max(1, count // 1000)
+    return [
+        (i % num_students + 1, (start + timedelta(days=i // num_students)).isoformat(),
+         rng.randint(3000, 15000), rng.randint(10, 120), round(rng.uniform(2, 10), 2),
+         round(rng.uniform(100, 800), 1), rng.randint(60, 160), 60.0)
+        for i in range(count)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    rows = make_rows(count)
+
+    with temp_database():
+        start = time.perf_counter()
+        for row in rows[:SINGLE_ROW_SAMPLE]:
+            Activity(*((None,) + row)).save()
+        single_rate = SINGLE_ROW_SAMPLE / (time.perf_counter() - start)
+
+    with temp_database():
+        start = time.perf_counter()
+        result = Activity.bulk_insert(rows)
+        bulk_rate = result["inserted"] / (time.perf_counter() - start)
+
+    print(f"save() one row at a time: {single_rate:>12,.0f} rows/s")
+    print(f"bulk_insert():            {bulk_rate:>12,.0f} rows/s ({len(result['errors'])} rejected)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark: AnalyticsService.get_cohort_metrics across cohort sizes, versus
+calling get_student_metrics once per student (measured on a sample and
+extrapolated for large cohorts).
+
+Usage: python benchmarks/bench_cohort_metrics.py [max_students]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database, seed_activity
+from services.analytics_service import AnalyticsService
+
+COHORT_SIZES = (10, 100, 1_000, 10_000, 100_000)
+NUM_DAYS = 31
+PER_STUDENT_SAMPLE = 200
+
+
+def main():
+    max_students = int(sys.argv[1]) if len(sys.argv) > 1 else COHORT_SIZES[-1]
+
+    print(f"{'students':>9} {'rows':>10} {'cohort':>10} {'per student':>12} {'speedup':>8}")
+    for num_students in (n for n in COHORT_SIZES if n <= max_students):
+        with temp_database():
+            seed_activity(num_students, NUM_DAYS)
+
+            start = time.perf_counter()
+            frame = AnalyticsService.get_cohort_metrics(days=NUM_DAYS - 1)
+            cohort_time = time.perf_counter() - start
+
+            # Bypass the analytics cache so every call does its own queries
+            sample = min(num_students, PER_STUDENT_SAMPLE)
+            AnalyticsService.clear_cache()
+            start = time.perf_counter()
+            for student_id in range(1, sample + 1):
+                AnalyticsService.get_student_metrics(student_id, days=NUM_DAYS - 1)
+            loop_time = (time.perf_counter() - start) * num_students / sample
+            AnalyticsService.clear_cache()
+
+        estimated = "*" if sample < num_students else " "
+        print(f"{num_students:>9,} {len(frame) * NUM_DAYS:>10,} {cohort_time * 1000:>8.1f}ms "
+              f"{loop_time * 1000:>10.1f}ms{estimated} {loop_time / cohort_time:>7.1f}x")
+    print("* extrapolated from the first", PER_STUDENT_SAMPLE, "students")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: loading activity into a DataFrame through Activity objects
+(the old analytics path) versus Activity.fetch_frame. Both load the
+whole table in storage order.
+
+Usage: python benchmarks/bench_fetch_frame.py [rows]
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database, seed_activity
+from database.db_manager import db_manager
+from database.models.activity import Activity
+from services.analytics_service import AnalyticsService
+
+DEFAULT_ROWS = 1_000_000
+NUM_DAYS = 1000
+
+
+def object_path():
+    """Rows -> Activity objects -> dicts -> DataFrame, as analytics used to do."""
+    rows = db_manager.fetchall(Activity.SELECT)
+    activities = [Activity._row_to_activity(row) for row in rows]
+    return pd.DataFrame([a.to_dict() for a in activities])
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    num_students = max(1, total_rows // NUM_DAYS)
+
+    with temp_database():
+        seed_activity(num_students, NUM_DAYS)
+
+        results = [
+            ("objects -> dicts -> DataFrame", *timed(object_path)),
+            ("fetch_frame, all columns", *timed(lambda: Activity.fetch_frame(ordered=False))),
+            ("fetch_frame, analytics columns",
+             *timed(lambda: Activity.fetch_frame(columns=AnalyticsService.ACTIVITY_COLUMNS, ordered=False))),
+            ("fetch_frame, date + steps", *timed(lambda: Activity.fetch_frame(columns=["date", "steps"], ordered=False))),
+        ]
+
+    print(f"{num_students * NUM_DAYS:,} rows")
+    baseline = results[0][1]
+    for label, seconds, frame in results:
+        memory_mb = frame.memory_usage(deep=True).sum() / 1e6
+        print(f"{label:<34} {seconds:>7.2f}s {baseline / seconds:>6.1f}x {memory_mb:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark: the school-wide weekly goal report (GoalService.get_weekly_report)
+as the number of students grows, with goals set for half of them.
+
+Usage: python benchmarks/bench_goals.py [num_students ...]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database, seed_activity
+from database.models.goal import Goal
+from services.goal_service import GoalService
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+NUM_DAYS = 28
+REPEAT = 3
+
+
+def run(num_students):
+    rng = random.Random(1)
+    with temp_database():
+        seed_activity(num_students, NUM_DAYS)
+        Goal.set_many((student_id, "steps", rng.randrange(5000, 12001, 500))
+                      for student_id in range(1, num_students + 1, 2))
+
+        timings = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            report = GoalService.get_weekly_report("steps")
+            timings.append(time.perf_counter() - start)
+    return min(timings), int(report["students"]["hit"].sum())
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'students':>9} {'report (ms)':>12} {'hit goal':>9}")
+    for num_students in sizes:
+        elapsed, hits = run(num_students)
+        print(f"{num_students:>9,} {elapsed * 1000:>12.1f} {hits:>9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark: import cost of app.py and each page, measured with
+`python -X importtime` in a fresh interpreter per run. Only the
+module-level import statements of each script are executed, so nothing is
+rendered and no database is touched.
+
+Reports the import time (interpreter start-up imports subtracted) and which
+of the heavy libraries in LAZY_MODULES each script loads eagerly. Every run
+of a script is paired with a run of REFERENCE (a bare `import streamlit`,
+which every script pays for) so that a slower or busier machine moves both.
+
+Usage: python benchmarks/bench_imports.py [--save-baseline | --check]
+
+--save-baseline stores the results in baselines/imports.json.
+--check compares against that file and exits 1 if a script got slower
+than the baseline by more than TOLERANCE (plus SLACK_MS of noise), or
+started loading a heavy library eagerly. The baseline is first scaled by
+how much slower or faster REFERENCE imports in this run than it did when
+the baseline was saved, so the check holds across machines and load.
+"""
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).parent.parent
+SCRIPTS = [APP_DIR / "app.py"] + sorted((APP_DIR / "pages").glob("*.py"))
+BASELINE_PATH = Path(__file__).parent / "baselines" / "imports.json"
+
+# Libraries that should only be imported at first use
+LAZY_MODULES = ("pandas", "numpy", "plotly.express", "statsmodels", "multiprocessing")
+REFERENCE = "import streamlit"
+REPEAT = 7
+TOLERANCE = 0.25
+SLACK_MS = 30.0
+
+
+def import_source(script):
+    """The module-level import statements of a script, as source."""
+    source = script.read_text()
+    tree = ast.parse(source)
+    return "\n".join(
+        ast.get_source_segment(source, node) for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def run_importtime(source):
+    """Run source under -X importtime; returns (total ms, names of modules imported)."""
+    driver = f"import sys\nsys.path.insert(0, {str(APP_DIR)!r})\n{source}\n"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", driver],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        modules.add(name.strip())
+    return total_us / 1000, modules
+
+
+def measure(script, startup_ms):
+    """
+    Median import time of a script and of REFERENCE, with runs of the two
+    interleaved so both see the same machine load.
+    """
+    source = import_source(script)
+    runs, reference_runs = [], []
+    for _ in range(REPEAT):
+        reference_runs.append(run_importtime(REFERENCE)[0])
+        runs.append(run_importtime(source))
+    modules = runs[0][1]
+    return {
+        "import_ms": round(max(statistics.median(ms for ms, _ in runs) - startup_ms, 0.0), 1),
+        "reference_ms": round(max(statistics.median(reference_runs) - startup_ms, 0.0), 1),
+        "eager": sorted(name for name in LAZY_MODULES if name in modules),
+    }
+
+
+def check(results, baseline):
+    """Regressions of results against baseline, as messages."""
+    failures = []
+    for script, result in results.items():
+        expected = baseline.get(script)
+        if expected is None:
+            continue
+        # Scale the baseline by how fast this run imports the reference
+        speed = result["reference_ms"] / expected["reference_ms"] if expected.get("reference_ms") else 1.0
+        limit = expected["import_ms"] * speed * (1 + TOLERANCE) + SLACK_MS
+        if result["import_ms"] > limit:
+            failures.append(f"{script}: {result['import_ms']:.1f}ms exceeds the "
+                            f"{expected['import_ms']:.1f}ms baseline (limit {limit:.1f}ms)")
+        newly_eager = sorted(set(result["eager"]) - set(expected["eager"]))
+        if newly_eager:
+            failures.append(f"{script}: now imports {', '.join(newly_eager)} at load time")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    group.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    args = parser.parse_args()
+
+    startup_ms = statistics.median(run_importtime("")[0] for _ in range(REPEAT))
+    results = {}
+    print(f"{'script':<26}{'imports (ms)':>14}{'reference (ms)':>16}  eager heavy imports")
+    for script in SCRIPTS:
+        name = str(script.relative_to(APP_DIR))
+        results[name] = measure(script, startup_ms)
+        print(f"{name:<26}{results[name]['import_ms']:>14.1f}{results[name]['reference_ms']:>16.1f}  "
+              f"{', '.join(results[name]['eager']) or '-'}")
+
+    if args.save_baseline:
+        BASELINE_PATH.parent.mkdir(exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {BASELINE_PATH}")
+    elif args.check:
+        failures = check(results, json.loads(BASELINE_PATH.read_text()))
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print("No import-time regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark: intraday storage as delta-encoded daily blobs (IntradaySeries)
+versus one table row per sample.
+
+Synthetic minute-level steps and heart rate for every student-day are
+written to three layouts:
+
+- blob: the intraday table, through IntradaySeries.ingest
+- rows: a rowid table with an index on (student_id, metric, ts)
+- rows (WITHOUT ROWID): the same rows clustered on that key
+
+For each layout the report gives the bytes stored per student-day (both
+metrics, table and index pages, from dbstat), the ingest rate, and the
+median time to load one student's week of heart rate as numpy arrays.
+
+Usage: python benchmarks/bench_intraday.py [--students N] [--days N]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database
+from database.db_manager import db_manager
+from database.models.intraday import IntradaySeries
+from utils.lazy_import import lazy_import
+from utils.synthetic_data import load_synthetic_data
+
+np = lazy_import("numpy")
+
+DEFAULT_STUDENTS = 100
+DEFAULT_DAYS = 14
+SEED = 0
+QUERY_DAYS = 7
+QUERY_SAMPLE = 50  # range queries timed per layout
+
+# layout -> CREATE statements
+ROW_LAYOUTS = {
+    "rows": [
+        "CREATE TABLE intraday_rows (id INTEGER PRIMARY KEY, student_id INTEGER, metric TEXT, "
+        "ts INTEGER, value INTEGER)",
+        "CREATE INDEX idx_intraday_rows ON intraday_rows (student_id, metric, ts)",
+    ],
+    "rows (WITHOUT ROWID)": [
+        "CREATE TABLE intraday_rows (student_id INTEGER, metric TEXT, ts INTEGER, value INTEGER, "
+        "PRIMARY KEY (student_id, metric, ts)) WITHOUT ROWID",
+    ],
+}
+
+
+def generate_samples(rng, num_students, dates):
+    """
+    Minute samples for every student-day: worn from early morning to late
+    evening with short gaps, mostly idle with walking bouts, and heart
+    rate following activity. Returns student_ids, times (datetime64[m]),
+    steps and heart_rate arrays.
+    """
+    minutes = np.arange(IntradaySeries.MINUTES_PER_DAY)
+    parts = []
+    for student_id in range(1, num_students + 1):
+        resting = rng.normal(68, 6)
+        for day in dates:
+            worn = (minutes >= rng.integers(360, 480)) & (minutes < rng.integers(1260, 1380))
+            worn &= rng.random(len(minutes)) > 0.03
+            walking = np.convolve(rng.random(len(minutes)) < 0.02, np.ones(12), mode="same") > 0
+            steps = np.where(walking, rng.normal(95, 15, len(minutes)), rng.poisson(2, len(minutes)))
+            steps = np.clip(steps, 0, 200).round()
+            heart_rate = resting + 0.35 * steps + np.cumsum(rng.normal(0, 0.6, len(minutes)))
+            heart_rate = np.clip(heart_rate, 40, 200).round()
+            parts.append((np.full(worn.sum(), student_id), np.datetime64(day, "m") + minutes[worn],
+                          steps[worn], heart_rate[worn]))
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def table_bytes(names):
+    """Bytes of the pages of these tables and indexes."""
+    placeholders = ", ".join("?" * len(names))
+    row = db_manager.fetchone(f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({placeholders})", tuple(names))
+    return row[0] or 0
+
+
+def time_queries(query, num_students, dates):
+    """Median milliseconds of query(student_id, start, end) for a week of a sample of students."""
+    rng = random.Random(SEED)
+    timings = []
+    for _ in range(QUERY_SAMPLE):
+        first = rng.randrange(max(1, len(dates) - QUERY_DAYS + 1))
+        start = dates[first]
+        started = time.perf_counter()
+        query(rng.randint(1, num_students), start, start + timedelta(days=QUERY_DAYS))
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def measure_blob(samples, num_students, dates):
+    student_ids, times, steps, heart_rate = samples
+    with temp_database():
+        load_synthetic_data(num_students, 1, SEED, end_date=dates[0] - timedelta(days=1))
+        start = time.perf_counter()
+        IntradaySeries.ingest("steps", student_ids, times, steps)
+        IntradaySeries.ingest("heart_rate", student_ids, times, heart_rate)
+        seconds = time.perf_counter() - start
+        size = table_bytes(["intraday", "sqlite_autoindex_intraday_1"])
+        query_ms = time_queries(
+            lambda student_id, first, end: IntradaySeries.get_range(student_id, "heart_rate", first, end),
+            num_students, dates
+        )
+    return size, seconds, query_ms
+
+
+def measure_rows(statements, samples, num_students, dates):
+    student_ids, times, steps, heart_rate = samples
+    epoch_minutes = times.astype(np.int64).tolist()
+    ids = student_ids.tolist()
+    with temp_database():
+        with db_manager.transaction():
+            for statement in statements:
+                db_manager.execute(statement)
+        start = time.perf_counter()
+        with db_manager.transaction():
+            for metric, values in (("steps", steps), ("heart_rate", heart_rate)):
+                db_manager.executemany(
+                    "INSERT INTO intraday_rows (student_id, metric, ts, value) VALUES (?, ?, ?, ?)",
+                    zip(ids, [metric] * len(ids), epoch_minutes, values.astype(np.int64).tolist())
+                )
+        seconds = time.perf_counter() - start
+        size = table_bytes(["intraday_rows", "idx_intraday_rows"])
+
+        def query(student_id, first, end):
+            rows = db_manager.fetchall(
+                "SELECT ts, value FROM intraday_rows WHERE student_id=? AND metric=? AND ts >= ? AND ts < ? "
+                "ORDER BY ts",
+                (student_id, "heart_rate", int(np.datetime64(first, "m").astype(np.int64)),
+                 int(np.datetime64(end, "m").astype(np.int64)))
+            )
+            table = np.array(rows, dtype=np.int64).reshape(len(rows), 2)
+            return table[:, 0].astype("datetime64[m]"), table[:, 1]
+
+        query_ms = time_queries(query, num_students, dates)
+    return size, seconds, query_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=DEFAULT_STUDENTS)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    args = parser.parse_args()
+
+    dates = [date(2026, 1, 5) + timedelta(days=i) for i in range(args.days)]
+    samples = generate_samples(np.random.default_rng(SEED), args.students, dates)
+    student_days = args.students * args.days
+    total = 2 * len(samples[0])
+    print(f"{args.students:,} students x {args.days} days, {total:,} samples "
+          f"({total / student_days:,.0f} per student-day, steps and heart rate)")
+
+    results = {"blob": measure_blob(samples, args.students, dates)}
+    for layout, statements in ROW_LAYOUTS.items():
+        results[layout] = measure_rows(statements, samples, args.students, dates)
+
+    print(f"{'layout':<22} {'bytes/student-day':>17} {'ingest samples/s':>16} {'week query ms':>13}")
+    for layout, (size, seconds, query_ms) in results.items():
+        print(f"{layout:<22} {size / student_days:>17,.0f} {total / seconds:>16,.0f} {query_ms:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: leaderboard top-K and "my rank" from the persisted student_points
+table, versus recounting every student's points from activity, plus the
+cost the maintenance triggers add to logging one activity.
+
+Usage: python benchmarks/bench_leaderboard.py [num_students ...]
+"""
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database, seed_activity, time_calls, summarize
+from database.db_manager import db_manager
+from database.models.points import StudentPoints
+from services.activity_service import ActivityService
+from services.leaderboard_service import LeaderboardService
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+NUM_DAYS = 7
+NUM_QUERIES = 50
+TOP_K = 10
+
+RECOUNT_SQL = (
+    f"SELECT student_id, SUM({StudentPoints.activity_points_sql('activity')}) AS points "
+    "FROM activity GROUP BY student_id ORDER BY points DESC LIMIT ?"
+)
+
+
+def recount_top(limit):
+    return db_manager.fetchall(RECOUNT_SQL, (limit,))
+
+
+def run(num_students):
+    rng = random.Random(1)
+    students = [(rng.randint(1, num_students),) for _ in range(NUM_QUERIES)]
+    log_date = (date.today() + timedelta(days=1)).isoformat()
+
+    with temp_database():
+        seed_activity(num_students, NUM_DAYS)
+        db_manager.execute("ANALYZE")
+        db_manager.commit()
+
+        return {
+            "top": summarize(time_calls(LeaderboardService.get_leaderboard, [(TOP_K,)] * NUM_QUERIES)),
+            "rank": summarize(time_calls(LeaderboardService.get_rank, students)),
+            "recount": summarize(time_calls(recount_top, [(TOP_K,)] * 5)),
+            "log": summarize(time_calls(
+                lambda sid: ActivityService.log_activity(sid, log_date, 12000, 45, 8.0, 400.0, 95, 60.0),
+                [(sid,) for sid in sorted({s for (s,) in students})]
+            )),
+        }
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'students':>9} {'top-10':>9} {'my rank':>9} {'recount':>10} {'log activity':>13}  (median ms)")
+    for num_students in sizes:
+        result = run(num_students)
+        print(f"{num_students:>9,} {result['top']['median_ms']:>9.3f} {result['rank']['median_ms']:>9.3f} "
+              f"{result['recount']['median_ms']:>10.1f} {result['log']['median_ms']:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: memory and build time for a page of activities held as
+dict-based objects (the previous model), slotted Activity objects and an
+ActivityBatch.
+
+Usage: python benchmarks/bench_models.py [rows]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database, seed_activity
+from database.db_manager import db_manager
+from database.models.activity import Activity, ActivityBatch
+
+DEFAULT_ROWS = 200_000
+NUM_DAYS = 1000
+
+
+class DictActivity:
+    """The Activity model as it was before __slots__, built by keyword."""
+
+    def __init__(self, id=None, student_id=None, date=None, steps=None,
+                 active_minutes=None, distance=None, calories=None,
+                 heart_rate=None, weight_kg=None):
+        self.id = id
+        self.student_id = student_id
+        self.date = date
+        self.steps = steps
+        self.active_minutes = active_minutes
+        self.distance = distance
+        self.calories = calories
+        self.heart_rate = heart_rate
+        self.weight_kg = weight_kg
+
+
+def dict_objects():
+    rows = db_manager.fetchall(Activity.SELECT)
+    return [
+        DictActivity(id=row["id"], student_id=row["student_id"], date=row["date"],
+                     steps=row["steps"], active_minutes=row["active_minutes"],
+                     distance=row["distance"], calories=row["calories"],
+                     heart_rate=row["heart_rate"], weight_kg=row["weight_kg"])
+        for row in rows
+    ]
+
+
+def slotted_objects():
+    return db_manager.fetchall(Activity.SELECT, row_factory=Activity._from_cursor)
+
+
+def batch():
+    result = ActivityBatch()
+    for rows in db_manager.fetch_chunks(Activity.SELECT):
+        result.extend(rows)
+    return result
+
+
+def measure(func):
+    """Build time, and memory still held by the result once built."""
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, held, len(result)
+
+
+def main():
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    num_students = max(1, total_rows // NUM_DAYS)
+
+    with temp_database():
+        seed_activity(num_students, NUM_DAYS)
+        results = [
+            ("dict objects (keyword build)", measure(dict_objects)),
+            ("slotted Activity (positional)", measure(slotted_objects)),
+            ("ActivityBatch (column arrays)", measure(batch)),
+        ]
+
+    print(f"{num_students * NUM_DAYS:,} rows")
+    for label, (seconds, held, count) in results:
+        print(f"{label:<32} {seconds:>7.2f}s {held / 1e6:>8.1f} MB {held / count:>7.0f} B/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: SQL statements issued by one cold render of each page (analytics
+cache cleared first), counted with SQLite's statement trace hook. Pages are
+rendered headless with Streamlit's AppTest against the sample data.
+
+Usage: python benchmarks/bench_page_queries.py [--no-cache]
+
+--no-cache keeps the analytics cache from storing anything, so repeated
+loads within a render show up as repeated queries.
+"""
+import logging
+import sys
+from collections import Counter
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database
+from database.db_manager import ConnectionPool, db_manager
+from services.analytics_service import AnalyticsService, analytics_cache
+from utils.sample_data import load_sample_data
+
+APP_DIR = Path(__file__).parent.parent
+PAGES = [APP_DIR / "app.py"] + sorted((APP_DIR / "pages").glob("*.py"))
+
+statements = Counter()
+
+
+def count_statement(sql):
+    """Trace callback: tally top-level statements by their first keyword."""
+    sql = sql.lstrip()
+    if sql.startswith("--"):  # statements run inside triggers
+        return
+    keyword = sql.split(None, 1)[0].upper() if sql else ""
+    statements["reads" if keyword in ("SELECT", "WITH", "PRAGMA") else "other"] += 1
+
+
+def traced_open(open_connection):
+    def _open(pool):
+        conn = open_connection(pool)
+        conn.set_trace_callback(count_statement)
+        return conn
+    return _open
+
+
+def main():
+    ConnectionPool._open = traced_open(ConnectionPool._open)
+    if "--no-cache" in sys.argv[1:]:
+        analytics_cache.max_bytes = 0
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    with temp_database():
+        load_sample_data()
+        print(f"{'page':<28} {'reads':>6} {'other':>6}")
+        for page in PAGES:
+            app = AppTest.from_file(str(page), default_timeout=60)
+            app.session_state["points"] = 0
+            app.session_state["achievements"] = []
+            AnalyticsService.clear_cache()
+            statements.clear()
+            app.run()
+            status = "" if not app.exception else "  (raised)"
+            print(f"{page.name:<28} {statements['reads']:>6} {statements['other']:>6}{status}")
+
+
+if __name__ == "__main__":
+    main()
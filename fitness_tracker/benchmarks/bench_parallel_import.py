@@ -0,0 +1,103 @@
+"""
+Benchmark: bulk import throughput with 1, 2, 4 and 8 parsing workers.
+
+A synthetic population is exported to CSV once, then imported into fresh
+databases holding the same students. For each worker count two figures
+are reported:
+
+- parse + validate: the worker pipeline alone (ImportService._batches),
+  which should scale with the number of cores
+- import: the whole import, including the single writer, which caps the
+  speed-up once the workers produce rows faster than SQLite takes them
+
+1 worker parses in-process; the others use the process pool, whatever
+the file size. Worker counts above the machine's cores can't speed up.
+
+Usage: python benchmarks/bench_parallel_import.py [--students N] [--days N]
+                                                  [--workers 1,2,4,8] [--format csv|jsonl]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+from benchmarks.common import temp_database
+from services.export_service import ExportService
+from services.import_service import ImportService, StudentIndex
+from utils.synthetic_data import load_synthetic_data
+
+DEFAULT_STUDENTS = 2000
+DEFAULT_DAYS = 365
+WORKER_COUNTS = (1, 2, 4, 8)
+SEED = 0
+
+
+def load_students(num_students):
+    """The benchmark's students, with a single day of activity outside the imported range."""
+    load_synthetic_data(num_students, 1, SEED, end_date=date(2000, 1, 1))
+
+
+def time_pipeline(path, fmt, workers):
+    """Seconds to parse and validate the whole file, and the records read."""
+    index = StudentIndex.load()
+    records = 0
+    start = time.perf_counter()
+    with open(path, "rb") as file:
+        size = os.path.getsize(path)
+        for count, _, _, _ in ImportService._batches(file, fmt, "metric", index, None,
+                                                     config.IMPORT_CHUNK_SIZE, workers, size):
+            records += count
+    return time.perf_counter() - start, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=DEFAULT_STUDENTS)
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--workers", default=",".join(map(str, WORKER_COUNTS)),
+                        help="comma-separated worker counts")
+    parser.add_argument("--format", choices=ImportService.PARALLEL_FORMATS, default="csv")
+    args = parser.parse_args()
+    worker_counts = [int(count) for count in args.workers.split(",")]
+
+    path = os.path.join(tempfile.mkdtemp(prefix="fitness_bench_"), f"activity.{args.format}")
+    with temp_database():
+        load_synthetic_data(args.students, args.days, SEED)
+        with open(path, "wb") as file:
+            ExportService.write(file, args.format)
+    print(f"{os.path.getsize(path) / 1e6:,.1f} MB {args.format}, {args.students:,} students x "
+          f"{args.days} days, {os.cpu_count()} CPUs")
+
+    # Use the pool for any file size, so every count above 1 measures it,
+    # and start the fork server first, as in a long-running app
+    config.IMPORT_PARALLEL_MIN_BYTES = 0
+    with ProcessPoolExecutor(1, mp_context=ImportService._worker_context()) as pool:
+        pool.submit(int).result()
+    print(f"{'workers':>7}  {'parse+validate rows/s':>21}  {'speed-up':>8}  {'import rows/s':>13}  {'speed-up':>8}")
+    base = None
+    for workers in worker_counts:
+        with temp_database():
+            load_students(args.students)
+            parse_seconds, records = time_pipeline(path, args.format, workers)
+        with temp_database():
+            load_students(args.students)
+            result = ImportService.import_file(path, args.format, evaluate_achievements=False, workers=workers)
+        rates = (records / parse_seconds, result["records"] / result["seconds"])
+        base = base or rates
+        print(f"{workers:>7}  {rates[0]:>21,.0f}  {rates[0] / base[0]:>7.2f}x  "
+              f"{rates[1]:>13,.0f}  {rates[1] / base[1]:>7.2f}x")
+        if result["rejected"]:
+            print(f"         {result['rejected']:,} records rejected")
+
+    os.remove(path)
+    os.rmdir(os.path.dirname(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: overhead of the query instrumentation in DatabaseManager.
+Runs a read workload (student lookups, activity history, goals and
+leaderboard pages) in short segments, each once with statistics
+recording off and once on in alternating order, so drift in machine
+speed affects both sides equally, and reports the difference in total
+and the median of the segments' differences, which a few segments
+disturbed by the machine can't move.
+
+Usage: python benchmarks/bench_query_stats.py [num_students] [num_days]
+"""
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database, seed_activity
+from database.db_manager import db_manager
+from database.models.activity import Activity
+from database.models.goal import Goal
+from database.models.student import Student
+from services.leaderboard_service import LeaderboardService
+
+NUM_STUDENTS = 2_000
+NUM_DAYS = 90
+SEGMENTS = 400
+LOOKUPS_PER_SEGMENT = 20
+
+
+def workload(student_ids):
+    for student_id in student_ids:
+        Student.get_by_id(student_id)
+        Activity.get_by_student(student_id, limit=30)
+        Goal.get(student_id)
+        LeaderboardService.get_leaderboard(10, student_id % 500)
+
+
+def main():
+    num_students = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_STUDENTS
+    num_days = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_DAYS
+    rng = random.Random(1)
+    segments = [[rng.randint(1, num_students) for _ in range(LOOKUPS_PER_SEGMENT)]
+                for _ in range(SEGMENTS)]
+    query_stats = db_manager.query_stats
+    query_stats.slow_ms = float("inf")  # measure the recording path, not slow-log writes
+
+    with temp_database():
+        seed_activity(num_students, num_days)
+        for segment in segments[:20]:
+            workload(segment)  # warm caches
+        query_stats.reset()
+
+        elapsed = {False: 0.0, True: 0.0}
+        ratios = []
+        for position, segment in enumerate(segments):
+            order = (False, True) if position % 2 else (True, False)
+            times = {}
+            for enabled in order:
+                query_stats.enabled = enabled
+                start = time.perf_counter()
+                workload(segment)
+                times[enabled] = time.perf_counter() - start
+                elapsed[enabled] += times[enabled]
+            ratios.append(times[True] / times[False])
+
+        statements = sum(row["calls"] for row in query_stats.summary())
+        off, on = elapsed[False], elapsed[True]
+        print(f"{statements:,} statements recorded (estimated from a {query_stats.sample_rate:.0%} sample), "
+              f"{off / statements * 1e6:.1f}us each on average")
+        print(f"recording off: {off * 1000:.1f}ms, on: {on * 1000:.1f}ms")
+        print(f"overhead: {(on - off) / off * 100:+.2f}% "
+              f"({(on - off) / statements * 1e6:.2f}us per statement), "
+              f"median per segment: {(statistics.median(ratios) - 1) * 100:+.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Regression checks for behaviour the timing benchmarks don't exercise.
+Each check runs against its own throwaway database, never the app database.
+
+Usage: python benchmarks/checks.py [CHECK ...]
+
+Runs every check (or the named ones) and exits 1 if any fails.
+"""
+import io
+import shlex
+import sys
+import tempfile
+import traceback
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+import streamlit as st
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+from streamlit.testing.v1 import AppTest
+
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+import manage
+from benchmarks.common import temp_database
+from database.db_manager import db_manager
+from database.models.activity import Activity, ActivityBatch
+from database.models.goal import Goal
+from database.models.intraday import IntradaySeries
+from database.models.points import StudentPoints
+from database.models.student import Student
+from database.schema import Schema
+from services.achievement_service import AchievementService
+from services.activity_service import ActivityService
+from services.analytics_service import AnalyticsService
+from services.export_service import ExportService
+from services.goal_service import GoalService
+from services.import_service import ImportService
+from services.leaderboard_service import LeaderboardService
+from services.student_service import StudentService
+
+APP_DIR = Path(__file__).parent.parent
+
+# name -> check function; a check fails by raising
+CHECKS = {}
+
+
+def check(func):
+    CHECKS[func.__name__] = func
+    return func
+
+
+def add_students(count):
+    """Add count students (ids 1..count in a fresh database)."""
+    for number in range(1, count + 1):
+        StudentService.add_student(f"Check Student {number}", 15, "10", "Other", "Beginner", 165.0)
+
+
+@check
+def seven_day_run_unlocks_streak_and_goal_achievements():
+    """Seven consecutive days over the daily goals unlock the streak and goal-rate achievements."""
+    add_students(1)
+    start = date(2026, 1, 5)
+    for day in range(7):
+        ok, message = ActivityService.log_activity(1, (start + timedelta(days=day)).isoformat(),
+                                                   12000, 60, 8.0, 400.0, 90, 60.0)
+        assert ok, message
+    missing = {"consistent_logger", "steps_achiever", "activity_achiever"} - set(AchievementService.get_unlocked(1))
+    assert not missing, f"not unlocked: {', '.join(sorted(missing))}"
+
+
+@check
+def bulk_insert_pads_dates():
+    """Unpadded dates are stored zero-padded, so they load, filter and dedupe like ISO dates."""
+    add_students(1)
+    result = Activity.bulk_insert([(1, "2024-1-5", 5000, 30, 3.0, 200.0, 80, 60.0)])
+    assert result["inserted"] == 1 and not result["errors"], result
+    dates = [row["date"] for row in db_manager.fetchall("SELECT date FROM activity")]
+    assert dates == ["2024-01-05"], dates
+    assert len(Activity.fetch_frame([1])) == 1
+    result = Activity.bulk_insert([(1, "2024-01-5", 6000, 30, 3.0, 200.0, 80, 60.0)])
+    assert result["inserted"] == 0 and len(result["errors"]) == 1, result
+
+
+
+@check
+def bulk_insert_reports_rows_of_the_wrong_length():
+    """A short or long row is reported by position and the rest of the batch is written."""
+    add_students(1)
+    result = Activity.bulk_insert([
+        (1, "2024-01-05", 5000, 30, 3.0, 200.0, 80, 60.0),
+        (1, "2024-01-06", 5000),
+        (1, "2024-01-07", 5000, 30, 3.0, 200.0, 80, 60.0, "extra"),
+        (1, "2024-01-08", -1, 30, 3.0, 200.0, 80, 60.0),
+        (1, "2024-01-09", 5000, 30, 3.0, 200.0, 80, 60.0),
+    ])
+    assert result["inserted"] == 2, result
+    assert [error["row"] for error in result["errors"]] == [1, 2, 3], result
+    assert result["errors"][0]["error"] == "expected 8 fields, got 3", result
+
+
+@check
+def activity_batch_keeps_rows_without_a_student():
+    """A legacy row with a NULL student_id loads into an ActivityBatch and reads back as None."""
+    batch = ActivityBatch([(1, None, "2024-01-05", 5000, 30, 3.0, 200.0, None, 60.0),
+                           (2, 7, "2024-01-06", 6000, 30, 3.0, 200.0, 80, None)])
+    assert [activity.student_id for activity in batch] == [None, 7]
+    assert batch[0].heart_rate is None and batch[1].steps == 6000
+
+
+@check
+def activity_frame_loads_malformed_legacy_rows():
+    """Text in a numeric column loads as NaN; rows with a malformed date are skipped and logged."""
+    add_students(1)
+    Activity.upsert_many([(1, "2024-01-05", 5000, 30, 3.0, 200.0, 80, 60.0)])
+    # Legacy rows written before validation, bypassing the model
+    db_manager.executemany("INSERT INTO activity (student_id, date, steps) VALUES (1, ?, ?)",
+                           [("2024-13-45", 1), ("not a date", 2), ("2024-01-08", "lots")])
+    db_manager.commit()
+    with mock.patch("database.models.activity.logger") as logger:
+        frame = Activity.fetch_frame(1, columns=["date", "steps"])
+    assert logger.warning.call_count == 1, logger.warning.call_args_list
+    assert frame["date"].dt.strftime("%Y-%m-%d").tolist() == ["2024-01-05", "2024-01-08"], frame
+    assert frame["steps"].iloc[0] == 5000 and frame["steps"].isna().iloc[1], frame
+
+
+@check
+def index_advisor_checks_the_queries_the_models_issue():
+    """Schema.MODEL_QUERIES holds the SQL the models run, and each query uses its index."""
+    with mock.patch.object(db_manager, "fetchall", return_value=[]) as fetchall:
+        Activity.get_by_student(1, date_from="2024-01-01", date_to="2024-01-31")
+        Student.get_all()
+    issued = [call.args[0] for call in fetchall.call_args_list]
+    assert issued == [query for _, query, _, _ in Schema.MODEL_QUERIES], issued
+    report = Schema.check_indexes()
+    assert all(entry["uses_index"] for entry in report), report
+
+@check
+def activity_without_student_creates_no_points_row():
+    """Moving activity to a NULL student adds no points row; an unscored student ranks within the total."""
+    add_students(3)
+    for student_id in (1, 2):
+        ok, message = ActivityService.log_activity(student_id, "2026-01-05", 8000, 40, 5.0, 300.0, 85, 60.0)
+        assert ok, message
+    db_manager.execute("UPDATE activity SET student_id=NULL WHERE student_id=2")
+    ids = [row["student_id"] for row in db_manager.fetchall("SELECT student_id FROM student_points")]
+    assert None not in ids and len(ids) <= 2, ids
+    for student_id in (1, 2, 3):
+        rank, _, total = StudentPoints.rank(student_id)
+        assert rank <= total, (student_id, rank, total)
+
+
+@check
+def goal_attainment_ignores_deleted_students_activity():
+    """Activity left behind by a deleted student isn't counted, or counted for someone else."""
+    add_students(3)
+    for student_id in (1, 3):
+        ok, message = ActivityService.log_activity(student_id, "2026-01-05", 12000, 60, 8.0, 400.0, 90, 60.0)
+        assert ok, message
+    ok, message = StudentService.delete_student(3)
+    assert ok, message
+    GoalService.get_weekly_report(week_of=date(2026, 1, 5))
+    attainment = GoalService.get_attainment("steps", date_from="2026-01-05", date_to="2026-01-05")
+    assert list(attainment.index) == [1, 2], list(attainment.index)
+    assert list(attainment["days_logged"]) == [1, 0], list(attainment["days_logged"])
+
+
+@check
+def intraday_ingest_drops_unknown_students_and_reports_rejected_days():
+    """Samples of unknown students are dropped; days whose activity row fails are reported."""
+    add_students(1)
+    db_manager.execute("CREATE TRIGGER block_day BEFORE INSERT ON activity WHEN NEW.date = '2026-01-06' "
+                       "BEGIN SELECT RAISE(ABORT, 'blocked'); END")
+    result = IntradaySeries.ingest("steps", [1, 1, 99], ["2026-01-05 08:00", "2026-01-06 08:00", "2026-01-05 08:00"],
+                                   [100, 120, 90])
+    assert (result["samples"], result["dropped"]) == (2, 1), result
+    assert [(error["student_id"], error["date"]) for error in result["errors"]] == [(1, "2026-01-06")], result
+    assert not db_manager.fetchall("SELECT 1 FROM intraday WHERE student_id = 99")
+    assert not db_manager.fetchall("SELECT 1 FROM activity WHERE student_id = 99")
+    assert not db_manager.fetchall("SELECT 1 FROM student_points WHERE student_id = 99")
+
+
+@check
+def export_download_data_converts():
+    """What the export page's download callable returns is data st.download_button can serve."""
+    add_students(1)
+    ok, message = ActivityService.log_activity(1, date.today().isoformat(), 8000, 40, 5.0, 300.0, 85, 60.0)
+    assert ok, message
+    buttons = []
+
+    def download_button(label, data, **kwargs):
+        buttons.append(data)
+        return download(label, data, **kwargs)
+
+    download = st.download_button
+    app = AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=120)
+    app.run()
+    with mock.patch.object(st, "download_button", download_button):
+        app.switch_page("pages/8_export.py").run()
+    assert not app.exception, app.exception[0].value if app.exception else None
+    assert len(buttons) == 1 and callable(buttons[0]), buttons
+    buffer = buttons[0]()
+    assert buffer.tell() == 0, buffer.tell()
+    data, _ = convert_data_to_bytes_and_infer_mime(buffer, TypeError("unsupported download data"))
+    assert data.count(b"\n") == 2, data
+
+
+@check
+def export_page_sends_large_exports_to_the_command_line():
+    """Above EXPORT_DOWNLOAD_MAX_ROWS the download is disabled and the page shows a working manage.py command."""
+    add_students(2)
+    for student_id in (1, 2):
+        ok, message = ActivityService.log_activity(student_id, date.today().isoformat(), 8000, 40, 5.0, 300.0, 85, 60.0)
+        assert ok, message
+    app = AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=120)
+    app.run()
+    with mock.patch.object(config, "EXPORT_DOWNLOAD_MAX_ROWS", 1):
+        app.switch_page("pages/8_export.py").run()
+    assert not app.exception, app.exception[0].value if app.exception else None
+    assert app.warning and len(app.code) == 1, (app.warning, app.code)
+    button = app.get("download_button")[0]
+    assert button.proto.disabled, button.proto
+
+    args = shlex.split(app.code[0].value)
+    assert args[:3] == ["python", "manage.py", "export"], args
+    with tempfile.TemporaryDirectory() as directory:
+        output = Path(directory) / args[args.index("--output") + 1]
+        args[args.index("--output") + 1] = str(output)
+        with mock.patch.object(sys, "stdout", io.StringIO()):
+            manage.main(args[2:])
+        assert output.read_bytes() == ExportService.to_buffer("csv").getvalue()
+
+
+
+@check
+def weekly_summary_stays_inside_the_window():
+    """The edge weeks of a period summary only count days inside the window, and metrics read no activity rows."""
+    add_students(1)
+    today = date.today()
+    Activity.upsert_many([(1, (today - timedelta(days=day)).isoformat(), 1000, 10, 1.0, 100.0, 80, None)
+                          for day in range(28)])
+    # The window is today and the 7 days before it
+    summary = AnalyticsService.get_period_summary(1, "week", days=7)
+    assert summary["days"].sum() == 8 and summary["steps"].sum() == 8000, summary
+    with mock.patch.object(Activity, "fetch_frame", side_effect=AssertionError("raw activity scan")):
+        metrics = AnalyticsService.get_student_metrics(1, days=7)["metrics"]
+    assert metrics["days_logged"] == 8 and metrics["total_steps"] == 8000, metrics
+
+@check
+def goal_attainment_counts_days_without_the_metric():
+    """A day logged without the goal's metric counts as logged and not achieved."""
+    add_students(1)
+    Activity.upsert_many([(1, "2026-01-05", None, None, None, None, None, 61.0)], keep_missing=True)
+    counts = Goal.day_counts("steps", 10000)
+    assert counts["days"].tolist() == [1] and counts["days_achieved"].tolist() == [0], counts
+    attainment = GoalService.get_attainment("steps")
+    assert attainment["days_achieved"].tolist() == [0], attainment
+
+
+@check
+def deleted_student_leaves_the_leaderboard():
+    """A deleted student's points row goes, and a full rebuild doesn't bring it back."""
+    add_students(2)
+    for student_id, steps in ((1, 3000), (2, 12000)):
+        ok, message = ActivityService.log_activity(student_id, "2026-01-05", steps, 40, 5.0, 300.0, 85, 60.0)
+        assert ok, message
+    ok, message = StudentService.delete_student(2)
+    assert ok, message
+    StudentPoints.rebuild()
+    assert [row["student_id"] for row in StudentPoints.top()] == [1], StudentPoints.top()
+    assert StudentPoints.rank(1)[::2] == (1, 1), StudentPoints.rank(1)
+    history = LeaderboardService.get_points_history(1)
+    assert history["Points"].iloc[-1] == LeaderboardService.get_points(1)["points"], history
+
+
+@check
+def import_rejects_rows_without_student_or_date():
+    """A file with no recognised columns reports its rows as rejected instead of dropping them."""
+    add_students(1)
+    result = ImportService.import_file(io.BytesIO(b"foo,bar\n1,2\n"), "csv", workers=1)
+    assert (result["records"], result["imported"], result["rejected"]) == (1, 0, 1), result
+    assert "missing student" in result["errors"][0]["error"], result["errors"]
+    assert "missing date" in result["errors"][0]["error"], result["errors"]
+
+
+@check
+def import_reports_malformed_xml_as_value_error():
+    """Malformed Apple Health XML fails the import with a ValueError, like other unreadable files."""
+    add_students(1)
+    try:
+        ImportService.import_file(io.BytesIO(b"<HealthData><Record"), "apple_health", student=1)
+    except ValueError:
+        return
+    raise AssertionError("no ValueError for malformed XML")
+
+
+@check
+def apple_health_memory_is_flat_in_records():
+    """Reading an Apple Health export holds days, not records: 10x the records costs no more memory."""
+    def export(records):
+        lines = (f'<Record type="HKQuantityTypeIdentifierStepCount" unit="count" value="10" '
+                 f'startDate="2026-01-{1 + number % 28:02d} 08:00:00 +0000"/>' for number in range(records))
+        return ("<HealthData>" + "".join(lines) + "</HealthData>").encode()
+
+    list(ImportService._read_apple_health(io.BytesIO(export(10)), 1000))  # import pandas first
+    peaks = []
+    for records in (20000, 200000):
+        data = export(records)
+        tracemalloc.start()
+        list(ImportService._read_apple_health(io.BytesIO(data), 1000))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < peaks[0] * 2, peaks
+
+
+def main():
+    names = sys.argv[1:] or list(CHECKS)
+    unknown = [name for name in names if name not in CHECKS]
+    if unknown:
+        sys.exit(f"Unknown checks: {', '.join(unknown)}")
+
+    failures = 0
+    for name in names:
+        try:
+            with temp_database():
+                CHECKS[name]()
+            print(f"ok    {name}")
+        except Exception:
+            failures += 1
+            print(f"FAIL  {name}\n{traceback.format_exc()}")
+    print(f"{len(names) - failures} passed, {failures} failed")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
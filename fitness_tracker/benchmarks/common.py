@@ -0,0 +1,94 @@
+"""
+Shared helpers for the benchmark scripts.
+Each benchmark runs against a throwaway database, never the app database.
+"""
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add parent directory to path to import config and the database layer
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+from database.db_manager import db_manager
+from database.models.activity import Activity
+from database.schema import Schema, init_schema
+
+
+@contextmanager
+def temp_database(create_indexes=True):
+    """
+    Point the app at an empty temporary database for the duration of a block.
+    With create_indexes=False only the base tables are created, so the
+    migrations and their indexes are skipped.
+    """
+    original_path = config.DB_PATH
+    tmp_dir = tempfile.mkdtemp(prefix="fitness_bench_")
+    db_manager.close()
+    config.DB_PATH = os.path.join(tmp_dir, "bench.db")
+    try:
+        if create_indexes:
+            init_schema()
+        else:
+            Schema.create_tables()
+        yield config.DB_PATH
+    finally:
+        db_manager.close()
+        config.DB_PATH = original_path
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def seed_activity(num_students, num_days, seed=0):
+    """Insert num_students students with num_days of daily activity each."""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=num_days - 1)
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(num_days)]
+
+    with db_manager.transaction():
+        # Rebuild rollups and points once at the end rather than per row, if migrated
+        migrated = db_manager.fetchone(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='student_points'"
+        )
+        if migrated:
+            for derived in Activity.DERIVED:
+                derived.suspend()
+        db_manager.executemany(
+            "INSERT INTO students (id, name, age, grade, gender, fitness_level, height_cm) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((sid, f"Student {sid}", 15, "10", "Other", "Beginner", 165.0)
+             for sid in range(1, num_students + 1))
+        )
+        db_manager.executemany(
+            "INSERT INTO activity (student_id, date, steps, active_minutes, distance, "
+            "calories, heart_rate, weight_kg) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((sid, d, rng.randint(3000, 15000), rng.randint(10, 120), 5.0, 400.0, 90, 60.0)
+             for d in dates for sid in range(1, num_students + 1))
+        )
+        if migrated:
+            for derived in Activity.DERIVED:
+                derived.rebuild()
+                derived.create_triggers()
+
+
+def time_calls(func, args_list, repeat=1):
+    """Call func once per args tuple and return per-call timings in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            func(*args)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    """Median and p95 of a list of timings."""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {"median_ms": statistics.median(ordered), "p95_ms": p95}
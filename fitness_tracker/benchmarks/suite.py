@@ -0,0 +1,233 @@
+"""
+Benchmark suite: times the hot model, service and page paths against
+synthetic databases of several sizes and reports the results as JSON.
+
+Each size is a fresh temporary database filled by
+utils.synthetic_data.load_synthetic_data with a fixed seed, so runs are
+comparable. Model and service calls are timed per call over a fixed,
+seeded sample of students, with the analytics cache cleared before each
+call (cold). Pages are rendered headless with Streamlit's AppTest, cold
+cache, which covers each page's data loading and preparation. Each page is
+reached through app.py, as in the app, so its page links resolve; only the
+page's own run is timed.
+
+For every case the JSON holds the minimum, median and p95 per size, and
+the scaling exponent of the median between the smallest and largest size
+(0 = flat, 1 = linear in the number of students).
+
+Usage: python benchmarks/suite.py [--students 100,1000,5000] [--days 90]
+                                  [--output FILE] [--save-baseline | --compare [FILE]]
+                                  [--tolerance FRACTION]
+
+--save-baseline stores the results in baselines/suite.json.
+--compare checks against that file (or FILE) and exits 1 if a case failed
+to run, if a case's
+scaling exponent grew by more than SCALING_SLACK, or its minimum time got
+slower than the baseline by more than --tolerance (plus SLACK_MS) at any
+size. The scaling check is the sharp one: it compares sizes within one
+run, so it holds up when the machine is slower or busier than when the
+baseline was taken. The absolute check defaults to a loose TOLERANCE
+(2x) for that reason; tighten it on a quiet, dedicated machine. Both
+exit 1 without saving or comparing if any case failed to run.
+"""
+import argparse
+import json
+import logging
+import math
+import platform
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from benchmarks.common import temp_database, time_calls, summarize
+from database.models.activity import Activity
+from database.models.student import Student
+from services.analytics_service import AnalyticsService
+from services.student_service import StudentService
+from utils.synthetic_data import load_synthetic_data
+
+APP_DIR = Path(__file__).parent.parent
+PAGES = sorted((APP_DIR / "pages").glob("*.py"))
+BASELINE_PATH = Path(__file__).parent / "baselines" / "suite.json"
+
+STUDENT_COUNTS = (100, 1000, 5000)
+NUM_DAYS = 90
+SEED = 0
+SAMPLE_STUDENTS = 50  # students timed per model/service case
+PAGE_REPEAT = 5
+TOLERANCE = 1.0
+SLACK_MS = 2.0
+SCALING_SLACK = 0.25
+
+
+def cold(func):
+    """func with the analytics cache cleared before every call."""
+    def call(*args):
+        AnalyticsService.clear_cache()
+        return func(*args)
+    return call
+
+
+# name -> (function, whether it takes a student id)
+CASES = {
+    "Activity.get_by_student": (Activity.get_by_student, True),
+    "Student.get_all": (Student.get_all, False),
+    "StudentService.get_student_options_dict": (StudentService.get_student_options_dict, False),
+    "AnalyticsService.get_student_metrics": (cold(AnalyticsService.get_student_metrics), True),
+    "AnalyticsService.get_trend_data": (cold(lambda student_id: AnalyticsService.get_trend_data(student_id, "steps")),
+                                        True),
+}
+
+
+def open_page(page):
+    """A headless session that has run app.py and switched to page, not yet run."""
+    app = AppTest.from_file(str(APP_DIR / "app.py"), default_timeout=120)
+    app.session_state["points"] = 0
+    app.session_state["achievements"] = []
+    run_page(app)
+    return app.switch_page(page.relative_to(APP_DIR).as_posix())
+
+
+def run_page(app):
+    AnalyticsService.clear_cache()
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+
+
+def summary(timings):
+    """Median and p95, plus the minimum, which compare() uses as the least noisy figure."""
+    result = dict(summarize(timings), min_ms=min(timings))
+    return {key: round(value, 3) for key, value in result.items()}
+
+
+def measure_size(num_students, num_days):
+    """Seed a database with num_students and time every case; returns {case: summary}."""
+    results = {}
+    with temp_database():
+        load_synthetic_data(num_students, num_days, SEED)
+        rng = random.Random(SEED)
+        student_ids = [(rng.randint(1, num_students),) for _ in range(SAMPLE_STUDENTS)]
+
+        for name, (func, per_student) in CASES.items():
+            func(*student_ids[0][:per_student])  # warm up statements and imports
+            args_list = student_ids if per_student else [()] * min(SAMPLE_STUDENTS, 10)
+            results[name] = summary(time_calls(func, args_list))
+
+        for page in PAGES:
+            name = f"page:{page.name}"
+            try:
+                run_page(open_page(page))  # warm up
+                sessions = [(open_page(page),) for _ in range(PAGE_REPEAT)]
+                results[name] = summary(time_calls(run_page, sessions))
+            except RuntimeError as e:
+                results[name] = {"error": str(e)}
+    return results
+
+
+def scaling(by_size):
+    """Per case, log(time ratio) / log(size ratio) between the smallest and largest size."""
+    sizes = sorted(by_size, key=int)
+    small, large = by_size[sizes[0]], by_size[sizes[-1]]
+    exponents = {}
+    for name, result in large.items():
+        base = small.get(name, {})
+        if len(sizes) > 1 and "median_ms" in result and base.get("median_ms"):
+            exponents[name] = round(math.log(result["median_ms"] / base["median_ms"])
+                                    / math.log(int(sizes[-1]) / int(sizes[0])), 2)
+    return exponents
+
+
+def errors(report):
+    """Cases that failed to run, as messages."""
+    return [f"{name} @ {size} students: {result['error']}"
+            for size, cases in report["results"].items()
+            for name, result in cases.items() if "error" in result]
+
+
+def compare(report, baseline, tolerance=TOLERANCE):
+    """Regressions of report against baseline, as messages."""
+    failures = []
+    for size, cases in report["results"].items():
+        for name, result in cases.items():
+            expected = baseline["results"].get(size, {}).get(name)
+            if not expected or "min_ms" not in expected or "min_ms" not in result:
+                continue
+            limit = expected["min_ms"] * (1 + tolerance) + SLACK_MS
+            if result["min_ms"] > limit:
+                failures.append(f"{name} @ {size} students: {result['min_ms']:.2f}ms exceeds the "
+                                f"{expected['min_ms']:.2f}ms baseline (limit {limit:.2f}ms)")
+    for name, exponent in report["scaling"].items():
+        expected = baseline["scaling"].get(name)
+        if expected is not None and exponent > expected + SCALING_SLACK:
+            failures.append(f"{name}: scales as n^{exponent}, baseline n^{expected}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", default=",".join(map(str, STUDENT_COUNTS)),
+                        help="comma-separated database sizes in students")
+    parser.add_argument("--days", type=int, default=NUM_DAYS, help="days of activity per student")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown over the baseline, as a fraction (default %(default)s)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    group.add_argument("--compare", nargs="?", const=str(BASELINE_PATH), metavar="FILE",
+                       help="fail on regressions against a baseline")
+    args = parser.parse_args()
+
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+
+    sizes = [int(size) for size in args.students.split(",")]
+    report = {
+        "meta": {
+            "students": sizes,
+            "days": args.days,
+            "seed": SEED,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": {},
+    }
+    for size in sizes:
+        print(f"{size:,} students x {args.days} days...", file=sys.stderr)
+        report["results"][str(size)] = measure_size(size, args.days)
+    report["scaling"] = scaling(report["results"])
+
+    output = json.dumps(report, indent=2) + "\n"
+    print(output, end="")
+    if args.output:
+        Path(args.output).write_text(output)
+
+    failed = errors(report)
+    if failed and (args.save_baseline or args.compare):
+        for failure in failed:
+            print(f"ERROR {failure}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.save_baseline:
+        BASELINE_PATH.parent.mkdir(exist_ok=True)
+        BASELINE_PATH.write_text(output)
+        print(f"Baseline saved to {BASELINE_PATH}", file=sys.stderr)
+    elif args.compare:
+        failures = compare(report, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+        print("No regressions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,13 +11,82 @@ BASE_DIR = Path(os.path.dirname(os.path.abspath(__file__)))
 DB_NAME = "fitness_tracker.db"
 DB_PATH = os.path.join(BASE_DIR, DB_NAME)
 
+# Connection pool settings
+DB_POOL_SIZE = 8  # Maximum number of open connections
+DB_POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+DB_JOURNAL_MODE = "WAL"  # Readers don't block the writer
+DB_BUSY_TIMEOUT_MS = 5000  # How long SQLite waits on a locked database
+DB_WRITE_RETRIES = 3  # Retries for writes that still hit a busy database
+DB_RETRY_BACKOFF = 0.05  # Initial retry delay in seconds (doubles each retry)
+AUTO_CREATE_INDEXES = True  # Let the startup index check create missing indexes
+DB_SYNCHRONOUS = "NORMAL"  # Safe with WAL; fsyncs at checkpoints rather than every commit
+DB_CACHE_SIZE_KB = 64 * 1024  # Page cache per connection
+DB_MMAP_SIZE = 256 * 1024 * 1024  # Bytes of the database file read through mmap
+DB_STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection
+
+# Startup settings (run once per process, see database/startup.py)
+STARTUP_WARM_CACHE_MB = 256  # Read up to this much of the database file into the OS cache
+
+# Query instrumentation (see database/query_stats.py)
+QUERY_STATS_ENABLED = True  # Record per-statement timings in DatabaseManager
+QUERY_STATS_SAMPLE_RATE = 0.1  # Fraction of statements counted, at random (slow ones are always logged)
+QUERY_STATS_SAMPLES = 1000  # Recent durations kept per statement shape for percentiles
+QUERY_STATS_CALLER_EVERY = 16  # Record the caller of every Nth call of a statement (a stack walk)
+SLOW_QUERY_MS = 100  # Statements at least this slow go to the slow-query log
+SLOW_QUERY_LOG_SIZE = 200  # Slow statements kept in memory for the admin page
+SLOW_QUERY_LOG_PATH = os.path.join(BASE_DIR, "logs", "slow_queries.jsonl")  # None to keep them in memory only
+
+# Rows per executemany call in bulk writes
+BULK_INSERT_CHUNK_SIZE = 50000
+
+# Bulk writes with at least this many rows in a chunk rebuild the affected
+# rollups and points once instead of maintaining them row by row
+ROLLUP_DEFER_MIN_ROWS = 5000
+
+# Rows per fetchmany call when streaming query results
+FETCH_CHUNK_SIZE = 10000
+
+# Bulk import (see services/import_service.py)
+IMPORT_CHUNK_SIZE = 100000  # Records parsed and validated at a time
+IMPORT_MAX_ERRORS = 1000  # Rejected rows reported in detail (all are counted)
+IMPORT_WORKERS = min(8, os.cpu_count() or 1)  # Parsing processes for large CSV/JSON Lines files
+IMPORT_BLOCK_BYTES = 4 * 1024 * 1024  # Bytes of a file handed to a worker at a time
+IMPORT_QUEUE_DEPTH = 2  # Blocks queued or in flight per worker
+IMPORT_PARALLEL_MIN_BYTES = 32 * 1024 * 1024  # Smaller files are parsed in-process (workers take ~1s to start)
+
+# Intraday samples (see database/models/intraday.py)
+INTRADAY_COMPRESSION_LEVEL = 6  # zlib level for the per-day sample blobs
+
+# Data export (see services/export_service.py)
+EXPORT_CHUNK_SIZE = 50000  # Rows fetched at a time, and rows per Parquet row group
+EXPORT_DOWNLOAD_MAX_ROWS = 1000000  # Larger exports are built in memory, so the page sends them to manage.py export
+
+# Migration settings
+MIGRATION_BATCH_SIZE = 10000  # Rows per backfill chunk (one transaction each)
+MIGRATION_BATCH_PAUSE = 0.01  # Seconds between chunks so app writes can get in
+
+# Analytics cache settings
+ANALYTICS_CACHE_MAX_ENTRIES = 512  # Cached metric/trend results across all students
+ANALYTICS_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Approximate memory cap for cached results
+
+# Achievement settings
+ACHIEVEMENT_BACKFILL_BATCH = 5000  # Students per vectorized pass when re-evaluating
+DEFAULT_GOALS = {"steps": 7500, "active_minutes": 30}  # Daily goals until a student sets their own
+WEEKLY_GOAL_DAYS = 5  # Days a week a daily goal must be met to count as hitting it
+
 # App settings
 APP_TITLE = "Fitness Tracker App"
 APP_LAYOUT = "wide"
 
+# Page render profiling (see utils/profiler.py; enabled by FEATURES["page_profiling"])
+PROFILE_LOG_PATH = os.path.join(BASE_DIR, "logs", "page_profile.jsonl")  # None to only show it in the sidebar
+PROFILE_STACKS_DIR = os.path.join(BASE_DIR, "logs", "stacks")  # Folded stacks from sampled reruns
+PROFILE_SAMPLE_INTERVAL_MS = 5  # Stack sampling interval
+
 # Feature flags for enabling/disabling features
 FEATURES = {
     "advanced_metrics": True,
     "allow_data_export": True,
     "enable_gamification": False,
+    "page_profiling": False,  # Time each page render by section (sidebar breakdown and log)
 }
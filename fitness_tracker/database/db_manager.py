@@ -5,68 +5,427 @@ Handles connection pooling and database operations.
 import sqlite3
 import os
 import sys
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
+from .query_stats import QueryStats
+
 # Add the parent directory to path to import config
 sys.path.append(str(Path(__file__).parent.parent))
 import config
 
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of SQLite connections.
+
+    A thread checks a connection out on its first query and returns it once
+    the result has been fetched or its transaction committed; connections
+    held by threads that exit are reclaimed. Every connection is opened in
+    WAL mode with a busy timeout so readers never block the single writer,
+    with the synchronous, cache_size and mmap_size PRAGMAs from config, and
+    with the warm-up statements already compiled.
+    """
+
+    def __init__(self, db_path, size=None, timeout=None, busy_timeout_ms=None):
+        self.db_path = db_path
+        self.size = size or config.DB_POOL_SIZE
+        self.timeout = timeout if timeout is not None else config.DB_POOL_TIMEOUT
+        self.busy_timeout_ms = (busy_timeout_ms if busy_timeout_ms is not None
+                                else config.DB_BUSY_TIMEOUT_MS)
+        self.warm_statements = []  # (query, params) run on each new connection
+        self._idle = []
+        self._leases = {}  # thread ident -> (thread, connection)
+        self._opened = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "reclaimed": 0,
+            "connections_opened": 0,
+        }
+
+    def _open(self):
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=config.DB_STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA journal_mode={config.DB_JOURNAL_MODE}")
+        conn.execute(f"PRAGMA synchronous={config.DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size={-int(config.DB_CACHE_SIZE_KB)}")
+        conn.execute(f"PRAGMA mmap_size={int(config.DB_MMAP_SIZE)}")
+        self._prepare(conn)
+        self._stats["connections_opened"] += 1
+        return conn
+
+    def _prepare(self, conn):
+        """Compile the warm-up statements into a connection's statement cache."""
+        for query, params in self.warm_statements:
+            try:
+                conn.execute(query, params).close()
+            except sqlite3.Error:
+                # A statement for a table not created yet; it is compiled on first use instead
+                pass
+
+    def prepare(self, statements):
+        """
+        Set the (query, params) statements every connection compiles when it
+        is opened, and compile them on the idle connections and the calling
+        thread's own (connections leased to other threads are left alone).
+        """
+        with self._cond:
+            self.warm_statements = list(statements)
+            own = self.current()
+            for conn in self._idle + ([own] if own is not None else []):
+                self._prepare(conn)
+
+    def _reclaim_dead_leases(self):
+        """Return connections held by threads that have exited. Caller holds the lock."""
+        reclaimed = 0
+        for ident, (thread, conn) in list(self._leases.items()):
+            if not thread.is_alive():
+                del self._leases[ident]
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.append(conn)
+                reclaimed += 1
+        self._stats["reclaimed"] += reclaimed
+        return reclaimed
+
+    def current(self):
+        """Return the connection leased by the calling thread, or None."""
+        lease = self._leases.get(threading.get_ident())
+        return lease[1] if lease else None
+
+    def acquire(self):
+        """Get the calling thread's connection, checking one out if needed."""
+        ident = threading.get_ident()
+        lease = self._leases.get(ident)
+        if lease:
+            return lease[1]
+
+        start = time.perf_counter()
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._opened < self.size:
+                    conn = self._open()
+                    self._opened += 1
+                    break
+                if self._reclaim_dead_leases():
+                    continue
+
+                # Pool is saturated: wait for a release
+                waited = True
+                remaining = self.timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.size})"
+                    )
+                self._cond.wait(min(remaining, 0.5))
+
+            self._leases[ident] = (threading.current_thread(), conn)
+            waited_for = time.perf_counter() - start
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_time_total"] += waited_for
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited_for)
+        return conn
+
+    def release(self):
+        """Return the calling thread's connection to the pool."""
+        with self._cond:
+            lease = self._leases.pop(threading.get_ident(), None)
+            if lease is None:
+                return
+            conn = lease[1]
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def close_all(self):
+        """Close every connection, leased or idle."""
+        with self._cond:
+            for _, conn in self._leases.values():
+                conn.close()
+            for conn in self._idle:
+                conn.close()
+            self._leases.clear()
+            self._idle.clear()
+            self._opened = 0
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return a snapshot of pool metrics."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["open"] = self._opened
+            stats["in_use"] = len(self._leases)
+            stats["idle"] = len(self._idle)
+            stats["saturation"] = len(self._leases) / self.size if self.size else 0.0
+            stats["wait_time_avg"] = (stats["wait_time_total"] / stats["checkouts"]
+                                      if stats["checkouts"] else 0.0)
+        return stats
+
+
+def _is_busy_error(error):
+    """Check whether an OperationalError is a transient lock/busy error."""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def _is_write_query(query):
+    """Check whether a statement modifies the database."""
+    head = query.lstrip().split(None, 1)
+    return bool(head) and head[0].upper() not in ("SELECT", "PRAGMA", "EXPLAIN", "WITH")
+
+
 class DatabaseManager:
     _instance = None
-    
+
     def __new__(cls):
-        """Singleton pattern to ensure only one database connection is created."""
+        """Singleton pattern to ensure only one connection pool is created."""
         if cls._instance is None:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
-            cls._instance.conn = None
+            cls._instance.pool = None
+            cls._instance._pool_lock = threading.Lock()
+            cls._instance._local = threading.local()
+            cls._instance.query_stats = QueryStats(explain=cls._instance.explain)
         return cls._instance
-    
+
+    def _get_pool(self):
+        """Create the connection pool on first use."""
+        if self.pool is None:
+            with self._pool_lock:
+                if self.pool is None:
+                    self.pool = ConnectionPool(config.DB_PATH)
+        return self.pool
+
+    @property
+    def conn(self):
+        """The connection leased by the calling thread, if any."""
+        if self.pool is None:
+            return None
+        return self.pool.current()
+
     def connect(self):
-        """Create or get the existing database connection."""
-        if self.conn is None:
-            self.conn = sqlite3.connect(config.DB_PATH, check_same_thread=False)
-            self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
-        return self.conn
-    
+        """Get the calling thread's pooled connection."""
+        return self._get_pool().acquire()
+
+    def release(self):
+        """Return the calling thread's connection to the pool."""
+        if self.pool is not None:
+            self.pool.release()
+
+    def _release_if_idle(self):
+        """
+        Return the connection to the pool once the thread has no open
+        transaction and isn't inside a connection() block.
+        """
+        conn = self.conn
+        if conn is not None and not conn.in_transaction and not getattr(self._local, "pins", 0):
+            self.pool.release()
+
+    @contextmanager
+    def connection(self):
+        """Keep the calling thread's connection checked out for a block."""
+        self._local.pins = getattr(self._local, "pins", 0) + 1
+        try:
+            yield self.connect()
+        finally:
+            self._local.pins -= 1
+            self._release_if_idle()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block inside one write transaction, committing on success and
+        rolling back on error. Nested blocks become savepoints, and commit()
+        calls made inside the block are deferred to its end.
+        """
+        with self.connection() as conn:
+            depth = getattr(self._local, "tx_depth", 0)
+            savepoint = f"sp_{depth}"
+            if depth:
+                conn.execute(f"SAVEPOINT {savepoint}")
+            else:
+                self._with_retry("BEGIN", lambda: conn.execute("BEGIN IMMEDIATE"))
+                self._local.pending_callbacks = []
+            self._local.tx_depth = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                self._local.tx_depth = depth
+                if depth:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                else:
+                    conn.rollback()
+                    self._local.pending_callbacks = []
+                raise
+            self._local.tx_depth = depth
+            if depth:
+                conn.execute(f"RELEASE {savepoint}")
+            else:
+                self._with_retry("COMMIT", conn.commit)
+                callbacks, self._local.pending_callbacks = self._local.pending_callbacks, []
+                for callback in callbacks:
+                    callback()
+
+    def on_commit(self, callback):
+        """
+        Run callback once the current write is durable: at the end of the
+        enclosing transaction() block, or right away outside of one.
+        """
+        if getattr(self._local, "tx_depth", 0):
+            self._local.pending_callbacks.append(callback)
+        else:
+            callback()
+
     def get_cursor(self):
         """Get a cursor from the connection."""
         return self.connect().cursor()
-    
-    def execute(self, query, params=None):
-        """Execute a query with optional parameters."""
+
+    def _with_retry(self, query, operation):
+        """Run a write operation, retrying on transient busy/locked errors."""
+        if not _is_write_query(query):
+            return operation()
+
+        delay = config.DB_RETRY_BACKOFF
+        for attempt in range(config.DB_WRITE_RETRIES + 1):
+            try:
+                return operation()
+            except sqlite3.OperationalError as e:
+                if not _is_busy_error(e) or attempt == config.DB_WRITE_RETRIES:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def _execute(self, query, params=None):
         cursor = self.get_cursor()
         if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+            return self._with_retry(query, lambda: cursor.execute(query, params))
+        return self._with_retry(query, lambda: cursor.execute(query))
+
+    def execute(self, query, params=None):
+        """Execute a query with optional parameters."""
+        start = time.perf_counter()
+        cursor = self._execute(query, params)
+        if self.query_stats.enabled:
+            # Rows changed for writes; a SELECT's rows are fetched by the caller
+            rows = cursor.rowcount if cursor.rowcount >= 0 else None
+            self.query_stats.record(query, params or (), time.perf_counter() - start, rows)
         return cursor
-    
+
     def executemany(self, query, params_list):
         """Execute a query with multiple sets of parameters."""
+        start = time.perf_counter()
         cursor = self.get_cursor()
-        cursor.executemany(query, params_list)
+        cursor = self._with_retry(query, lambda: cursor.executemany(query, params_list))
+        if self.query_stats.enabled:
+            self.query_stats.record(query, None, time.perf_counter() - start, cursor.rowcount)
         return cursor
-    
-    def fetchone(self, query, params=None):
-        """Execute a query and fetch one result."""
-        cursor = self.execute(query, params)
-        return cursor.fetchone()
-    
-    def fetchall(self, query, params=None):
-        """Execute a query and fetch all results."""
-        cursor = self.execute(query, params)
-        return cursor.fetchall()
-    
+
+    def fetchone(self, query, params=None, row_factory=None):
+        """Execute a query and fetch one result, optionally built by row_factory(cursor, row)."""
+        start = time.perf_counter()
+        cursor = self._execute(query, params)
+        if row_factory:
+            cursor.row_factory = row_factory
+        row = cursor.fetchone()
+        cursor.close()
+        self._release_if_idle()
+        if self.query_stats.enabled:
+            self.query_stats.record(query, params or (), time.perf_counter() - start, int(row is not None))
+        return row
+
+    def fetchall(self, query, params=None, row_factory=None):
+        """Execute a query and fetch all results, optionally built by row_factory(cursor, row)."""
+        start = time.perf_counter()
+        cursor = self._execute(query, params)
+        if row_factory:
+            cursor.row_factory = row_factory
+        rows = cursor.fetchall()
+        self._release_if_idle()
+        if self.query_stats.enabled:
+            self.query_stats.record(query, params or (), time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetch_chunks(self, query, params=None, size=None):
+        """
+        Execute a query and yield its rows as plain tuples, size rows at a
+        time, keeping the connection checked out until the rows run out.
+        """
+        size = size or config.FETCH_CHUNK_SIZE
+        elapsed = 0.0  # time spent in SQLite, not in the consumer between chunks
+        total_rows = 0
+        with self.connection():
+            cursor = self.get_cursor()
+            cursor.row_factory = None
+            try:
+                start = time.perf_counter()
+                cursor.execute(query, params or ())
+                while True:
+                    rows = cursor.fetchmany(size)
+                    elapsed += time.perf_counter() - start
+                    if not rows:
+                        break
+                    total_rows += len(rows)
+                    yield rows
+                    start = time.perf_counter()
+            finally:
+                cursor.close()
+                if self.query_stats.enabled:
+                    self.query_stats.record(query, params or (), elapsed, total_rows)
+
     def commit(self):
-        """Commit changes to the database."""
-        if self.conn:
-            self.conn.commit()
-    
+        """Commit changes to the database (deferred inside a transaction() block)."""
+        conn = self.conn
+        if conn and not getattr(self._local, "tx_depth", 0):
+            self._with_retry("COMMIT", conn.commit)
+            self._release_if_idle()
+
+    def prepare(self, statements):
+        """Compile (query, params) statements on every pooled connection, now and when opened."""
+        self._get_pool().prepare(statements)
+
+    def explain(self, query, params=None):
+        """EXPLAIN QUERY PLAN detail lines for a statement (not itself recorded)."""
+        rows = self._execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        self._release_if_idle()
+        return [row["detail"] for row in rows]
+
+    def pool_stats(self):
+        """Return connection pool metrics (wait time, checkouts, saturation)."""
+        return self._get_pool().stats()
+
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Close all pooled database connections."""
+        if self.pool is not None:
+            self.pool.close_all()
+            self.pool = None
 
 # Singleton instance to be imported elsewhere
 db_manager = DatabaseManager()
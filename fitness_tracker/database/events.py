@@ -0,0 +1,40 @@
+"""
+Change notifications for the Fitness Tracker data layer.
+Models announce which students' data changed once the write is committed,
+so caches built on top of them can drop exactly the affected entries.
+"""
+import threading
+
+from .db_manager import db_manager
+
+_listeners = []
+_lock = threading.Lock()
+
+
+def subscribe(callback):
+    """Register callback(student_ids) to be called after student data changes."""
+    with _lock:
+        if callback not in _listeners:
+            _listeners.append(callback)
+
+
+def unsubscribe(callback):
+    """Remove a previously registered callback."""
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+def student_data_changed(student_ids):
+    """Notify listeners, after commit, that these students' data changed."""
+    student_ids = {int(student_id) for student_id in student_ids if student_id is not None}
+    if not student_ids:
+        return
+
+    def notify():
+        with _lock:
+            listeners = list(_listeners)
+        for callback in listeners:
+            callback(student_ids)
+
+    db_manager.on_commit(notify)
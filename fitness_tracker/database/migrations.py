@@ -0,0 +1,227 @@
+"""
+Versioned schema migrations for the Fitness Tracker application.
+Migrations are applied in order at startup and the current version is
+recorded in the metadata table. Heavy data changes run as resumable,
+chunked backfills so large tables are never locked for long.
+"""
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from .db_manager import db_manager
+from .models.intraday import IntradaySeries
+from .models.points import StudentPoints
+from .models.rollup import ActivityRollup
+from .schema import Schema
+
+# Add the parent directory to path to import config
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_KEY = "schema_version"
+
+
+class Backfill:
+    """
+    A data change applied to a table in rowid-range chunks.
+    
+    Each chunk runs in its own short transaction and records a checkpoint in
+    the metadata table, so an interrupted backfill resumes where it stopped.
+    """
+    
+    def __init__(self, name, table, apply_chunk, batch_size=None):
+        # apply_chunk(first_rowid, last_rowid) issues the statements for one chunk
+        self.name = name
+        self.table = table
+        self.apply_chunk = apply_chunk
+        self.batch_size = batch_size or config.MIGRATION_BATCH_SIZE
+    
+    @property
+    def checkpoint_key(self):
+        return f"backfill:{self.name}"
+    
+    def run(self):
+        """Apply all remaining chunks and return the number processed."""
+        row = db_manager.fetchone(f"SELECT MAX(rowid) AS max_rowid FROM {self.table}")
+        max_rowid = row["max_rowid"] or 0
+        last_done = int(Schema.get_metadata(self.checkpoint_key, 0))
+        chunks = 0
+        
+        while last_done < max_rowid:
+            first = last_done + 1
+            last = min(last_done + self.batch_size, max_rowid)
+            with db_manager.transaction():
+                self.apply_chunk(first, last)
+                Schema.set_metadata(self.checkpoint_key, last)
+            last_done = last
+            chunks += 1
+            
+            # Yield the write lock between chunks
+            if config.MIGRATION_BATCH_PAUSE:
+                time.sleep(config.MIGRATION_BATCH_PAUSE)
+        
+        return chunks
+
+
+class Migration:
+    """
+    A single schema version step.
+    
+    Statements and the optional apply function run in one transaction and
+    must be idempotent; backfills run afterwards in their own chunks. The
+    version is recorded only once every backfill has completed.
+    """
+    
+    def __init__(self, version, description, statements=(), apply=None, backfills=()):
+        self.version = version
+        self.description = description
+        self.statements = list(statements)
+        self.apply = apply
+        self.backfills = list(backfills)
+    
+    def run(self):
+        with db_manager.transaction():
+            for statement in self.statements:
+                db_manager.execute(statement)
+            if self.apply:
+                self.apply()
+        
+        for backfill in self.backfills:
+            chunks = backfill.run()
+            logger.info("Backfill %s finished (%d chunks)", backfill.name, chunks)
+
+
+# Ordered list of all migrations. Append new ones with the next version number.
+MIGRATIONS = [
+    Migration(
+        1,
+        "Create managed indexes",
+        statements=[
+            "CREATE INDEX IF NOT EXISTS idx_activity_student_date ON activity (student_id, date)",
+            "CREATE INDEX IF NOT EXISTS idx_students_name ON students (name)",
+        ],
+    ),
+    Migration(
+        2,
+        "Remove duplicate daily activity rows, keeping the latest logged",
+        backfills=[
+            Backfill(
+                "dedupe_activity_student_date",
+                "activity",
+                lambda first, last: db_manager.execute(
+                    """DELETE FROM activity WHERE rowid BETWEEN ? AND ? AND EXISTS (
+                        SELECT 1 FROM activity AS newer
+                        WHERE newer.student_id = activity.student_id
+                        AND newer.date = activity.date AND newer.id > activity.id)""",
+                    (first, last)
+                ),
+            ),
+        ],
+    ),
+    Migration(
+        3,
+        "Enforce one activity row per student per day",
+        statements=[
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_activity_student_date ON activity (student_id, date)",
+            "DROP INDEX IF EXISTS idx_activity_student_date",
+        ],
+    ),
+    Migration(
+        4,
+        "Add day/week/month activity rollups maintained by triggers",
+        statements=([ActivityRollup.create_table_sql(), ActivityRollup.create_view_sql()]
+                    + ActivityRollup.create_triggers_sql()),
+        backfills=[
+            # Chunked by student so each chunk rebuilds whole students
+            Backfill(
+                "rebuild_activity_rollup",
+                "students",
+                lambda first, last: ActivityRollup.rebuild(range(first, last + 1)),
+            ),
+        ],
+    ),
+    Migration(
+        5,
+        "Persist leaderboard points and unlocked achievements",
+        statements=StudentPoints.create_tables_sql() + StudentPoints.create_triggers_sql(),
+        backfills=[
+            Backfill(
+                "rebuild_student_points",
+                "students",
+                lambda first, last: StudentPoints.rebuild(range(first, last + 1)),
+            ),
+        ],
+    ),
+    Migration(
+        6,
+        "Add minute-level intraday samples stored as compressed daily blobs",
+        statements=[IntradaySeries.create_table_sql()],
+    ),
+    Migration(
+        7,
+        "Stop activity updates to a NULL student from creating points rows",
+        statements=[
+            f"DROP TRIGGER IF EXISTS {StudentPoints.TRIGGERS[1]}",
+            StudentPoints.create_triggers_sql()[1],
+            # Rows created that way have no activity or achievements behind them
+            "DELETE FROM student_points WHERE student_id NOT IN ("
+            "SELECT student_id FROM activity WHERE student_id IS NOT NULL "
+            "UNION SELECT student_id FROM student_achievements)",
+        ],
+    ),
+    Migration(
+        8,
+        "Take deleted students off the leaderboard",
+        statements=[
+            "DELETE FROM student_achievements WHERE student_id NOT IN (SELECT id FROM students)",
+            "DELETE FROM student_points WHERE student_id NOT IN (SELECT id FROM students)",
+        ],
+    ),
+]
+
+
+def get_schema_version():
+    """Return the schema version recorded in the metadata table."""
+    return int(Schema.get_metadata(SCHEMA_VERSION_KEY, 0))
+
+
+def get_migration_history():
+    """Return the recorded timing of each applied migration."""
+    rows = db_manager.fetchall(
+        "SELECT key, value FROM metadata WHERE key LIKE 'migration:%' ORDER BY key"
+    )
+    return [json.loads(row["value"]) for row in rows]
+
+
+def run_migrations(migrations=None):
+    """Apply every migration newer than the recorded schema version."""
+    migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+    current = get_schema_version()
+    applied = []
+    
+    for migration in migrations:
+        if migration.version <= current:
+            continue
+        
+        start = time.perf_counter()
+        migration.run()
+        duration_ms = (time.perf_counter() - start) * 1000
+        
+        with db_manager.transaction():
+            Schema.set_metadata(SCHEMA_VERSION_KEY, migration.version)
+            Schema.set_metadata(f"migration:{migration.version:04d}", json.dumps({
+                "version": migration.version,
+                "description": migration.description,
+                "duration_ms": round(duration_ms, 1),
+                "applied_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }))
+        
+        logger.info("Applied migration %d (%s) in %.1f ms",
+                    migration.version, migration.description, duration_ms)
+        applied.append(migration.version)
+    
+    return applied
@@ -1,8 +1,30 @@
 """
 Activity model for representing fitness activity data in the application.
 """
+import json
+import logging
+import math
+import sqlite3
+import sys
+from array import array
 from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from .. import events
 from ..db_manager import db_manager
+from .points import StudentPoints
+from .rollup import ActivityRollup
+
+# Add the parent directory to path to import config
+sys.path.append(str(Path(__file__).parent.parent.parent))
+import config
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
 
 class Activity:
     """
@@ -10,6 +32,21 @@ class Activity:
     Provides methods for CRUD operations on activity data.
     """
     
+    # Writable columns, in the order used for positional rows
+    FIELDS = ("student_id", "date", "steps", "active_minutes", "distance",
+              "calories", "heart_rate", "weight_kg")
+    NUMERIC_FIELDS = ("steps", "active_minutes", "distance", "calories",
+                      "heart_rate", "weight_kg")
+    # Readable columns, and which of them hold real numbers
+    COLUMNS = ("id",) + FIELDS
+    FLOAT_COLUMNS = ("distance", "calories", "weight_kg")
+    
+    # No per-instance __dict__; rows are built positionally in COLUMNS order
+    __slots__ = COLUMNS
+    SELECT = f"SELECT {', '.join(COLUMNS)} FROM activity"
+    # Tables kept in step with activity by triggers; see _bulk_write
+    DERIVED = (ActivityRollup, StudentPoints)
+    
     def __init__(self, id=None, student_id=None, date=None, steps=None,
                  active_minutes=None, distance=None, calories=None, 
                  heart_rate=None, weight_kg=None):
@@ -26,7 +63,22 @@ class Activity:
     @staticmethod
     def get_by_student(student_id, limit=None, date_from=None, date_to=None):
         """Get activities for a specific student with optional filtering."""
-        query = "SELECT * FROM activity WHERE student_id=?"
+        query, params = Activity._student_query(student_id, limit, date_from, date_to)
+        return db_manager.fetchall(query, params, row_factory=Activity._from_cursor)
+    
+    @staticmethod
+    def get_batch_by_student(student_id, limit=None, date_from=None, date_to=None):
+        """Like get_by_student, but returns a compact ActivityBatch."""
+        query, params = Activity._student_query(student_id, limit, date_from, date_to)
+        batch = ActivityBatch()
+        for rows in db_manager.fetch_chunks(query, params):
+            batch.extend(rows)
+        return batch
+    
+    @staticmethod
+    def _student_query(student_id, limit=None, date_from=None, date_to=None):
+        """Build the query and parameters for one student's activities."""
+        query = Activity.SELECT + " WHERE student_id=?"
         params = [student_id]
         
         if date_from:
@@ -42,21 +94,157 @@ class Activity:
         if limit:
             query += f" LIMIT {int(limit)}"
         
-        rows = db_manager.fetchall(query, tuple(params))
-        return [Activity._row_to_activity(row) for row in rows]
+        return query, tuple(params)
+    
+    @staticmethod
+    def fetch_frame(student_ids=None, date_from=None, date_to=None, columns=None,
+                    descending=False, ordered=True, as_frame=True):
+        """
+        Load activity straight into typed column arrays.
+        
+        Only the requested columns are selected and cursor rows are streamed
+        chunk by chunk into NumPy arrays, with no Activity objects or dicts in
+        between. student_ids may be a single id, an iterable of ids or None
+        for every student. Rows are ordered by student and date (newest
+        first when descending) unless ordered is False, which avoids an
+        index-order walk on large unfiltered loads. Integer columns are int64
+        unless they contain NULLs (then float64 with NaN), and dates are
+        datetime64. Legacy rows are loaded leniently: text that isn't a number
+        becomes NaN, and rows whose date is missing or malformed are skipped
+        (and logged). Returns a DataFrame, or a dict of arrays when as_frame
+        is False.
+        """
+        columns = list(columns or Activity.COLUMNS)
+        unknown = set(columns) - set(Activity.COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown activity columns: {', '.join(sorted(unknown))}")
+        
+        query = f"SELECT {', '.join(columns)} FROM activity WHERE 1=1"
+        params = []
+        
+        if isinstance(student_ids, (int, np.integer)):
+            query += " AND student_id=?"
+            params.append(int(student_ids))
+        elif student_ids is not None:
+            query += " AND student_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(i) for i in student_ids]))
+        
+        if date_from:
+            query += " AND date >= ?"
+            params.append(date_from)
+        
+        if date_to:
+            query += " AND date <= ?"
+            params.append(date_to)
+        
+        if ordered:
+            query += " ORDER BY student_id, date" + (" DESC" if descending else "")
+        
+        chunks = {column: [] for column in columns}
+        for rows in db_manager.fetch_chunks(query, tuple(params)):
+            block = np.array(rows, dtype=object).reshape(len(rows), len(columns))
+            for position, column in enumerate(columns):
+                values = block[:, position]
+                chunks[column].append(Activity._as_dates(values) if column == "date"
+                                      else Activity._as_numbers(values))
+        
+        arrays = {}
+        for column in columns:
+            empty = np.array([], dtype="datetime64[D]" if column == "date" else np.float64)
+            arrays[column] = np.concatenate(chunks[column]) if chunks[column] else empty
+        
+        # Rows without a usable date can't be placed on a timeline
+        if "date" in arrays:
+            undated = np.isnat(arrays["date"])
+            if undated.any():
+                logger.warning("Skipped %d activity rows with a missing or malformed date", undated.sum())
+                arrays = {column: values[~undated] for column, values in arrays.items()}
+        
+        for column in columns:
+            values = arrays[column]
+            if column != "date" and column not in Activity.FLOAT_COLUMNS and not np.isnan(values).any():
+                arrays[column] = values.astype(np.int64)
+        
+        if not as_frame:
+            return arrays
+        return pd.DataFrame(arrays, columns=columns)
+    
+    @staticmethod
+    def _as_dates(values):
+        """Object array of date strings to datetime64[D]; malformed dates (legacy rows) become NaT."""
+        try:
+            return values.astype("datetime64[D]")
+        except ValueError:
+            parsed = pd.to_datetime(pd.Series(values, dtype=object), format="mixed", errors="coerce")
+            return parsed.to_numpy().astype("datetime64[D]")
+    
+    @staticmethod
+    def _as_numbers(values):
+        """Object array to float64; NULLs and text that isn't a number (legacy rows) become NaN."""
+        try:
+            return values.astype(np.float64)
+        except (TypeError, ValueError):
+            return pd.to_numeric(values, errors="coerce").astype(np.float64)
+    
+    @staticmethod
+    def _streak_runs_sql(where):
+        """
+        Gaps-and-islands query: consecutive logged days share the same
+        julianday(date) - row number, so grouping on it yields each run.
+        """
+        return (
+            "WITH days AS (SELECT student_id, date, julianday(date) - ROW_NUMBER() "
+            "OVER (PARTITION BY student_id ORDER BY date) AS island "
+            f"FROM activity WHERE {where} AND julianday(date) IS NOT NULL) "
+            "SELECT student_id, MIN(date) AS start_date, MAX(date) AS end_date, "
+            "COUNT(*) AS length FROM days GROUP BY student_id, island"
+        )
+    
+    @staticmethod
+    def get_streak_runs(student_id):
+        """A student's runs of consecutive logged days as (start_date, end_date, length) rows, oldest first."""
+        return db_manager.fetchall(
+            "SELECT start_date, end_date, length FROM ("
+            + Activity._streak_runs_sql("student_id = ?") + ") ORDER BY start_date",
+            (student_id,)
+        )
+    
+    @staticmethod
+    def get_streak_summary(student_ids=None, as_of=None):
+        """
+        Current and longest streak per student in one grouped query, as
+        (student_id, current_streak, longest_streak, current_start) rows.
+        The current streak is the run ending on as_of or the day before,
+        so a day not logged yet doesn't break it.
+        """
+        where = "student_id IS NOT NULL"
+        params = {"as_of": str(as_of or datetime.now().date())}
+        if student_ids is not None:
+            where = "student_id IN (SELECT value FROM json_each(:student_ids))"
+            params["student_ids"] = json.dumps([int(i) for i in student_ids])
+        return db_manager.fetchall(
+            "SELECT student_id, "
+            "MAX(CASE WHEN end_date >= date(:as_of, '-1 day') THEN length ELSE 0 END) AS current_streak, "
+            "MAX(length) AS longest_streak, "
+            "MAX(CASE WHEN end_date >= date(:as_of, '-1 day') THEN start_date END) AS current_start "
+            f"FROM ({Activity._streak_runs_sql(where)}) GROUP BY student_id ORDER BY student_id",
+            params
+        )
     
     @staticmethod
     def get_by_id(activity_id):
         """Get an activity by ID."""
-        row = db_manager.fetchone("SELECT * FROM activity WHERE id=?", (activity_id,))
-        if row:
-            return Activity._row_to_activity(row)
-        return None
+        return db_manager.fetchone(Activity.SELECT + " WHERE id=?", (activity_id,),
+                                   row_factory=Activity._from_cursor)
     
     def save(self):
         """Save or update an activity in the database."""
+        changed_students = {self.student_id}
         if self.id:
-            # Update existing activity
+            # Update existing activity, which may move it to another student
+            previous = db_manager.fetchone("SELECT student_id FROM activity WHERE id=?", (self.id,))
+            if previous:
+                changed_students.add(previous["student_id"])
             db_manager.execute(
                 """UPDATE activity SET student_id=?, date=?, steps=?, 
                 active_minutes=?, distance=?, calories=?, heart_rate=?, weight_kg=? 
@@ -65,39 +253,236 @@ class Activity:
                  self.distance, self.calories, self.heart_rate, self.weight_kg, self.id)
             )
         else:
-            # Insert new activity
-            cursor = db_manager.execute(
-                """INSERT INTO activity 
-                (student_id, date, steps, active_minutes, distance, calories, heart_rate, weight_kg) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            # Insert new activity, replacing the values already logged for that day
+            db_manager.execute(
+                Activity._upsert_query(),
                 (self.student_id, self.date, self.steps, self.active_minutes,
                  self.distance, self.calories, self.heart_rate, self.weight_kg)
             )
-            self.id = cursor.lastrowid
+            row = db_manager.execute(
+                "SELECT id FROM activity WHERE student_id=? AND date=?",
+                (self.student_id, self.date)
+            ).fetchone()
+            self.id = row["id"]
         
         db_manager.commit()
+        events.student_data_changed(changed_students)
         return self
     
+    @staticmethod
+    def validate_rows(rows):
+        """
+        Validate a chunk of rows column-by-column.
+        
+        Rows may be dicts, Activity objects or tuples in FIELDS order. Returns
+        the valid rows as tuples with dates normalized to YYYY-MM-DD strings,
+        and a list of {"row": index, "error": message} for the rejected ones.
+        """
+        records = [row if type(row) is tuple else Activity._as_tuple(row) for row in rows]
+        if not records:
+            return [], []
+
+        # A row of the wrong length can't go in the table below; check the
+        # rest and report it on its own
+        width = len(Activity.FIELDS)
+        if any(len(record) != width for record in records):
+            kept = [index for index, record in enumerate(records) if len(record) == width]
+            valid, errors = Activity.validate_rows([records[index] for index in kept])
+            errors = [{"row": kept[error["row"]], "error": error["error"]} for error in errors]
+            errors += [
+                {"row": index, "error": f"expected {width} fields, got {len(record)}"}
+                for index, record in enumerate(records) if len(record) != width
+            ]
+            return valid, sorted(errors, key=lambda error: error["row"])
+
+        if not all(type(record[1]) is str for record in records):
+            records = [(r[0], str(r[1])) + tuple(r[2:]) for r in records]
+        
+        # Validate on a 2-D object array, but bind the original tuples: SQLite's
+        # column affinity stores numeric strings as numbers
+        table = np.empty((len(records), len(Activity.FIELDS)), dtype=object)
+        table[:] = records
+        checks = []
+        
+        with np.errstate(invalid="ignore"):
+            student_ids = pd.to_numeric(table[:, 0], errors="coerce")
+            checks.append((np.isnan(student_ids) | (student_ids <= 0) | (student_ids % 1 != 0),
+                           "invalid student_id"))
+            
+            parsed = pd.to_datetime(table[:, 1], format="%Y-%m-%d", errors="coerce")
+            checks.append((np.asarray(parsed.isna()), "invalid date"))
+            
+            for position, field in enumerate(Activity.FIELDS[2:], start=2):
+                raw = table[:, position]
+                values = pd.to_numeric(raw, errors="coerce")
+                checks.append((np.isnan(values) & pd.notna(raw), f"{field} is not a number"))
+                checks.append((values < 0, f"{field} is negative"))
+        
+        # The format also accepts unpadded months and days ("2024-1-5"); bind
+        # those zero-padded so date ranges and the (student_id, date) key hold
+        lengths = np.fromiter(map(len, table[:, 1]), dtype=np.int64, count=len(records))
+        for index in np.flatnonzero((lengths != 10) & ~np.asarray(parsed.isna())):
+            records[index] = (records[index][0], parsed[index].strftime("%Y-%m-%d")) + records[index][2:]
+        
+        invalid = np.logical_or.reduce([mask for mask, _ in checks])
+        if not invalid.any():
+            return records, []
+        
+        errors = [
+            {"row": int(index), "error": "; ".join(message for mask, message in checks if mask[index])}
+            for index in np.flatnonzero(invalid)
+        ]
+        return [records[index] for index in np.flatnonzero(~invalid)], errors
+    
+    @staticmethod
+    def bulk_insert(rows, chunk_size=None):
+        """
+        Insert many activities in one transaction.
+        
+        Rows are validated and written in chunks with executemany. Invalid
+        rows, and rows the database rejects (such as a second row for the
+        same student and day), are reported instead of aborting the batch.
+        Returns {"inserted": count, "errors": [...]} where each error
+        carries the row's position in the input.
+        """
+        query = (f"INSERT INTO activity ({', '.join(Activity.FIELDS)}) "
+                 f"VALUES ({', '.join('?' * len(Activity.FIELDS))})")
+        inserted, errors = Activity._bulk_write(query, rows, chunk_size)
+        return {"inserted": inserted, "errors": errors}
+    
+    @staticmethod
+    def upsert_many(rows, chunk_size=None, overwrite=True, keep_missing=False, validated=False):
+        """
+        Insert or update many daily activities keyed on (student_id, date).
+        
+        Existing days are overwritten with the new values, or left untouched
+        when overwrite is False. With keep_missing, values missing (None)
+        from an incoming row keep what is stored, so a source that only
+        has some metrics doesn't erase the others. Re-syncing a device
+        therefore costs one statement per chunk instead of a lookup and a
+        write per row. validated skips validate_rows for tuples the caller
+        has already checked. Returns {"upserted": count, "errors": [...]}
+        like bulk_insert.
+        """
+        query = Activity._upsert_query(overwrite, keep_missing)
+        upserted, errors = Activity._bulk_write(query, rows, chunk_size, validated)
+        return {"upserted": upserted, "errors": errors}
+    
+    @staticmethod
+    def _upsert_query(overwrite=True, keep_missing=False):
+        """INSERT ... ON CONFLICT statement for one row in FIELDS order."""
+        query = (f"INSERT INTO activity ({', '.join(Activity.FIELDS)}) "
+                 f"VALUES ({', '.join('?' * len(Activity.FIELDS))}) "
+                 f"ON CONFLICT(student_id, date) DO ")
+        if not overwrite:
+            return query + "NOTHING"
+        if keep_missing:
+            return query + "UPDATE SET " + ", ".join(
+                f"{field}=COALESCE(excluded.{field}, {field})" for field in Activity.NUMERIC_FIELDS
+            )
+        return query + "UPDATE SET " + ", ".join(
+            f"{field}=excluded.{field}" for field in Activity.NUMERIC_FIELDS
+        )
+    
+    @staticmethod
+    def _bulk_write(query, rows, chunk_size=None, validated=False):
+        """Validate (unless validated) and write rows in chunks inside one transaction."""
+        chunk_size = chunk_size or config.BULK_INSERT_CHUNK_SIZE
+        written = 0
+        errors = []
+        changed_students = set()
+        first_date = last_date = None
+        derived_suspended = False
+        
+        with db_manager.transaction():
+            for offset, chunk in Activity._chunks(rows, chunk_size):
+                valid, chunk_errors = (chunk, []) if validated else Activity.validate_rows(chunk)
+                for error in chunk_errors:
+                    error["row"] += offset
+                errors.extend(chunk_errors)
+                if not valid:
+                    continue
+                
+                # Past this size a ranged rebuild beats per-row triggers
+                if not derived_suspended and len(valid) >= config.ROLLUP_DEFER_MIN_ROWS:
+                    for derived in Activity.DERIVED:
+                        derived.suspend()
+                    derived_suspended = True
+                
+                written += Activity._write_chunk(query, valid, offset, chunk_errors, errors)
+                changed_students.update(row[0] for row in valid)
+                dates = [str(row[1])[:10] for row in valid]
+                first_date = min(dates + ([first_date] if first_date else []))
+                last_date = max(dates + ([last_date] if last_date else []))
+            
+            if derived_suspended:
+                for derived in Activity.DERIVED:
+                    derived.resume(changed_students, first_date, last_date)
+            events.student_data_changed(changed_students)
+        
+        return written, errors
+    
+    @staticmethod
+    def _write_chunk(query, valid, offset, chunk_errors, errors):
+        """Write one validated chunk, falling back to row-by-row on failure."""
+        try:
+            with db_manager.transaction():
+                db_manager.executemany(query, valid)
+            return len(valid)
+        except sqlite3.DatabaseError:
+            pass
+        
+        # Map each valid row back to its position in the input
+        rejected = {error["row"] - offset for error in chunk_errors}
+        positions = [i for i in range(len(valid) + len(rejected)) if i not in rejected]
+        
+        written = 0
+        for position, values in zip(positions, valid):
+            try:
+                with db_manager.transaction():
+                    db_manager.execute(query, values)
+                written += 1
+            except sqlite3.DatabaseError as e:
+                errors.append({"row": offset + position, "error": str(e)})
+        return written
+    
+    @staticmethod
+    def _chunks(rows, chunk_size):
+        """Yield (offset, list of rows) chunks from any iterable."""
+        rows = iter(rows)
+        offset = 0
+        # islice fills each list in C rather than a Python append per row
+        while chunk := list(islice(rows, chunk_size)):
+            yield offset, chunk
+            offset += len(chunk)
+    
+    @staticmethod
+    def _as_tuple(row):
+        """Normalize a dict, Activity or sequence to a tuple in FIELDS order."""
+        if isinstance(row, Activity):
+            return tuple(getattr(row, field) for field in Activity.FIELDS)
+        if isinstance(row, dict):
+            return tuple(row.get(field) for field in Activity.FIELDS)
+        return tuple(row)
+    
     @staticmethod
     def delete(activity_id):
         """Delete an activity by ID."""
+        row = db_manager.fetchone("SELECT student_id FROM activity WHERE id=?", (activity_id,))
         db_manager.execute("DELETE FROM activity WHERE id=?", (activity_id,))
         db_manager.commit()
+        if row:
+            events.student_data_changed({row["student_id"]})
     
     @staticmethod
     def _row_to_activity(row):
-        """Convert a database row to an Activity object."""
-        return Activity(
-            id=row['id'],
-            student_id=row['student_id'],
-            date=row['date'],
-            steps=row['steps'],
-            active_minutes=row['active_minutes'],
-            distance=row['distance'],
-            calories=row['calories'],
-            heart_rate=row['heart_rate'],
-            weight_kg=row['weight_kg']
-        )
+        """Convert a database row in COLUMNS order to an Activity object."""
+        return Activity(*row)
+    
+    @staticmethod
+    def _from_cursor(cursor, row):
+        """sqlite3 row factory that builds Activity objects directly."""
+        return Activity(*row)
     
     def to_dict(self):
         """Convert the activity object to a dictionary."""
@@ -112,3 +497,76 @@ class Activity:
             'heart_rate': self.heart_rate,
             'weight_kg': self.weight_kg
         }
+
+
+class ActivityBatch:
+    """
+    A page of activities stored as parallel column arrays.
+    
+    Ids are kept in int64 arrays (NULL_ID for NULL, as on legacy rows
+    without a student) and measurements in float64 arrays (NaN for NULL),
+    which is far smaller than one Activity object per row. Indexing or
+    iterating yields Activity objects on demand.
+    """
+    
+    __slots__ = ("_columns",)
+    
+    _INT_COLUMNS = ("id", "student_id")
+    # Ids start at 1, so 0 is free to stand for NULL
+    NULL_ID = 0
+    
+    def __init__(self, rows=()):
+        self._columns = {}
+        for column in Activity.COLUMNS:
+            if column == "date":
+                self._columns[column] = []
+            elif column in ActivityBatch._INT_COLUMNS:
+                self._columns[column] = array("q")
+            else:
+                self._columns[column] = array("d")
+        self.extend(rows)
+    
+    def extend(self, rows):
+        """Append rows given as sequences in Activity.COLUMNS order."""
+        rows = list(rows)
+        if not rows:
+            return
+        for column, values in zip(Activity.COLUMNS, zip(*rows)):
+            if column == "date":
+                self._columns[column].extend(values)
+            elif column in ActivityBatch._INT_COLUMNS:
+                self._columns[column].extend(ActivityBatch.NULL_ID if v is None else v for v in values)
+            else:
+                self._columns[column].extend(math.nan if v is None else v for v in values)
+    
+    def __len__(self):
+        return len(self._columns["id"])
+    
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        values = []
+        for column in Activity.COLUMNS:
+            value = self._columns[column][index]
+            if column in ActivityBatch._INT_COLUMNS:
+                if value == ActivityBatch.NULL_ID:
+                    value = None
+            elif column != "date":
+                if math.isnan(value):
+                    value = None
+                elif column not in Activity.FLOAT_COLUMNS:
+                    value = int(value)
+            values.append(value)
+        return Activity(*values)
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+    
+    def column(self, name):
+        """Return the raw array backing one column."""
+        return self._columns[name]
+    
+    def to_dicts(self):
+        """Convert every row to a dictionary, like Activity.to_dict()."""
+        return [activity.to_dict() for activity in self]
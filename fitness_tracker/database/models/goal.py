@@ -0,0 +1,170 @@
+"""
+Goal model for the per-student fitness goals, stored in user_preferences.
+"""
+import json
+
+from ..db_manager import db_manager
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+class Goal:
+    """
+    A student's goals: daily steps, daily active minutes and a target
+    weight. Each goal that is set is one user_preferences row keyed
+    goal_<metric>; unset goals are None.
+    """
+
+    METRICS = ("steps", "active_minutes", "weight_kg")
+    KEY_PREFIX = "goal_"
+
+    __slots__ = ("student_id",) + METRICS
+
+    def __init__(self, student_id=None, steps=None, active_minutes=None, weight_kg=None):
+        self.student_id = student_id
+        self.steps = steps
+        self.active_minutes = active_minutes
+        self.weight_kg = weight_kg
+
+    @staticmethod
+    def _check_metric(metric):
+        if metric not in Goal.METRICS:
+            raise ValueError(f"Unknown goal metric: {metric}")
+
+    @staticmethod
+    def get(student_id):
+        """A student's goals (a Goal with None for every unset metric)."""
+        goal = Goal(student_id)
+        rows = db_manager.fetchall(
+            "SELECT preference_key, preference_value FROM user_preferences "
+            "WHERE student_id=? AND preference_key LIKE 'goal\\_%' ESCAPE '\\'",
+            (student_id,)
+        )
+        for row in rows:
+            metric = row["preference_key"][len(Goal.KEY_PREFIX):]
+            if metric in Goal.METRICS:
+                setattr(goal, metric, Goal._parse(metric, row["preference_value"]))
+        return goal
+
+    @staticmethod
+    def set(student_id, metric, value):
+        """Set (or with value None, clear) one of a student's goals."""
+        Goal._check_metric(metric)
+        key = Goal.KEY_PREFIX + metric
+        if value is None:
+            db_manager.execute(
+                "DELETE FROM user_preferences WHERE student_id=? AND preference_key=?",
+                (student_id, key)
+            )
+        else:
+            db_manager.execute(
+                "INSERT INTO user_preferences (student_id, preference_key, preference_value) "
+                "VALUES (?, ?, ?) ON CONFLICT(student_id, preference_key) DO UPDATE SET "
+                "preference_value=excluded.preference_value, updated_at=CURRENT_TIMESTAMP",
+                (student_id, key, str(value))
+            )
+        db_manager.commit()
+
+    @staticmethod
+    def set_many(rows):
+        """Upsert (student_id, metric, value) goals in one transaction."""
+        rows = list(rows)
+        for _, metric, _ in rows:
+            Goal._check_metric(metric)
+        with db_manager.transaction():
+            db_manager.executemany(
+                "INSERT INTO user_preferences (student_id, preference_key, preference_value) "
+                "VALUES (?, ?, ?) ON CONFLICT(student_id, preference_key) DO UPDATE SET "
+                "preference_value=excluded.preference_value, updated_at=CURRENT_TIMESTAMP",
+                ((student_id, Goal.KEY_PREFIX + metric, str(value)) for student_id, metric, value in rows)
+            )
+        return len(rows)
+
+    @staticmethod
+    def fetch_frame(student_ids=None):
+        """
+        Goals as a DataFrame indexed by student_id with a float column per
+        metric (NaN where unset). Only students with at least one goal have
+        a row unless student_ids is given, in which case every one does.
+        """
+        query = ("SELECT student_id, preference_key, preference_value FROM user_preferences "
+                 "WHERE preference_key LIKE 'goal\\_%' ESCAPE '\\'")
+        params = ()
+        if student_ids is not None:
+            student_ids = sorted({int(student_id) for student_id in student_ids})
+            query += " AND student_id IN (SELECT value FROM json_each(?))"
+            params = (json.dumps(student_ids),)
+
+        rows = [tuple(row) for row in db_manager.fetchall(query, params)]
+        keys = [Goal.KEY_PREFIX + metric for metric in Goal.METRICS]
+        rows = [row for row in rows if row[1] in keys]
+        owners = np.array([row[0] for row in rows], dtype=np.int64)
+        index = np.array(student_ids if student_ids is not None else np.unique(owners), dtype=np.int64)
+
+        # Scatter the (student, metric, value) rows into a dense table
+        values = np.full((len(index), len(Goal.METRICS)), np.nan)
+        if rows:
+            columns = np.array([keys.index(row[1]) for row in rows])
+            values[np.searchsorted(index, owners), columns] = [float(row[2]) for row in rows]
+        return pd.DataFrame(values, index=pd.Index(index, name="student_id"), columns=list(Goal.METRICS))
+
+    @staticmethod
+    def day_counts(metric, default, student_ids=None, date_from=None, date_to=None):
+        """
+        Per-student daily attainment for a daily metric, aggregated in one
+        scan of activity: arrays of student_id, days (logged), days_achieved
+        (metric at or above the student's goal, else default) and total.
+        Students without activity in the range are absent.
+        """
+        Goal._check_metric(metric)
+        query = (f"SELECT a.student_id, COUNT(*), "
+                 f"COALESCE(SUM(a.{metric} >= COALESCE(CAST(p.preference_value AS REAL), ?)), 0), "
+                 f"TOTAL(a.{metric}) "
+                 "FROM activity AS a LEFT JOIN user_preferences AS p "
+                 "ON p.student_id = a.student_id AND p.preference_key = ? WHERE a.student_id IS NOT NULL")
+        params = [default, Goal.KEY_PREFIX + metric]
+        if student_ids is not None:
+            query += " AND a.student_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(student_id) for student_id in student_ids]))
+        if date_from:
+            query += " AND a.date >= ?"
+            params.append(date_from)
+        if date_to:
+            query += " AND a.date <= ?"
+            params.append(date_to)
+        query += " GROUP BY a.student_id"
+
+        rows = [row for chunk in db_manager.fetch_chunks(query, tuple(params)) for row in chunk]
+        # Days with the metric missing (a weight-only log, say) count as
+        # logged but never achieved; a student with only such days sums to 0
+        student_ids, days, days_achieved, totals = zip(*rows) if rows else ((), (), (), ())
+        return {
+            "student_id": np.array(student_ids, dtype=np.int64),
+            "days": np.array(days, dtype=np.int64),
+            "days_achieved": np.array(days_achieved, dtype=np.int64),
+            "total": np.array(totals, dtype=np.float64),
+        }
+
+    @staticmethod
+    def weight_progress(start, current, target):
+        """
+        Percentage of the way from the start weight to the target that the
+        current weight covers, for loss and gain goals alike, capped at 100
+        (0 when the start is already the target). Works on scalars and arrays.
+        """
+        start, current, target = (np.asarray(value, dtype=np.float64) for value in (start, current, target))
+        to_go = target - start
+        with np.errstate(divide="ignore", invalid="ignore"):
+            progress = np.where(to_go != 0, (current - start) / to_go * 100, 0.0)
+        return np.minimum(progress, 100)
+
+    @staticmethod
+    def _parse(metric, value):
+        """Stored text back to the metric's type (whole numbers for daily goals)."""
+        number = float(value)
+        return number if metric == "weight_kg" else int(number)
+
+    def to_dict(self):
+        """Convert goals to a dictionary of metric -> value."""
+        return {metric: getattr(self, metric) for metric in Goal.METRICS}
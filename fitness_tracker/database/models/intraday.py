@@ -0,0 +1,259 @@
+"""
+Intraday model: minute-level steps and heart rate, one compressed blob
+per student, metric and day.
+"""
+import json
+import sys
+import zlib
+from pathlib import Path
+
+from .. import events
+from ..db_manager import db_manager
+from .activity import Activity
+
+# Add the parent directory to path to import config
+sys.path.append(str(Path(__file__).parent.parent.parent))
+import config
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+class IntradaySeries:
+    """
+    Minute samples stored as one row per student, metric and day.
+
+    A day holds up to 1440 samples. Their minutes of the day and their
+    values are each stored as a blob of deltas from the previous sample,
+    in the narrowest integer type that fits, compressed with zlib. Regular
+    minute data has runs of equal deltas, so a day typically takes a few
+    hundred bytes instead of one table row per sample. Range queries
+    decode whole days with numpy and never build per-sample objects.
+
+    Ingesting samples also rolls each touched day up into its activity
+    row (total steps, mean heart rate), so the daily views, rollups and
+    points stay in step with the intraday data.
+    """
+
+    # metric -> (activity field, how a day is rolled up, plausible per-minute range)
+    METRICS = {
+        "steps": ("steps", "sum", (0, 400)),
+        "heart_rate": ("heart_rate", "mean", (25, 250)),
+    }
+    COLUMNS = ("student_id", "metric", "date", "samples", "minutes", "vals")
+    MINUTES_PER_DAY = 1440
+    # Narrowest first; the type code is the blob's first byte
+    DELTA_TYPES = ("<i1", "<i2", "<i4")
+
+    # --- Schema ---
+
+    @staticmethod
+    def create_table_sql():
+        """CREATE TABLE statement for the intraday table."""
+        return (
+            "CREATE TABLE IF NOT EXISTS intraday (\n"
+            "    student_id INTEGER NOT NULL,\n"
+            "    metric TEXT NOT NULL,\n"
+            "    date TEXT NOT NULL,\n"
+            "    samples INTEGER NOT NULL,\n"
+            "    minutes BLOB NOT NULL,\n"
+            "    vals BLOB NOT NULL,\n"
+            "    PRIMARY KEY (student_id, metric, date)\n"
+            ")"
+        )
+
+    # --- Encoding ---
+
+    @staticmethod
+    def encode(values):
+        """Delta-encode and compress a 1-D integer array into a blob."""
+        deltas = np.diff(np.asarray(values, dtype=np.int64), prepend=0)
+        low, high = (int(deltas.min()), int(deltas.max())) if len(deltas) else (0, 0)
+        for code, dtype in enumerate(IntradaySeries.DELTA_TYPES):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                break
+        payload = deltas.astype(dtype).tobytes()
+        return bytes([code]) + zlib.compress(payload, config.INTRADAY_COMPRESSION_LEVEL)
+
+    @staticmethod
+    def decode(blob):
+        """The int64 array an encode() blob holds."""
+        dtype = IntradaySeries.DELTA_TYPES[blob[0]]
+        return np.frombuffer(zlib.decompress(blob[1:]), dtype=dtype).cumsum(dtype=np.int64)
+
+    @staticmethod
+    def _last_per_key(keys, values):
+        """Sort by key and keep the last value given for each key (input order breaks ties)."""
+        order = np.argsort(keys, kind="stable")
+        keys, values = keys[order], values[order]
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = keys[1:] != keys[:-1]
+        return keys[last], values[last]
+
+    # --- Writes ---
+
+    @staticmethod
+    def ingest(metric, student_ids, timestamps, values, update_daily=True):
+        """
+        Store minute samples of metric ("steps" or "heart_rate").
+
+        student_ids is one id or an array aligned with timestamps (local
+        times in anything pandas parses) and values. Samples are bucketed
+        to the minute, keeping the last value given for a minute; samples
+        of an unknown student, with a bad timestamp, a missing or
+        non-numeric value or a value outside the metric's plausible range
+        are dropped. New minutes are merged into the days already stored,
+        replacing stored values for the same minute. With update_daily,
+        each touched day's activity row gets the day's total steps or mean
+        heart rate, leaving its other values as they are.
+
+        Returns {"days", "samples", "dropped", "errors"}: student-days
+        written, samples kept, samples dropped, and the days whose activity
+        row was rejected (their samples are still stored) as dicts of
+        student_id, date and error.
+        """
+        if metric not in IntradaySeries.METRICS:
+            raise ValueError(f"Unknown intraday metric: {metric}")
+        field, how, (low, high) = IntradaySeries.METRICS[metric]
+
+        stamps = pd.DatetimeIndex(pd.to_datetime(timestamps, format="ISO8601", errors="coerce"))
+        if stamps.tz is not None:
+            stamps = stamps.tz_localize(None)
+        times = stamps.to_numpy(dtype="datetime64[m]")
+        values = np.rint(np.asarray(pd.to_numeric(values, errors="coerce"), dtype=np.float64))
+        student_ids = np.broadcast_to(np.asarray(student_ids, dtype=np.int64), times.shape)
+        known = db_manager.fetchall(
+            "SELECT id FROM students WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(np.unique(student_ids).tolist()),)
+        )
+        with np.errstate(invalid="ignore"):
+            keep = (~np.isnat(times) & (values >= low) & (values <= high)
+                    & np.isin(student_ids, [row[0] for row in known]))
+        dropped = int(len(values) - keep.sum())
+        times, values, student_ids = times[keep], values[keep].astype(np.int64), student_ids[keep]
+
+        # One key per student-minute; sorting by it groups samples by student and day
+        epoch_minutes = times.astype(np.int64)
+        keys, values = IntradaySeries._last_per_key(
+            student_ids * (1 << 32) + epoch_minutes, values
+        )
+        if not len(keys):
+            return {"days": 0, "samples": 0, "dropped": dropped, "errors": []}
+        student_ids = keys >> 32
+        epoch_minutes = keys - (student_ids << 32)
+        day_numbers = epoch_minutes // IntradaySeries.MINUTES_PER_DAY
+        starts = np.flatnonzero(np.diff(student_ids * (1 << 32) + day_numbers, prepend=-1))
+        ends = np.append(starts[1:], len(keys))
+        dates = day_numbers[starts].astype("datetime64[D]").astype(str).tolist()
+        day_students = student_ids[starts].tolist()
+
+        with db_manager.transaction():
+            stored = IntradaySeries._fetch_days(metric, zip(day_students, dates))
+            rows, daily = [], []
+            for student_id, date, start, end in zip(day_students, dates, starts.tolist(), ends.tolist()):
+                minutes = epoch_minutes[start:end] % IntradaySeries.MINUTES_PER_DAY
+                day_values = values[start:end]
+                if (student_id, date) in stored:
+                    old_minutes, old_values = stored[student_id, date]
+                    minutes, day_values = IntradaySeries._last_per_key(
+                        np.concatenate([old_minutes, minutes]), np.concatenate([old_values, day_values])
+                    )
+                rows.append((student_id, metric, date, len(minutes),
+                             IntradaySeries.encode(minutes), IntradaySeries.encode(day_values)))
+                total = int(day_values.sum()) if how == "sum" else int(round(day_values.mean()))
+                daily.append((student_id, date) + tuple(total if name == field else None
+                                                        for name in Activity.NUMERIC_FIELDS))
+
+            db_manager.executemany(
+                f"INSERT INTO intraday ({', '.join(IntradaySeries.COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(student_id, metric, date) DO UPDATE SET "
+                "samples=excluded.samples, minutes=excluded.minutes, vals=excluded.vals",
+                rows
+            )
+            errors = []
+            if update_daily:
+                result = Activity.upsert_many(daily, keep_missing=True)
+                errors = [{"student_id": daily[error["row"]][0], "date": daily[error["row"]][1],
+                           "error": error["error"]} for error in result["errors"]]
+            else:
+                events.student_data_changed(day_students)
+
+        return {"days": len(rows), "samples": len(keys), "dropped": dropped, "errors": errors}
+
+    @staticmethod
+    def _fetch_days(metric, student_days):
+        """Decoded (minutes, values) of the stored days among (student_id, date) pairs."""
+        rows = db_manager.fetchall(
+            "SELECT student_id, date, minutes, vals FROM intraday WHERE metric=? AND (student_id, date) IN "
+            "(SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?))",
+            (metric, json.dumps(list(student_days)))
+        )
+        return {
+            (student_id, date): (IntradaySeries.decode(minutes), IntradaySeries.decode(vals))
+            for student_id, date, minutes, vals in rows
+        }
+
+    @staticmethod
+    def delete(student_id, date_from=None, date_to=None):
+        """Delete a student's intraday data, optionally only between two dates (inclusive)."""
+        query = "DELETE FROM intraday WHERE student_id=?"
+        params = [student_id]
+        if date_from:
+            query += " AND date >= ?"
+            params.append(str(date_from))
+        if date_to:
+            query += " AND date <= ?"
+            params.append(str(date_to))
+        with db_manager.transaction():
+            db_manager.execute(query, tuple(params))
+            events.student_data_changed({student_id})
+
+    # --- Reads ---
+
+    @staticmethod
+    def get_range(student_id, metric, start, end):
+        """
+        A student's samples of metric from start (inclusive) to end
+        (exclusive), as (times, values): datetime64[m] and int64 arrays in
+        time order. start and end are datetimes, or dates meaning midnight.
+        """
+        if metric not in IntradaySeries.METRICS:
+            raise ValueError(f"Unknown intraday metric: {metric}")
+        start, end = np.datetime64(start, "m"), np.datetime64(end, "m")
+        rows = db_manager.fetchall(
+            "SELECT date, minutes, vals FROM intraday "
+            "WHERE student_id=? AND metric=? AND date >= ? AND date <= ? ORDER BY date",
+            (student_id, metric, str(start.astype("datetime64[D]")),
+             str((end - 1).astype("datetime64[D]")))
+        )
+        if not rows:
+            return np.array([], dtype="datetime64[m]"), np.array([], dtype=np.int64)
+
+        times = np.concatenate([np.datetime64(date, "m") + IntradaySeries.decode(minutes)
+                                for date, minutes, _ in rows])
+        values = np.concatenate([IntradaySeries.decode(vals) for _, _, vals in rows])
+        # Only the first and last day can hold samples outside the range
+        inside = (times >= start) & (times < end)
+        return times[inside], values[inside]
+
+    @staticmethod
+    def get_day(student_id, metric, date):
+        """One day's samples as (minutes of the day, values) int64 arrays."""
+        row = db_manager.fetchone(
+            "SELECT minutes, vals FROM intraday WHERE student_id=? AND metric=? AND date=?",
+            (student_id, metric, str(date))
+        )
+        if row is None:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        return IntradaySeries.decode(row[0]), IntradaySeries.decode(row[1])
+
+    @staticmethod
+    def get_stats():
+        """Student-days, samples and stored bytes per metric."""
+        rows = db_manager.fetchall(
+            "SELECT metric, COUNT(*), SUM(samples), SUM(LENGTH(minutes) + LENGTH(vals)) "
+            "FROM intraday GROUP BY metric ORDER BY metric"
+        )
+        return {metric: {"days": days, "samples": samples, "bytes": size}
+                for metric, days, samples, size in rows}
@@ -0,0 +1,288 @@
+"""
+Student points model: persisted scores and unlocked achievements behind the
+leaderboard.
+"""
+import json
+
+from .. import events
+from ..db_manager import db_manager
+
+class StudentPoints:
+    """
+    One score row per student, ranked through an index on points.
+
+    A student's points are the sum of their activity points (a fixed award
+    per logged day, scaled by steps) and the points of the achievements
+    they have unlocked. Triggers on activity and student_achievements keep
+    student_points current on every write, so ranks never need a full
+    recount; bulk writes suspend the triggers and rebuild the affected
+    students instead.
+    """
+
+    COLUMNS = ("student_id", "points", "achievements")
+    TRIGGERS = ("trg_points_activity_insert", "trg_points_activity_update",
+                "trg_points_activity_delete", "trg_points_achievement_insert",
+                "trg_points_achievement_delete")
+
+    # Points for a logged day: (steps above, points) checked in order, else the base
+    ACTIVITY_POINTS_TIERS = ((10000, 10), (5000, 5))
+    ACTIVITY_POINTS_BASE = 2
+
+    __slots__ = COLUMNS
+
+    def __init__(self, student_id=None, points=0, achievements=0):
+        self.student_id = student_id
+        self.points = points
+        self.achievements = achievements
+
+    # --- Schema ---
+
+    @staticmethod
+    def activity_points_sql(row):
+        """SQL expression for the points earned by an activity row (e.g. NEW)."""
+        tiers = " ".join(f"WHEN {row}.steps > {steps} THEN {points}"
+                         for steps, points in StudentPoints.ACTIVITY_POINTS_TIERS)
+        return f"(CASE {tiers} ELSE {StudentPoints.ACTIVITY_POINTS_BASE} END)"
+
+    @staticmethod
+    def activity_points(steps):
+        """Points earned by logging a day with this many steps."""
+        for threshold, points in StudentPoints.ACTIVITY_POINTS_TIERS:
+            if steps is not None and steps > threshold:
+                return points
+        return StudentPoints.ACTIVITY_POINTS_BASE
+
+    @staticmethod
+    def create_tables_sql():
+        """CREATE statements for the points and achievements tables and the rank index."""
+        return [
+            """CREATE TABLE IF NOT EXISTS student_points (
+                student_id INTEGER PRIMARY KEY,
+                points INTEGER NOT NULL DEFAULT 0,
+                achievements INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY(student_id) REFERENCES students(id)
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_student_points_rank ON student_points (points DESC, student_id)",
+            """CREATE TABLE IF NOT EXISTS student_achievements (
+                student_id INTEGER NOT NULL,
+                achievement_id TEXT NOT NULL,
+                points INTEGER NOT NULL DEFAULT 0,
+                unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (student_id, achievement_id),
+                FOREIGN KEY(student_id) REFERENCES students(id)
+            )""",
+        ]
+
+    @staticmethod
+    def _add_sql(student, points, achievements="0"):
+        """
+        Trigger statement adding points (and achievements) to a student's
+        row. A NULL student adds nothing: student_id is an INTEGER PRIMARY
+        KEY, so inserting NULL would create a row under a fresh id.
+        """
+        return (
+            "INSERT INTO student_points (student_id, points, achievements) "
+            f"SELECT {student}, {points}, {achievements} WHERE {student} IS NOT NULL "
+            "ON CONFLICT(student_id) DO UPDATE SET points = points + excluded.points, "
+            "achievements = achievements + excluded.achievements, "
+            "updated_at = CURRENT_TIMESTAMP;"
+        )
+
+    @staticmethod
+    def create_triggers_sql():
+        """CREATE TRIGGER statements keeping student_points in step with its sources."""
+        new_points = StudentPoints.activity_points_sql("NEW")
+        old_points = StudentPoints.activity_points_sql("OLD")
+        (activity_insert, activity_update, activity_delete,
+         achievement_insert, achievement_delete) = StudentPoints.TRIGGERS
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS {activity_insert} AFTER INSERT ON activity "
+            f"WHEN NEW.student_id IS NOT NULL\nBEGIN\n"
+            f"{StudentPoints._add_sql('NEW.student_id', new_points)}\nEND",
+            f"CREATE TRIGGER IF NOT EXISTS {activity_update} "
+            f"AFTER UPDATE OF student_id, steps ON activity\nBEGIN\n"
+            f"{StudentPoints._add_sql('OLD.student_id', f'-{old_points}')}\n"
+            f"{StudentPoints._add_sql('NEW.student_id', new_points)}\nEND",
+            f"CREATE TRIGGER IF NOT EXISTS {activity_delete} AFTER DELETE ON activity "
+            f"WHEN OLD.student_id IS NOT NULL\nBEGIN\n"
+            f"{StudentPoints._add_sql('OLD.student_id', f'-{old_points}')}\nEND",
+            f"CREATE TRIGGER IF NOT EXISTS {achievement_insert} AFTER INSERT ON student_achievements\n"
+            f"BEGIN\n{StudentPoints._add_sql('NEW.student_id', 'NEW.points', '1')}\nEND",
+            f"CREATE TRIGGER IF NOT EXISTS {achievement_delete} AFTER DELETE ON student_achievements\n"
+            f"BEGIN\n{StudentPoints._add_sql('OLD.student_id', '-OLD.points', '-1')}\nEND",
+        ]
+
+    @staticmethod
+    def create_triggers():
+        """Create the maintenance triggers if they don't exist."""
+        for statement in StudentPoints.create_triggers_sql():
+            db_manager.execute(statement)
+
+    @staticmethod
+    def drop_triggers():
+        """Drop the activity maintenance triggers (achievement triggers stay)."""
+        for trigger in StudentPoints.TRIGGERS[:3]:
+            db_manager.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    # --- Maintenance ---
+
+    @staticmethod
+    def rebuild(student_ids=None):
+        """
+        Recompute student_points from activity and student_achievements, for
+        every student or just student_ids. Activity left behind by a deleted
+        student scores nothing. Returns the number of rows written.
+        """
+        where, params = "", ()
+        if student_ids is not None:
+            where = "WHERE student_id IN (SELECT value FROM json_each(?))"
+            params = (json.dumps([int(student_id) for student_id in student_ids]),)
+
+        with db_manager.transaction():
+            db_manager.execute(f"DELETE FROM student_points {where}", params)
+            cursor = db_manager.execute(
+                "INSERT INTO student_points (student_id, points, achievements) "
+                "SELECT student_id, SUM(points), SUM(achievements) FROM ("
+                f"SELECT student_id, {StudentPoints.activity_points_sql('activity')} AS points, "
+                f"0 AS achievements FROM activity {where or 'WHERE 1'} AND student_id IS NOT NULL "
+                "UNION ALL SELECT student_id, points, 1 FROM student_achievements "
+                f"{where}) WHERE student_id IN (SELECT id FROM students) GROUP BY student_id",
+                params * 2
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def forget(student_id):
+        """Remove a deleted student's achievements and score row, taking them off the leaderboard."""
+        with db_manager.transaction():
+            db_manager.execute("DELETE FROM student_achievements WHERE student_id=?", (student_id,))
+            db_manager.execute("DELETE FROM student_points WHERE student_id=?", (student_id,))
+
+    @staticmethod
+    def suspend():
+        """Stop per-row maintenance for the rest of the current transaction (see resume)."""
+        StudentPoints.drop_triggers()
+
+    @staticmethod
+    def resume(student_ids, date_from=None, date_to=None):
+        """Rebuild the students written while suspended and restore the triggers."""
+        if student_ids:
+            StudentPoints.rebuild(student_ids)
+        StudentPoints.create_triggers()
+
+    # --- Queries ---
+
+    @staticmethod
+    def get(student_id):
+        """A student's score row (zeros if they haven't scored yet)."""
+        row = db_manager.fetchone(
+            "SELECT student_id, points, achievements FROM student_points WHERE student_id=?",
+            (student_id,)
+        )
+        return StudentPoints(*row) if row else StudentPoints(student_id)
+
+    @staticmethod
+    def top(limit=10, offset=0):
+        """
+        The leaderboard from position offset, as rows of rank, student_id,
+        name, points and achievements. Tied scores share a rank.
+        """
+        # The index serves the ordered slice; ranks inside the slice are
+        # shifted by the global rank of its first score, so no full count.
+        rows = db_manager.fetchall(
+            "SELECT RANK() OVER (ORDER BY p.points DESC) AS rank, p.student_id, s.name, "
+            "p.points, p.achievements FROM (SELECT student_id, points, achievements "
+            "FROM student_points ORDER BY points DESC, student_id LIMIT ? OFFSET ?) AS p "
+            "LEFT JOIN students AS s ON s.id = p.student_id ORDER BY p.points DESC, p.student_id",
+            (int(limit), int(offset))
+        )
+        if not rows:
+            return []
+        shift = StudentPoints.rank_of(rows[0]["points"]) - 1 if offset else 0
+        return [{**dict(row), "rank": row["rank"] + shift} for row in rows]
+
+    @staticmethod
+    def rank_of(points):
+        """Rank a score would have: one more than the number of higher scores."""
+        row = db_manager.fetchone(
+            "SELECT COUNT(*) AS higher FROM student_points WHERE points > ?", (points,)
+        )
+        return row["higher"] + 1
+
+    @staticmethod
+    def rank(student_id):
+        """
+        (rank, points, total ranked students) for a student. A student who
+        hasn't scored yet ranks with zero points and counts in the total.
+        """
+        row = db_manager.fetchone(
+            "SELECT (SELECT points FROM student_points WHERE student_id=?) AS points, "
+            "COUNT(*) AS total FROM student_points",
+            (student_id,)
+        )
+        if row["points"] is None:
+            return StudentPoints.rank_of(0), 0, row["total"] + 1
+        return StudentPoints.rank_of(row["points"]), row["points"], row["total"]
+
+    # --- Achievements ---
+
+    @staticmethod
+    def get_achievements(student_id):
+        """A student's unlocked achievements as (achievement_id, points, unlocked_at) rows, oldest first."""
+        return db_manager.fetchall(
+            "SELECT achievement_id, points, unlocked_at FROM student_achievements "
+            "WHERE student_id=? ORDER BY unlocked_at, achievement_id",
+            (student_id,)
+        )
+
+    @staticmethod
+    def earned_by_day(student_id, date_from):
+        """
+        Points a student earned per day from date_from on, as (day, points)
+        rows in day order: activity points on the activity's date and
+        achievement points on the day of the unlock.
+        """
+        return db_manager.fetchall(
+            "SELECT day, SUM(points) AS points FROM ("
+            f"SELECT date AS day, {StudentPoints.activity_points_sql('activity')} AS points "
+            "FROM activity WHERE student_id=? AND date >= ? "
+            "UNION ALL SELECT date(unlocked_at), points FROM student_achievements "
+            "WHERE student_id=? AND date(unlocked_at) >= ?) GROUP BY day ORDER BY day",
+            (student_id, str(date_from), student_id, str(date_from))
+        )
+
+    @staticmethod
+    def unlock_many(unlocks):
+        """
+        Persist (student_id, achievement_id, points) unlocks, ignoring ones
+        already held. Returns the unlocks that were new.
+        """
+        unlocks = list(unlocks)
+        if not unlocks:
+            return []
+        with db_manager.transaction():
+            held = db_manager.fetchall(
+                "SELECT student_id, achievement_id FROM student_achievements "
+                "WHERE student_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted({int(u[0]) for u in unlocks})),)
+            )
+            held = {(row["student_id"], row["achievement_id"]) for row in held}
+            new = [u for u in unlocks if (u[0], u[1]) not in held]
+            db_manager.executemany(
+                "INSERT OR IGNORE INTO student_achievements (student_id, achievement_id, points) "
+                "VALUES (?, ?, ?)",
+                new
+            )
+            events.student_data_changed(u[0] for u in new)
+        return new
+
+    @staticmethod
+    def revoke(student_id, achievement_id):
+        """Remove an unlocked achievement and its points."""
+        db_manager.execute(
+            "DELETE FROM student_achievements WHERE student_id=? AND achievement_id=?",
+            (student_id, achievement_id)
+        )
+        db_manager.commit()
+        events.student_data_changed({student_id})
@@ -0,0 +1,398 @@
+"""
+Activity rollup model: per-student aggregates of daily activity by day,
+ISO week and month.
+"""
+import json
+import sys
+from datetime import date, timedelta
+from itertools import product
+from pathlib import Path
+
+from ..db_manager import db_manager
+
+# Add the parent directory to path to import config
+sys.path.append(str(Path(__file__).parent.parent.parent))
+import config
+
+class ActivityRollup:
+    """
+    Pre-aggregated activity totals, one row per student per period.
+
+    Week and month rollups are stored in activity_rollup and kept in step
+    with the activity table by triggers: inserts add to their buckets,
+    while updates and deletes recompute the buckets they touch from the
+    activity rows. Large bulk writes suspend the triggers and rebuild the
+    affected range instead. Activity already holds one row per student per
+    day, so day rollups are the activity_rollup_day view over it.
+    """
+
+    PERIODS = ("day", "week", "month")
+    STORED_PERIODS = ("week", "month")
+    METRICS = ("steps", "active_minutes", "distance", "calories", "heart_rate", "weight_kg")
+    STATS = ("sum", "count", "min", "max")
+    TRIGGERS = ("trg_activity_rollup_insert", "trg_activity_rollup_update",
+                "trg_activity_rollup_move", "trg_activity_rollup_delete")
+
+    # SQL for the first day of a date's period, and the last day from the first
+    PERIOD_START = {
+        "day": "date({0})",
+        "week": "date({0}, 'weekday 0', '-6 days')",  # ISO weeks start on Monday
+        "month": "date({0}, 'start of month')",
+    }
+    PERIOD_END = {
+        "day": "date({0})",
+        "week": "date({0}, '+6 days')",
+        "month": "date({0}, '+1 month', '-1 day')",
+    }
+
+    COLUMNS = (("student_id", "period", "period_start", "days")
+               + tuple(map("_".join, product(METRICS, STATS)))
+               + ("last_weight", "last_weight_date"))
+
+    def __init__(self, **values):
+        for column in ActivityRollup.COLUMNS:
+            setattr(self, column, values.get(column))
+
+    # --- Schema ---
+
+    @staticmethod
+    def create_table_sql():
+        """CREATE TABLE statement for the rollup table."""
+        stat_columns = ",\n".join(
+            f"    {metric}_{stat} {'INTEGER NOT NULL DEFAULT 0' if stat == 'count' else 'REAL'}"
+            for metric in ActivityRollup.METRICS for stat in ActivityRollup.STATS
+        )
+        return (
+            "CREATE TABLE IF NOT EXISTS activity_rollup (\n"
+            "    student_id INTEGER NOT NULL,\n"
+            "    period TEXT NOT NULL,\n"
+            "    period_start TEXT NOT NULL,\n"
+            "    days INTEGER NOT NULL DEFAULT 0,\n"
+            f"{stat_columns},\n"
+            "    last_weight REAL,\n"
+            "    last_weight_date TEXT,\n"
+            "    PRIMARY KEY (student_id, period, period_start)\n"
+            ") WITHOUT ROWID"
+        )
+
+    @staticmethod
+    def create_view_sql():
+        """CREATE VIEW statement presenting each activity row as a day rollup."""
+        stats = ", ".join(
+            f"COALESCE({metric}, 0) AS {metric}_sum, {metric} IS NOT NULL AS {metric}_count, "
+            f"{metric} AS {metric}_min, {metric} AS {metric}_max"
+            for metric in ActivityRollup.METRICS
+        )
+        return (
+            "CREATE VIEW IF NOT EXISTS activity_rollup_day AS "
+            f"SELECT student_id, 'day' AS period, date AS period_start, 1 AS days, {stats}, "
+            "weight_kg AS last_weight, "
+            "CASE WHEN weight_kg IS NOT NULL THEN date END AS last_weight_date "
+            "FROM activity WHERE student_id IS NOT NULL"
+        )
+
+    @staticmethod
+    def _aggregate_select(period, where):
+        """SELECT computing rollup rows for period from the activity rows matching where."""
+        start = ActivityRollup.PERIOD_START[period].format("date")
+        stats = ", ".join(
+            f"COALESCE(SUM({metric}), 0) AS {metric}_sum, COUNT({metric}) AS {metric}_count, "
+            f"MIN({metric}) AS {metric}_min, MAX({metric}) AS {metric}_max"
+            for metric in ActivityRollup.METRICS
+        )
+        totals = ", ".join(f"g.{column}" for column in ActivityRollup.COLUMNS[:-2])
+        return (
+            f"SELECT {totals}, (SELECT w.weight_kg FROM activity AS w "
+            f"WHERE w.student_id = g.student_id AND w.date = g.last_weight_date), g.last_weight_date "
+            f"FROM (SELECT student_id, '{period}' AS period, {start} AS period_start, "
+            f"COUNT(*) AS days, {stats}, "
+            f"MAX(CASE WHEN weight_kg IS NOT NULL THEN date END) AS last_weight_date "
+            f"FROM activity WHERE {where} AND +student_id IS NOT NULL AND {start} IS NOT NULL "
+            f"GROUP BY student_id, {start}) AS g"
+        )
+
+    @staticmethod
+    def _recompute_bucket_sql(period, row):
+        """Trigger statements replacing row's (OLD or NEW) bucket with its recomputed totals."""
+        start = ActivityRollup.PERIOD_START[period].format(f"{row}.date")
+        end = ActivityRollup.PERIOD_END[period].format(start)
+        return (
+            f"DELETE FROM activity_rollup WHERE student_id = {row}.student_id "
+            f"AND period = '{period}' AND period_start = {start};\n"
+            f"INSERT INTO activity_rollup ({', '.join(ActivityRollup.COLUMNS)}) "
+            + ActivityRollup._aggregate_select(
+                period, f"student_id = {row}.student_id AND date BETWEEN {start} AND {end}"
+            ) + ";"
+        )
+
+    @staticmethod
+    def _add_row_sql(period):
+        """Trigger statement adding NEW to its bucket for period."""
+        start = ActivityRollup.PERIOD_START[period].format("NEW.date")
+        values = ", ".join(
+            f"COALESCE(NEW.{metric}, 0), NEW.{metric} IS NOT NULL, NEW.{metric}, NEW.{metric}"
+            for metric in ActivityRollup.METRICS
+        )
+        updates = []
+        for metric in ActivityRollup.METRICS:
+            for stat in ActivityRollup.STATS:
+                column = f"{metric}_{stat}"
+                if stat in ("sum", "count"):
+                    updates.append(f"{column} = {column} + excluded.{column}")
+                else:
+                    updates.append(f"{column} = COALESCE({stat.upper()}({column}, excluded.{column}), "
+                                   f"{column}, excluded.{column})")
+        newer = "excluded.last_weight_date >= COALESCE(last_weight_date, '')"
+        updates.append(f"last_weight = CASE WHEN {newer} THEN excluded.last_weight ELSE last_weight END")
+        updates.append(f"last_weight_date = CASE WHEN {newer} THEN excluded.last_weight_date "
+                       f"ELSE last_weight_date END")
+        return (
+            f"INSERT INTO activity_rollup ({', '.join(ActivityRollup.COLUMNS)}) "
+            f"VALUES (NEW.student_id, '{period}', {start}, 1, {values}, NEW.weight_kg, "
+            f"CASE WHEN NEW.weight_kg IS NOT NULL THEN date(NEW.date) END) "
+            f"ON CONFLICT(student_id, period, period_start) DO UPDATE SET "
+            f"days = days + 1, {', '.join(updates)};"
+        )
+
+    @staticmethod
+    def create_triggers_sql():
+        """CREATE TRIGGER statements keeping the rollups in step with activity."""
+        valid_new = "NEW.student_id IS NOT NULL AND date(NEW.date) IS NOT NULL"
+        insert_body = "\n".join(ActivityRollup._add_row_sql(p) for p in ActivityRollup.STORED_PERIODS)
+        update_body = "\n".join(
+            ActivityRollup._recompute_bucket_sql(p, "NEW") for p in ActivityRollup.STORED_PERIODS
+        )
+        old_body = "\n".join(
+            ActivityRollup._recompute_bucket_sql(p, "OLD") for p in ActivityRollup.STORED_PERIODS
+        )
+        moved = "OLD.student_id IS NOT NEW.student_id OR OLD.date IS NOT NEW.date"
+        insert_trigger, update_trigger, move_trigger, delete_trigger = ActivityRollup.TRIGGERS
+        return [
+            f"CREATE TRIGGER IF NOT EXISTS {insert_trigger} AFTER INSERT ON activity "
+            f"WHEN {valid_new}\nBEGIN\n{insert_body}\nEND",
+            f"CREATE TRIGGER IF NOT EXISTS {update_trigger} AFTER UPDATE ON activity "
+            f"WHEN {valid_new}\nBEGIN\n{update_body}\nEND",
+            # A row moved to another student or day also leaves its old buckets
+            f"CREATE TRIGGER IF NOT EXISTS {move_trigger} AFTER UPDATE OF student_id, date "
+            f"ON activity WHEN {moved}\nBEGIN\n{old_body}\nEND",
+            f"CREATE TRIGGER IF NOT EXISTS {delete_trigger} AFTER DELETE ON activity\n"
+            f"BEGIN\n{old_body}\nEND",
+        ]
+
+    @staticmethod
+    def create_triggers():
+        """Create the maintenance triggers if they don't exist."""
+        for statement in ActivityRollup.create_triggers_sql():
+            db_manager.execute(statement)
+
+    @staticmethod
+    def drop_triggers():
+        """Drop the maintenance triggers."""
+        for trigger in ActivityRollup.TRIGGERS:
+            db_manager.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    # --- Maintenance ---
+
+    @staticmethod
+    def rebuild(student_ids=None, date_from=None, date_to=None):
+        """
+        Recompute the stored week and month rollups from the activity table.
+
+        With no arguments every rollup is rebuilt. student_ids limits the
+        rebuild to those students; date_from/date_to limit it to the
+        periods overlapping that date range. Runs in one transaction and
+        returns the number of rollup rows written.
+        """
+        written = 0
+        with db_manager.transaction():
+            for period in ActivityRollup.STORED_PERIODS:
+                rollup_filters, activity_filters, params = [], [], []
+                if student_ids is not None:
+                    ids = json.dumps([int(student_id) for student_id in student_ids])
+                    rollup_filters.append("student_id IN (SELECT value FROM json_each(?))")
+                    activity_filters.append("student_id IN (SELECT value FROM json_each(?))")
+                    params.append(ids)
+                if date_from:
+                    start = ActivityRollup.PERIOD_START[period].format("?")
+                    rollup_filters.append(f"period_start >= {start}")
+                    activity_filters.append(f"date >= {start}")
+                    params.append(date_from)
+                if date_to:
+                    end = ActivityRollup.PERIOD_END[period].format(
+                        ActivityRollup.PERIOD_START[period].format("?"))
+                    rollup_filters.append(f"period_start <= {end}")
+                    activity_filters.append(f"date <= {end}")
+                    params.append(date_to)
+
+                rollup_where = " AND ".join(["period = ?"] + rollup_filters)
+                db_manager.execute(f"DELETE FROM activity_rollup WHERE {rollup_where}",
+                                   [period] + params)
+                cursor = db_manager.execute(
+                    f"INSERT INTO activity_rollup ({', '.join(ActivityRollup.COLUMNS)}) "
+                    + ActivityRollup._aggregate_select(period, " AND ".join(activity_filters) or "1"),
+                    params
+                )
+                written += cursor.rowcount
+        return written
+
+    @staticmethod
+    def suspend():
+        """
+        Stop incremental maintenance for the rest of the current transaction,
+        ahead of a bulk write too large for per-row triggers to keep up.
+        Must be paired with resume() before the transaction commits.
+        """
+        ActivityRollup.drop_triggers()
+
+    @staticmethod
+    def resume(student_ids, date_from, date_to):
+        """Rebuild the range written while suspended and restore the triggers."""
+        if student_ids and date_from and date_to:
+            ActivityRollup.rebuild(student_ids, date_from, date_to)
+        ActivityRollup.create_triggers()
+
+    # --- Queries ---
+
+    @staticmethod
+    def cover(date_from, date_to):
+        """
+        Split an inclusive date range into few (period, period_start)
+        buckets: the whole months inside it, then whole ISO weeks on either
+        side, then the leftover days.
+        """
+        first_month = date_from if date_from.day == 1 else ActivityRollup._next_month(date_from)
+        months = []
+        month = first_month
+        while ActivityRollup._next_month(month) - timedelta(days=1) <= date_to:
+            months.append(("month", month.isoformat()))
+            month = ActivityRollup._next_month(month)
+        if not months:
+            return ActivityRollup._cover_weeks(date_from, date_to)
+        return (ActivityRollup._cover_weeks(date_from, first_month - timedelta(days=1))
+                + months + ActivityRollup._cover_weeks(month, date_to))
+
+    @staticmethod
+    def _cover_weeks(date_from, date_to):
+        """Split a date range into whole ISO weeks and leftover days."""
+        buckets = []
+        day = date_from
+        while day <= date_to:
+            if day.weekday() == 0 and day + timedelta(days=6) <= date_to:
+                buckets.append(("week", day.isoformat()))
+                day += timedelta(days=7)
+            else:
+                buckets.append(("day", day.isoformat()))
+                day += timedelta(days=1)
+        return buckets
+
+    @staticmethod
+    def _next_month(day):
+        """First day of the month after day's."""
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    @staticmethod
+    def get_window(student_id, date_from, date_to):
+        """
+        Totals for a student over an inclusive date range, read from the
+        handful of rollup rows covering it. Returns a dict with "days",
+        per-metric sum/count/min/max/avg, and the latest weight.
+        """
+        if isinstance(date_from, str):
+            date_from = date.fromisoformat(date_from[:10])
+        if isinstance(date_to, str):
+            date_to = date.fromisoformat(date_to[:10])
+
+        buckets = ActivityRollup.cover(date_from, date_to)
+        days = [start for period, start in buckets if period == "day"]
+        stored = [bucket for bucket in buckets if bucket[0] != "day"]
+        columns = ", ".join(ActivityRollup.COLUMNS)
+        rows = db_manager.fetchall(
+            f"SELECT {columns} FROM activity_rollup "
+            "WHERE student_id = ? AND (period, period_start) IN "
+            "(SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)) "
+            f"UNION ALL SELECT {columns} FROM activity_rollup_day "
+            "WHERE student_id = ? AND period_start IN (SELECT value FROM json_each(?))",
+            (student_id, json.dumps(stored), student_id, json.dumps(days))
+        )
+        return ActivityRollup.combine(rows)
+
+    @staticmethod
+    def get_periods(student_id, period, date_from=None, date_to=None, clip=False):
+        """
+        A student's rollups for one period type, oldest first. With clip
+        (and both dates), a period running past either end of the range is
+        replaced by the totals of its days inside the range, from the day
+        view, and dropped if it has none.
+        """
+        table = "activity_rollup_day" if period == "day" else "activity_rollup"
+        query = (f"SELECT {', '.join(ActivityRollup.COLUMNS)} FROM {table} "
+                 "WHERE student_id = ? AND period = ?")
+        params = [student_id, period]
+        if date_from:
+            query += f" AND period_start >= {ActivityRollup.PERIOD_START[period].format('?')}"
+            params.append(date_from)
+        if date_to:
+            query += " AND period_start <= ?"
+            params.append(date_to)
+        query += " ORDER BY period_start"
+        rollups = [ActivityRollup(**dict(row)) for row in db_manager.fetchall(query, params)]
+        if not clip or period == "day" or not (date_from and date_to):
+            return rollups
+
+        first, last = (date.fromisoformat(str(day)[:10]) for day in (date_from, date_to))
+        clipped = []
+        for rollup in rollups:
+            start = date.fromisoformat(rollup.period_start)
+            end = (start + timedelta(days=6) if period == "week"
+                   else ActivityRollup._next_month(start) - timedelta(days=1))
+            if first <= start and end <= last:
+                clipped.append(rollup)
+                continue
+            days = ActivityRollup.get_periods(student_id, "day", max(start, first).isoformat(),
+                                              min(end, last).isoformat())
+            if days:
+                clipped.append(ActivityRollup.from_totals(
+                    student_id, period, rollup.period_start,
+                    ActivityRollup.combine([day.to_dict() for day in days])
+                ))
+        return clipped
+
+    @staticmethod
+    def from_totals(student_id, period, period_start, totals):
+        """A rollup for one period from combine()'s totals."""
+        return ActivityRollup(
+            student_id=student_id, period=period, period_start=period_start,
+            **{column: totals[column] for column in ActivityRollup.COLUMNS[3:-2]},
+            last_weight=totals["latest_weight"], last_weight_date=totals["latest_weight_date"]
+        )
+
+    @staticmethod
+    def combine(rows):
+        """Merge rollup rows (any periods, non-overlapping) into one set of totals."""
+        totals = {"days": 0, "latest_weight": None, "latest_weight_date": None}
+        for metric in ActivityRollup.METRICS:
+            totals.update({f"{metric}_sum": 0, f"{metric}_count": 0,
+                           f"{metric}_min": None, f"{metric}_max": None})
+
+        for row in rows:
+            totals["days"] += row["days"]
+            for metric in ActivityRollup.METRICS:
+                totals[f"{metric}_sum"] += row[f"{metric}_sum"] or 0
+                totals[f"{metric}_count"] += row[f"{metric}_count"]
+                for stat, pick in (("min", min), ("max", max)):
+                    value = row[f"{metric}_{stat}"]
+                    current = totals[f"{metric}_{stat}"]
+                    if value is not None:
+                        totals[f"{metric}_{stat}"] = value if current is None else pick(current, value)
+            if row["last_weight_date"] and row["last_weight_date"] >= (totals["latest_weight_date"] or ""):
+                totals["latest_weight"] = row["last_weight"]
+                totals["latest_weight_date"] = row["last_weight_date"]
+
+        for metric in ActivityRollup.METRICS:
+            count = totals[f"{metric}_count"]
+            totals[f"{metric}_avg"] = totals[f"{metric}_sum"] / count if count else None
+        return totals
+
+    def to_dict(self):
+        """Convert rollup to dictionary."""
+        return {column: getattr(self, column) for column in ActivityRollup.COLUMNS}
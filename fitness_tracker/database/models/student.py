@@ -1,7 +1,14 @@
 """
 Student model for representing student data in the application.
 """
+import json
+
+from .. import events
 from ..db_manager import db_manager
+from .points import StudentPoints
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
 
 class Student:
     """
@@ -9,6 +16,14 @@ class Student:
     Provides methods for CRUD operations on student data.
     """
     
+    # Columns in the order used for positional rows
+    COLUMNS = ("id", "name", "age", "grade", "gender", "fitness_level", "height_cm")
+    
+    # No per-instance __dict__; rows are built positionally in COLUMNS order
+    __slots__ = COLUMNS
+    SELECT = f"SELECT {', '.join(COLUMNS)} FROM students"
+    ALL_QUERY = SELECT + " ORDER BY name"
+    
     def __init__(self, id=None, name=None, age=None, grade=None, 
                  gender=None, fitness_level=None, height_cm=None):
         self.id = id
@@ -22,16 +37,42 @@ class Student:
     @staticmethod
     def get_all():
         """Get all students from the database."""
-        rows = db_manager.fetchall("SELECT * FROM students ORDER BY name")
-        return [Student._row_to_student(row) for row in rows]
+        return db_manager.fetchall(Student.ALL_QUERY, row_factory=Student._from_cursor)
     
     @staticmethod
     def get_by_id(student_id):
         """Get a student by ID."""
-        row = db_manager.fetchone("SELECT * FROM students WHERE id=?", (student_id,))
-        if row:
-            return Student._row_to_student(row)
-        return None
+        return db_manager.fetchone(Student.SELECT + " WHERE id=?", (student_id,),
+                                   row_factory=Student._from_cursor)
+    
+    @staticmethod
+    def fetch_frame(filters=None, columns=None):
+        """
+        Load students matching filters into a DataFrame with the given
+        columns (default all, in COLUMNS order), sorted by id. filters maps
+        a column to a value, or to a list of accepted values, e.g.
+        {"grade": "10", "gender": ["Male", "Female"]}.
+        """
+        columns = list(columns or Student.COLUMNS)
+        unknown = set(columns) - set(Student.COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown student columns: {', '.join(sorted(unknown))}")
+        
+        query = f"SELECT {', '.join(columns)} FROM students WHERE 1=1"
+        params = []
+        for column, value in (filters or {}).items():
+            if column not in Student.COLUMNS:
+                raise ValueError(f"Unknown student column: {column}")
+            if isinstance(value, (list, tuple, set, frozenset)):
+                query += f" AND {column} IN (SELECT value FROM json_each(?))"
+                params.append(json.dumps(list(value)))
+            else:
+                query += f" AND {column}=?"
+                params.append(value)
+        query += " ORDER BY id"
+        
+        rows = [tuple(row) for row in db_manager.fetchall(query, params)]
+        return pd.DataFrame.from_records(rows, columns=columns)
     
     def save(self):
         """Save or update a student in the database."""
@@ -50,26 +91,43 @@ class Student:
             self.id = cursor.lastrowid
         
         db_manager.commit()
+        events.student_data_changed({self.id})
         return self
-    
+
+    @staticmethod
+    def bulk_insert(rows):
+        """
+        Insert many students in one transaction with executemany. Rows are
+        tuples in COLUMNS order; pass None as the id to let the database
+        assign one. Returns the number of rows inserted.
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        with db_manager.transaction():
+            db_manager.executemany(
+                f"INSERT INTO students ({', '.join(Student.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(Student.COLUMNS))})",
+                rows
+            )
+            events.student_data_changed(row[0] for row in rows)
+        return len(rows)
+
     @staticmethod
     def delete(student_id):
-        """Delete a student by ID."""
-        db_manager.execute("DELETE FROM students WHERE id=?", (student_id,))
-        db_manager.commit()
+        """Delete a student by ID, with their points and achievements."""
+        with db_manager.transaction():
+            db_manager.execute("DELETE FROM students WHERE id=?", (student_id,))
+            StudentPoints.forget(student_id)
+        events.student_data_changed({student_id})
     
     @staticmethod
     def _row_to_student(row):
-        """Convert a database row to a Student object."""
-        return Student(
-            id=row['id'],
-            name=row['name'],
-            age=row['age'],
-            grade=row['grade'],
-            gender=row['gender'],
-            fitness_level=row['fitness_level'],
-            height_cm=row['height_cm']
-        )
+        """Convert a database row in COLUMNS order to a Student object."""
+        return Student(*row)
+    
+    @staticmethod
+    def _from_cursor(cursor, row):
+        """sqlite3 row factory that builds Student objects directly."""
+        return Student(*row)
     
     def to_dict(self):
         """Convert the student object to a dictionary."""
@@ -0,0 +1,239 @@
+"""
+Query instrumentation for the Fitness Tracker data layer.
+DatabaseManager reports every statement it runs here. Statements are
+grouped by shape (the SQL with literals and placeholder lists collapsed)
+with call counts, latency percentiles, rows and callers, estimated from a
+random sample of the statements. Statements slower
+than config.SLOW_QUERY_MS go to a slow-query log together with their
+EXPLAIN QUERY PLAN.
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+# Add the parent directory to path to import config
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+
+APP_DIR = Path(__file__).parent.parent
+DATABASE_DIR = str(Path(__file__).parent)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+_MAX_SHAPES = 4096
+
+
+def normalize(query):
+    """The shape of a statement: whitespace collapsed, literals and placeholder lists replaced."""
+    shape = _WHITESPACE.sub(" ", query).strip()
+    shape = _STRING_LITERAL.sub("?", shape)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    return _PLACEHOLDER_LIST.sub("(?, ...)", shape)
+
+
+class ShapeStats:
+    """Running totals and a window of recent durations for one statement shape."""
+
+    __slots__ = ("shape", "params", "calls", "total", "max", "rows", "samples", "callers")
+
+    def __init__(self, shape, params, sample_size):
+        self.shape = shape
+        self.params = params
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=sample_size)
+        self.callers = {}
+
+
+class QueryStats:
+    """
+    Process-wide statement statistics and slow-query log.
+
+    record() is called by DatabaseManager after each statement. Only a
+    sample_rate fraction of the statements, drawn at random, is counted
+    into the shape statistics (calls, time and rows are scaled back up in
+    summary()); the others cost a comparison and a random draw. Slow
+    statements are always logged. For a counted statement the shape
+    statistics of its raw SQL string are looked up once and cached, and
+    the caller (which needs a walk up the stack) is taken from every
+    caller_every-th counted call of a shape and from every slow one.
+    EXPLAIN QUERY PLAN runs only for slow statements, once per shape.
+    """
+
+    def __init__(self, explain=None, enabled=None, slow_ms=None, sample_size=None, caller_every=None,
+                 log_path=None, sample_rate=None):
+        # explain(query, params) returns the plan detail lines for a statement
+        self.explain = explain
+        self.enabled = config.QUERY_STATS_ENABLED if enabled is None else enabled
+        self.slow_ms = config.SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self.sample_size = sample_size or config.QUERY_STATS_SAMPLES
+        self.caller_every = caller_every or config.QUERY_STATS_CALLER_EVERY
+        self.sample_rate = config.QUERY_STATS_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.log_path = config.SLOW_QUERY_LOG_PATH if log_path is None else log_path
+        self._by_query = {}  # raw SQL -> ShapeStats of its shape
+        self._paths = {}  # source filename -> app-relative path, None for the database layer
+        self._stats = {}  # shape -> ShapeStats
+        self._plans = {}  # shape -> EXPLAIN QUERY PLAN lines
+        self._slow = deque(maxlen=config.SLOW_QUERY_LOG_SIZE)
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._random = random.random
+
+    def _register(self, query, params):
+        """Find or create the statistics for a raw SQL string's shape."""
+        shape = normalize(query)
+        # params is None for executemany, where the placeholders are counted instead
+        param_count = len(params) if params is not None else query.count("?")
+        with self._lock:
+            stats = self._stats.get(shape)
+            if stats is None:
+                stats = self._stats[shape] = ShapeStats(shape, param_count, self.sample_size)
+            if len(self._by_query) >= _MAX_SHAPES:
+                self._by_query.clear()
+            self._by_query[query] = stats
+        return stats
+
+    def _caller(self):
+        """
+        (path, function) of the innermost frame outside the database layer:
+        the page, service or script that issued the statement.
+        """
+        frame = sys._getframe(3)  # skip this method, record() and the DatabaseManager method
+        paths = self._paths
+        while frame is not None:
+            code = frame.f_code
+            # Keyed by filename: strings cache their hash, code objects don't
+            path = paths.get(code.co_filename, False)
+            if path is False:
+                path = paths[code.co_filename] = self._path(code.co_filename)
+            if path is not None:
+                return path, code.co_name
+            frame = frame.f_back
+        return "unknown", "<module>"
+
+    @staticmethod
+    def _path(filename):
+        """A source file's path relative to the app, or None for the database layer."""
+        if filename.startswith(DATABASE_DIR):
+            return None
+        try:
+            return Path(filename).relative_to(APP_DIR).as_posix()
+        except ValueError:
+            return Path(filename).name
+
+    @staticmethod
+    def _label(caller):
+        path, function = caller
+        return path if function == "<module>" else f"{path}:{function}"
+
+    def record(self, query, params, elapsed, rows):
+        """
+        Count one statement, if it is drawn into the sample: elapsed seconds,
+        rows returned (or changed; None when unknown). Slow statements are
+        also logged with their plan.
+        """
+        slow = elapsed * 1000 >= self.slow_ms
+        counted = self._random() < self.sample_rate
+        if not (counted or slow):
+            return
+        stats = self._by_query.get(query) or self._register(query, params)
+        if elapsed > stats.max:
+            stats.max = elapsed
+        if counted:
+            # No lock here: it would double the cost of recording. Threads
+            # racing on the same shape can at worst drop an increment, which
+            # is fine for monitoring figures
+            stats.calls += 1
+            stats.total += elapsed
+            stats.samples.append(elapsed)
+            if rows:
+                stats.rows += rows
+
+        if slow or (counted and (stats.calls % self.caller_every == 1 or self.caller_every == 1)):
+            caller = self._caller()
+            callers = stats.callers
+            callers[caller] = callers.get(caller, 0) + 1
+            if slow:
+                self._log_slow(query, stats, params, elapsed, rows, caller)
+
+    def _log_slow(self, query, stats, params, elapsed, rows, caller):
+        shape, param_count = stats.shape, stats.params
+        plan = self._plans.get(shape)
+        if plan is None and self.explain is not None:
+            keyword = shape.split(" ", 1)[0].upper()
+            if keyword in _EXPLAINABLE and (params is not None or not param_count):
+                try:
+                    plan = self.explain(query, params)
+                except Exception as e:
+                    plan = [f"EXPLAIN failed: {e}"]
+                self._plans[shape] = plan
+        entry = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "ms": round(elapsed * 1000, 2),
+            "shape": shape,
+            "params": param_count,
+            "rows": rows,
+            "caller": self._label(caller),
+            "plan": plan or [],
+        }
+        self._slow.append(entry)
+        if self.log_path:
+            with self._log_lock:
+                os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as log:
+                    log.write(json.dumps(entry) + "\n")
+
+    def summary(self):
+        """
+        Per-shape statistics, most total time first: calls, total/mean/max
+        and p50/p95/p99 (over the last sample_size counted calls) in
+        milliseconds, average rows, parameter count and the top callers (of
+        the calls whose caller was recorded). Calls and total time are
+        estimates: the counted figures divided by sample_rate.
+        """
+        scale = 1 / self.sample_rate
+        with self._lock:
+            snapshot = [(shape, stats.calls, stats.total, stats.max, stats.rows, stats.params,
+                         sorted(stats.samples), sorted(stats.callers.items(), key=lambda item: -item[1])[:3])
+                        for shape, stats in self._stats.items() if stats.calls]
+
+        def percentile(ordered, fraction):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+        summary = [{
+            "shape": shape,
+            "calls": round(calls * scale),
+            "total_ms": total * scale * 1000,
+            "mean_ms": total / calls * 1000,
+            "p50_ms": percentile(ordered, 0.50),
+            "p95_ms": percentile(ordered, 0.95),
+            "p99_ms": percentile(ordered, 0.99),
+            "max_ms": max_elapsed * 1000,
+            "rows": rows / calls,
+            "params": params,
+            "callers": ", ".join(f"{self._label(caller)} ({count})" for caller, count in callers),
+        } for shape, calls, total, max_elapsed, rows, params, ordered, callers in snapshot]
+        return sorted(summary, key=lambda row: row["total_ms"], reverse=True)
+
+    def slow_queries(self):
+        """The most recent slow statements, newest first."""
+        return list(reversed(self._slow))
+
+    def reset(self):
+        """Forget all statistics, cached plans and in-memory slow entries (the log file is kept)."""
+        with self._lock:
+            self._stats.clear()
+            self._by_query.clear()
+            self._plans.clear()
+            self._slow.clear()
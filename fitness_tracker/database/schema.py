@@ -2,11 +2,48 @@
 Database schema definitions for the Fitness Tracker application.
 Defines table structures and creation methods.
 """
+import logging
+import sys
+from pathlib import Path
+
 from .db_manager import db_manager
+from .models.activity import Activity
+from .models.student import Student
+
+# Add the parent directory to path to import config
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+
+logger = logging.getLogger(__name__)
 
 class Schema:
     """Class to handle database schema creation and migrations."""
     
+    # Indexes managed by the application: name -> (table, columns, unique)
+    INDEXES = {
+        # One row per student per day; also serves get_by_student's student
+        # filter, date range and date ordering
+        "ux_activity_student_date": ("activity", "student_id, date", True),
+        "idx_students_name": ("students", "name", False),
+    }
+    
+    # Queries issued by the models, checked with EXPLAIN QUERY PLAN at startup.
+    # Each entry is (label, sql, sample params, index expected to serve it);
+    # the SQL comes from the models so the check follows their changes.
+    MODEL_QUERIES = [
+        (
+            "Activity.get_by_student",
+            *Activity._student_query(0, date_from="2000-01-01", date_to="2000-12-31"),
+            "ux_activity_student_date",
+        ),
+        (
+            "Student.get_all",
+            Student.ALL_QUERY,
+            (),
+            "idx_students_name",
+        ),
+    ]
+    
     @staticmethod
     def create_tables():
         """Create the necessary tables if they don't exist."""
@@ -70,6 +107,77 @@ class Schema:
         # Commit the changes
         db_manager.commit()
     
+    @staticmethod
+    def create_index(index_name):
+        """Create one of the managed indexes if it doesn't exist."""
+        table_name, columns, unique = Schema.INDEXES[index_name]
+        db_manager.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} "
+            f"ON {table_name} ({columns})"
+        )
+        db_manager.commit()
+    
+    @staticmethod
+    def create_indexes():
+        """Create all managed indexes that don't exist yet."""
+        for index_name in Schema.INDEXES:
+            Schema.create_index(index_name)
+    
+    @staticmethod
+    def explain(query, params=()):
+        """Return the EXPLAIN QUERY PLAN detail lines for a query."""
+        rows = db_manager.fetchall(f"EXPLAIN QUERY PLAN {query}", params)
+        return [row["detail"] for row in rows]
+    
+    @staticmethod
+    def check_indexes(create_missing=False):
+        """
+        Index advisor: run EXPLAIN QUERY PLAN over the model queries and report
+        any that scan a table or sort without their managed index.
+        Missing indexes are created when create_missing is True.
+        """
+        report = []
+        for label, query, params, index_name in Schema.MODEL_QUERIES:
+            plan = Schema.explain(query, params)
+            uses_index = any(index_name in detail for detail in plan)
+            created = False
+            
+            if not uses_index and create_missing:
+                Schema.create_index(index_name)
+                plan = Schema.explain(query, params)
+                uses_index = any(index_name in detail for detail in plan)
+                created = True
+            
+            if not uses_index:
+                logger.warning("%s does not use %s: %s", label, index_name, "; ".join(plan))
+            elif created:
+                logger.info("Created missing index %s for %s", index_name, label)
+            
+            report.append({
+                "query": label,
+                "index": index_name,
+                "uses_index": uses_index,
+                "created": created,
+                "plan": plan,
+            })
+        return report
+    
+    @staticmethod
+    def get_metadata(key, default=None):
+        """Read an app-level value from the metadata table."""
+        row = db_manager.fetchone("SELECT value FROM metadata WHERE key=?", (key,))
+        return row["value"] if row else default
+    
+    @staticmethod
+    def set_metadata(key, value):
+        """Write an app-level value to the metadata table."""
+        db_manager.execute(
+            """INSERT INTO metadata (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=CURRENT_TIMESTAMP""",
+            (key, str(value))
+        )
+        db_manager.commit()
+    
     @staticmethod
     def add_column_if_not_exists(table_name, column_name, column_type):
         """
@@ -88,4 +196,8 @@ class Schema:
 
 # Initialize the schema
 def init_schema():
+    from .migrations import run_migrations
+    
     Schema.create_tables()
+    run_migrations()
+    Schema.check_indexes(create_missing=config.AUTO_CREATE_INDEXES)
@@ -0,0 +1,107 @@
+"""
+One-time startup for the Fitness Tracker database layer.
+
+Streamlit reruns a page script on every interaction, so anything done at
+the top of app.py runs again and again. startup() instead does its work
+once per process (and again only if config.DB_PATH changes): it creates
+the tables, applies migrations, checks indexes, warms the OS page cache
+with the database file and compiles the hot statements on the pooled
+connections, then records how long that took.
+"""
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from .db_manager import db_manager
+from .schema import Schema, init_schema
+
+# Add the parent directory to path to import config
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+
+logger = logging.getLogger(__name__)
+
+STARTUP_KEY = "last_startup"
+
+_lock = threading.Lock()
+_completed = {}  # database path -> startup stats
+
+
+def warm_page_cache(db_path, max_bytes):
+    """
+    Read up to max_bytes of the database file sequentially so its pages sit
+    in the OS cache (which mmap'd connections read directly). Returns the
+    number of bytes read.
+    """
+    if not os.path.isfile(db_path):
+        return 0
+    read = 0
+    with open(db_path, "rb", buffering=0) as db_file:
+        while read < max_bytes:
+            chunk = db_file.read(min(1024 * 1024, max_bytes - read))
+            if not chunk:
+                break
+            read += len(chunk)
+    return read
+
+
+def startup(force=False):
+    """
+    Run the startup steps for the current database unless this process
+    already has (or force is set). Safe to call from every page: after the
+    first call it returns the recorded stats straight away.
+    """
+    db_path = config.DB_PATH
+    if db_path in _completed and not force:
+        return _completed[db_path]
+
+    with _lock:
+        if db_path in _completed and not force:
+            return _completed[db_path]
+
+        steps = {}
+        start = time.perf_counter()
+
+        step_start = time.perf_counter()
+        init_schema()
+        steps["schema_ms"] = round((time.perf_counter() - step_start) * 1000, 1)
+
+        step_start = time.perf_counter()
+        cached_bytes = warm_page_cache(db_path, config.STARTUP_WARM_CACHE_MB * 1024 * 1024)
+        steps["page_cache_ms"] = round((time.perf_counter() - step_start) * 1000, 1)
+
+        step_start = time.perf_counter()
+        db_manager.prepare((query, params) for _, query, params, _ in Schema.MODEL_QUERIES)
+        steps["statements_ms"] = round((time.perf_counter() - step_start) * 1000, 1)
+
+        stats = {
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "steps": steps,
+            "cached_bytes": cached_bytes,
+            "statements": len(Schema.MODEL_QUERIES),
+            "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        Schema.set_metadata(STARTUP_KEY, json.dumps(stats))
+        logger.info("Startup finished in %.1f ms (%s)", stats["duration_ms"],
+                    ", ".join(f"{name} {ms}" for name, ms in steps.items()))
+
+        if not _completed:
+            atexit.register(db_manager.close)
+        _completed[db_path] = stats
+    return stats
+
+
+def get_startup_stats():
+    """Stats of this process's startup for the current database, or None if it hasn't run."""
+    return _completed.get(config.DB_PATH)
+
+
+def get_last_startup():
+    """Stats of the most recent startup recorded in the database by any process."""
+    value = Schema.get_metadata(STARTUP_KEY)
+    return json.loads(value) if value else None
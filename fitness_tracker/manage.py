@@ -0,0 +1,192 @@
+"""
+Maintenance commands for the Fitness Tracker database.
+
+Usage:
+    python manage.py rebuild-rollups [--student ID ...] [--from DATE] [--to DATE]
+    python manage.py evaluate-achievements [--student ID ...]
+    python manage.py generate-data [--students N] [--days N] [--seed N] [--end DATE]
+    python manage.py export --format csv|jsonl|parquet --output FILE [--student ID ...]
+                            [--grade G ...] [--from DATE] [--to DATE]
+    python manage.py import FILE [--format FORMAT] [--student ID|NAME] [--units metric|imperial]
+                                 [--keep-existing] [--no-achievements] [--rejects FILE] [--workers N]
+    python manage.py import-intraday FILE [--chunk-size N]
+"""
+import argparse
+import csv
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from database.schema import init_schema
+from database.models.intraday import IntradaySeries
+from database.models.rollup import ActivityRollup
+from services.achievement_service import AchievementService
+from services.export_service import ExportService
+from services.import_service import ImportService
+from utils.lazy_import import lazy_import
+from utils.synthetic_data import load_synthetic_data
+
+pd = lazy_import("pandas")
+
+
+def rebuild_rollups(args):
+    """Recompute the week/month activity rollups from the activity table."""
+    start = time.perf_counter()
+    written = ActivityRollup.rebuild(args.student or None, args.date_from, args.date_to)
+    print(f"Rebuilt {written:,} rollup rows in {time.perf_counter() - start:.2f}s")
+
+
+def evaluate_achievements(args):
+    """Re-evaluate every achievement rule against the stored activity and goals."""
+    start = time.perf_counter()
+    unlocked = AchievementService.backfill(
+        args.student or None,
+        progress=lambda done, total: print(f"  {done:,}/{total:,} students", end="\r")
+    )
+    print(f"Unlocked {unlocked:,} achievements in {time.perf_counter() - start:.2f}s")
+
+
+def generate_data(args):
+    """Add a synthetic population of students and daily activity (deterministic per seed)."""
+    result = load_synthetic_data(
+        args.students, args.days, args.seed,
+        end_date=date.fromisoformat(args.end) if args.end else None,
+        progress=lambda done, total: print(f"  {done:,}/{total:,} students", end="\r")
+    )
+    print(f"Added {result['students']:,} students and {result['activities']:,} activities "
+          f"in {result['seconds']:.2f}s ({result['activities'] / result['seconds']:,.0f} rows/s)")
+
+
+def export(args):
+    """Stream activity data to a file in CSV, JSON Lines or Parquet format."""
+    start = time.perf_counter()
+    with open(args.output, "wb") as output:
+        written = ExportService.write(output, args.format, student_ids=args.student, grades=args.grade,
+                                      date_from=args.date_from, date_to=args.date_to)
+    print(f"Wrote {written / 1e6:,.1f} MB to {args.output} in {time.perf_counter() - start:.2f}s")
+
+
+def import_data(args):
+    """Bulk import activity from CSV, JSON Lines or a Fitbit, Google Fit or Apple Health export."""
+    fmt = args.format
+    if not fmt:
+        with open(args.file, "rb") as file:
+            fmt = ImportService.detect_format(args.file, file.read(4096))
+    student = int(args.student) if args.student and args.student.isdigit() else args.student
+
+    def progress(records, fraction):
+        share = f" ({fraction:.0%})" if fraction is not None else ""
+        print(f"  {records:,} records{share}", end="\r")
+
+    try:
+        result = ImportService.import_file(
+            args.file, fmt, student=student, units=args.units, overwrite=not args.keep_existing,
+            evaluate_achievements=not args.no_achievements, progress=progress, workers=args.workers
+        )
+    except ValueError as e:
+        sys.exit(f"Import failed: {e}")
+    print(f"Imported {result['imported']:,} of {result['records']:,} {fmt} records for "
+          f"{result['students']:,} students in {result['seconds']:.2f}s "
+          f"({result['records'] / max(result['seconds'], 1e-9):,.0f} rows/s)")
+    if result["unlocked"]:
+        print(f"Unlocked {result['unlocked']:,} achievements")
+    if result["rejected"]:
+        print(f"Rejected {result['rejected']:,} records", file=sys.stderr)
+        for error in result["errors"][:10]:
+            print(f"  record {error['row']:,}: {error['error']}", file=sys.stderr)
+        if args.rejects:
+            with open(args.rejects, "w", newline="") as rejects:
+                writer = csv.DictWriter(rejects, fieldnames=("row", "error"))
+                writer.writeheader()
+                writer.writerows(result["errors"])
+            print(f"Wrote {len(result['errors']):,} rejects to {args.rejects}", file=sys.stderr)
+
+
+def import_intraday(args):
+    """Load minute-level samples from a CSV with student_id, timestamp, steps and/or heart_rate columns."""
+    start = time.perf_counter()
+    totals = {"samples": 0, "dropped": 0}
+    errors = []
+    for chunk in pd.read_csv(args.file, chunksize=args.chunk_size):
+        metrics = [metric for metric in IntradaySeries.METRICS if metric in chunk.columns]
+        if "student_id" not in chunk.columns or "timestamp" not in chunk.columns or not metrics:
+            sys.exit("Import failed: the file needs student_id, timestamp and steps or heart_rate columns")
+        for metric in metrics:
+            result = IntradaySeries.ingest(metric, chunk["student_id"].to_numpy(),
+                                           chunk["timestamp"], chunk[metric].to_numpy())
+            totals["samples"] += result["samples"]
+            totals["dropped"] += result["dropped"]
+            errors.extend(dict(error, metric=metric) for error in result["errors"])
+        print(f"  {totals['samples']:,} samples", end="\r")
+    print(f"Stored {totals['samples']:,} samples ({totals['dropped']:,} dropped, including unknown "
+          f"students) in {time.perf_counter() - start:.2f}s")
+    if errors:
+        print(f"{len(errors):,} daily activity rows not updated", file=sys.stderr)
+        for error in errors[:10]:
+            print(f"  student {error['student_id']} {error['date']} {error['metric']}: {error['error']}",
+                  file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fitness Tracker maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-rollups", help=rebuild_rollups.__doc__)
+    rebuild.add_argument("--student", type=int, action="append",
+                         help="Only rebuild this student (repeatable)")
+    rebuild.add_argument("--from", dest="date_from", help="First date (YYYY-MM-DD) to rebuild")
+    rebuild.add_argument("--to", dest="date_to", help="Last date (YYYY-MM-DD) to rebuild")
+    rebuild.set_defaults(handler=rebuild_rollups)
+    
+    evaluate = commands.add_parser("evaluate-achievements", help=evaluate_achievements.__doc__)
+    evaluate.add_argument("--student", type=int, action="append",
+                          help="Only evaluate this student (repeatable)")
+    evaluate.set_defaults(handler=evaluate_achievements)
+
+    generate = commands.add_parser("generate-data", help=generate_data.__doc__)
+    generate.add_argument("--students", type=int, default=1000, help="Number of students to add")
+    generate.add_argument("--days", type=int, default=365, help="Days of activity per student")
+    generate.add_argument("--seed", type=int, default=0, help="Random seed")
+    generate.add_argument("--end", help="Last activity date (YYYY-MM-DD, default today)")
+    generate.set_defaults(handler=generate_data)
+
+    export_data = commands.add_parser("export", help=export.__doc__)
+    export_data.add_argument("--format", choices=ExportService.available_formats(), default="csv")
+    export_data.add_argument("--output", required=True, help="File to write")
+    export_data.add_argument("--student", type=int, action="append",
+                             help="Only export this student (repeatable)")
+    export_data.add_argument("--grade", action="append", help="Only export this grade (repeatable)")
+    export_data.add_argument("--from", dest="date_from", help="First date (YYYY-MM-DD) to export")
+    export_data.add_argument("--to", dest="date_to", help="Last date (YYYY-MM-DD) to export")
+    export_data.set_defaults(handler=export)
+
+    import_cmd = commands.add_parser("import", help=import_data.__doc__)
+    import_cmd.add_argument("file", help="File to import")
+    import_cmd.add_argument("--format", choices=list(ImportService.FORMATS),
+                            help="File format (default: detected from the file)")
+    import_cmd.add_argument("--student", help="Student id or name (required for wearable exports)")
+    import_cmd.add_argument("--units", choices=("metric", "imperial"), default="metric",
+                            help="Units of distance and weight columns without a unit")
+    import_cmd.add_argument("--keep-existing", action="store_true",
+                            help="Skip days that already have activity instead of updating them")
+    import_cmd.add_argument("--no-achievements", action="store_true",
+                            help="Don't re-evaluate achievements after the import")
+    import_cmd.add_argument("--rejects", help="Write rejected records (row, error) to this CSV file")
+    import_cmd.add_argument("--workers", type=int,
+                            help="Parsing processes for large CSV/JSON Lines files (default: CPU count, up to 8)")
+    import_cmd.set_defaults(handler=import_data)
+
+    intraday = commands.add_parser("import-intraday", help=import_intraday.__doc__)
+    intraday.add_argument("file", help="CSV file to import")
+    intraday.add_argument("--chunk-size", type=int, default=500000, help="Rows read at a time")
+    intraday.set_defaults(handler=import_intraday)
+
+    args = parser.parse_args(argv)
+    init_schema()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
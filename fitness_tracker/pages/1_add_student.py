@@ -8,9 +8,17 @@ from pathlib import Path
 # Add parent directory to path to import services
 sys.path.append(str(Path(__file__).parent.parent))
 from services.student_service import StudentService
+from database.startup import startup
+from utils.profiler import start_page
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
 
 st.set_page_config(page_title="Add Student", page_icon="➕")
 
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Add Student")
+
 st.title("Add Student")
 st.write("Enter the student details below to add them to the system.")
 
@@ -78,4 +86,6 @@ st.markdown("""
 <div style="background-color:#F0F2F6; padding: 10px; border-radius: 5px;">
 <strong>💡 Tip:</strong> On mobile devices, scroll horizontally to see all student data in the table.
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+profiler.finish()
@@ -10,9 +10,19 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 from services.student_service import StudentService
 from services.activity_service import ActivityService
+from services.leaderboard_service import LeaderboardService
+from services.achievement_service import ACHIEVEMENTS, AchievementService
+from database.startup import startup
+from utils.profiler import start_page
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
 
 st.set_page_config(page_title="Log Activity", page_icon="📝")
 
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Log Activity")
+
 st.title("Log Activity")
 st.write("Record fitness activities for students.")
 
@@ -26,7 +36,7 @@ else:
     # Create a form for better mobile experience
     with st.form("log_activity_form"):
         # Student selection
-        student_options = StudentService.get_student_options_dict()
+        student_options = StudentService.get_student_options_dict(students)
         selected_student = st.selectbox("Select Student", list(student_options.keys()))
         student_id = student_options[selected_student]
         
@@ -48,6 +58,7 @@ else:
         submitted = st.form_submit_button("Log Activity")
         
         if submitted:
+            unlocked_before = set(AchievementService.get_unlocked(student_id))
             success, message = ActivityService.log_activity(
                 student_id, str(activity_date), steps, active_minutes, 
                 distance, calories, heart_rate, weight_kg
@@ -57,22 +68,18 @@ else:
                 
                 # Add gamification points based on activity level
                 if 'points' in st.session_state:
-                    # Award points based on steps
-                    if steps > 10000:
-                        points_earned = 10
-                    elif steps > 5000:
-                        points_earned = 5
-                    else:
-                        points_earned = 2
+                    # Points are persisted with the activity; show what was earned
+                    points_earned = LeaderboardService.activity_points(steps)
+                    st.session_state.current_student_id = student_id
                     
                     st.session_state.points += points_earned
                     st.success(f"You earned {points_earned} points for logging activity!")
-                    
-                    # Check for achievements
-                    if steps > 10000 and 'step_master' not in st.session_state.achievements:
-                        st.session_state.achievements.append('step_master')
+                
+                # Achievements are unlocked server-side as the activity is saved
+                for achievement_id in AchievementService.get_unlocked(student_id):
+                    if achievement_id not in unlocked_before:
                         st.balloons()
-                        st.success("🏆 Achievement Unlocked: Step Master!")
+                        st.success(f"🏆 Achievement Unlocked: {ACHIEVEMENTS[achievement_id]['name']}!")
             else:
                 st.error(message)
 
@@ -80,7 +87,7 @@ else:
     if 'selected_student' in locals() and student_id:
         st.subheader(f"Recent Activity for {selected_student.split(' (ID')[0]}")
         
-        activities = ActivityService.get_activities_by_student(student_id, limit=5)
+        activities = ActivityService.get_activity_batch(student_id, limit=5)
         
         if activities:
             # Convert to a list of dictionaries for display
@@ -122,4 +129,6 @@ else:
             </div>
             """, unsafe_allow_html=True)
         else:
-            st.info("No activity data available for this student yet.")
\ No newline at end of file
+            st.info("No activity data available for this student yet.")
+
+profiler.finish()
@@ -3,20 +3,31 @@ Enhanced Dashboard page with advanced analytics and visualizations.
 """
 import streamlit as st
 import sys
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import date, timedelta
 from pathlib import Path
 
 # Add parent directory to path to import services
 sys.path.append(str(Path(__file__).parent.parent))
 from services.student_service import StudentService
 from services.activity_service import ActivityService
+from services.analytics_context import StudentAnalyticsContext
 from services.analytics_service import AnalyticsService
+from services.leaderboard_service import LeaderboardService
+from database.startup import startup
+from utils.profiler import start_page
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
 
 st.set_page_config(page_title="Dashboard", page_icon="📊", layout="wide")
 
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Dashboard")
+
 st.title("Student Fitness Dashboard")
 st.write("Visualize and analyze student fitness data with interactive charts.")
 
@@ -26,7 +37,7 @@ if not students:
     st.page_link("1_Add_Student", label="Go to Add Student", icon="➕")
 else:
     # Student selection with tabs for multiple students
-    student_options = StudentService.get_student_options_dict()
+    student_options = StudentService.get_student_options_dict(students)
     col1, col2 = st.columns([3, 1])
     
     with col1:
@@ -43,20 +54,17 @@ else:
         else:
             days = 90
     
-    # Get student metrics
-    student_data = AnalyticsService.get_student_metrics(student_id, days=days)
+    # Get student metrics, loaded once for the whole page
+    context = StudentAnalyticsContext(student_id, days=days)
     
-    if not student_data:
+    if not context.exists:
         st.error("Failed to load student data.")
     else:
-        student = student_data["student"]
-        metrics = student_data["metrics"]
-        activity_data = student_data["activity_data"]
+        student = context.student
+        metrics = context.metrics
         
-        # Convert to DataFrame for easier manipulation
-        df_activity = pd.DataFrame(activity_data)
-        if len(df_activity) > 0:
-            df_activity["date"] = pd.to_datetime(df_activity["date"])
+        # Activity comes back as a DataFrame with parsed dates
+        df_activity = context.activity_frame
         
         # Student profile and key metrics section
         st.markdown("## Student Profile")
@@ -91,30 +99,23 @@ else:
             # Activity streak and points
             st.markdown("### Engagement")
             
-            # Calculate streak (consecutive days with activity)
-            streak = 0
-            if len(df_activity) > 0:
-                # Sort by date descending
-                df_sorted = df_activity.sort_values("date", ascending=False)
-                
-                # Get today and previous days
-                today = date.today()
-                
-                # Check for consecutive days
-                current_date = today
-                for _, row in df_sorted.iterrows():
-                    activity_date = row["date"].date()
-                    # If this is the next consecutive day
-                    if activity_date == current_date or activity_date == current_date - timedelta(days=1):
-                        if activity_date != current_date:  # Only move the date pointer if it's different
-                            current_date = activity_date
-                        streak += 1
-                    else:
-                        break
+            # Streaks over the student's whole history, not just this window
+            streaks = context.streaks
             
-            st.metric(label="Activity Streak", value=f"{streak} days")
-            # Display points from session state
-            st.metric(label="Total Points", value=st.session_state.points)
+            st.metric(
+                label="Activity Streak",
+                value=f"{streaks['current']} days",
+                delta=f"Best: {streaks['longest']} days",
+                delta_color="off"
+            )
+            # Persisted points and where they place the student
+            standing = LeaderboardService.get_rank(student_id)
+            st.metric(
+                label="Total Points",
+                value=standing['points'],
+                delta=f"Rank #{standing['rank']:,} of {standing['total']:,}",
+                delta_color="off"
+            )
         
         # Key metrics section
         st.markdown("## Key Metrics")
@@ -161,7 +162,7 @@ else:
             with tab1:
                 # Steps visualization with target line
                 fig_steps = px.line(
-                    df_activity.sort_values("date"), 
+                    context.daily, 
                     x="date", 
                     y="steps",
                     title="Daily Steps Over Time",
@@ -217,7 +218,7 @@ else:
                 # Weight trend
                 if "weight_kg" in df_activity and df_activity["weight_kg"].notnull().any():
                     fig_weight = px.line(
-                        df_activity.sort_values("date"),
+                        context.daily,
                         x="date",
                         y="weight_kg",
                         title="Weight Over Time",
@@ -254,7 +255,7 @@ else:
             with tab3:
                 # Active minutes visualization
                 fig_active = px.bar(
-                    df_activity.sort_values("date"),
+                    context.daily,
                     x="date",
                     y="active_minutes",
                     title="Active Minutes Per Day",
@@ -298,10 +299,22 @@ else:
                     x="active_minutes",
                     y="calories",
                     title="Active Minutes vs. Calories Burned",
-                    labels={"active_minutes": "Active Minutes", "calories": "Calories Burned"},
-                    trendline="ols"  # Add trend line
+                    labels={"active_minutes": "Active Minutes", "calories": "Calories Burned"}
                 )
                 
+                # Add trend line (least squares fit)
+                fit = AnalyticsService.linear_fit(df_activity["active_minutes"], df_activity["calories"])
+                if fit:
+                    slope, intercept = fit
+                    x_range = [df_activity["active_minutes"].min(), df_activity["active_minutes"].max()]
+                    fig_scatter.add_trace(go.Scatter(
+                        x=x_range,
+                        y=[slope * x + intercept for x in x_range],
+                        mode="lines",
+                        name="Trend",
+                        showlegend=False
+                    ))
+                
                 st.plotly_chart(fig_scatter, use_container_width=True)
             
             with tab4:
@@ -326,7 +339,7 @@ else:
                 # Generate the selected chart type
                 if chart_type == "Line":
                     custom_fig = px.line(
-                        df_activity.sort_values("date"),
+                        context.daily,
                         x="date",
                         y=y_axis,
                         title=f"{y_axis.replace('_', ' ').title()} Over Time",
@@ -334,14 +347,14 @@ else:
                     )
                 elif chart_type == "Bar":
                     custom_fig = px.bar(
-                        df_activity.sort_values("date"),
+                        context.daily,
                         x="date",
                         y=y_axis,
                         title=f"{y_axis.replace('_', ' ').title()} Per Day"
                     )
                 elif chart_type == "Scatter":
                     custom_fig = px.scatter(
-                        df_activity.sort_values("date"),
+                        context.daily,
                         x="date",
                         y=y_axis,
                         title=f"{y_axis.replace('_', ' ').title()} Distribution"
@@ -361,21 +374,13 @@ else:
         st.markdown("## Weekly Summary")
         
         if len(df_activity) > 0:
-            # Add week number to dataframe
-            df_activity["week"] = df_activity["date"].dt.isocalendar().week
-            
-            # Group by week
-            weekly_summary = df_activity.groupby("week").agg({
-                "steps": "sum",
-                "active_minutes": "sum",
-                "distance": "sum",
-                "calories": "sum"
-            }).reset_index()
+            # Weekly totals come pre-aggregated from the rollup tables
+            weekly_summary = context.period_summary("week")
             
             # Format the summary for display
             weekly_summary_display = pd.DataFrame({
-                "Week": weekly_summary["week"],
-                "Total Steps": weekly_summary["steps"].apply(lambda x: f"{x:,}"),
+                "Week": weekly_summary["period_start"].dt.isocalendar().week,
+                "Total Steps": weekly_summary["steps"].apply(lambda x: f"{x:,.0f}"),
                 "Active Minutes": weekly_summary["active_minutes"],
                 "Distance (km)": weekly_summary["distance"].round(2),
                 "Calories Burned": weekly_summary["calories"].round(1)
@@ -390,4 +395,6 @@ else:
         <div style="background-color:#F0F2F6; padding: 10px; border-radius: 5px; margin-top: 20px;">
         <strong>💡 Tip:</strong> For the best experience on mobile, rotate your device to landscape mode when viewing charts and tables.
         </div>
-        """, unsafe_allow_html=True)
\ No newline at end of file
+        """, unsafe_allow_html=True)
+
+profiler.finish()
@@ -3,8 +3,6 @@ Goals page for setting and tracking student fitness goals.
 """
 import streamlit as st
 import sys
-import pandas as pd
-import plotly.express as px
 from pathlib import Path
 from datetime import datetime, timedelta
 
@@ -12,16 +10,46 @@ from datetime import datetime, timedelta
 sys.path.append(str(Path(__file__).parent.parent))
 from services.student_service import StudentService
 from services.activity_service import ActivityService
-from services.analytics_service import AnalyticsService
+from services.analytics_context import StudentAnalyticsContext
+from services.achievement_service import ACHIEVEMENTS
+from services.goal_service import GoalService
+from database.startup import startup
+from utils.profiler import start_page
+from utils.lazy_import import lazy_import
+
+px = lazy_import("plotly.express")
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
 
 st.set_page_config(page_title="Fitness Goals", page_icon="🎯")
 
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Fitness Goals")
+
 st.title("Fitness Goals")
 st.write("Set and track fitness goals for students.")
 
-# Initialize session state for goals
-if 'goals' not in st.session_state:
-    st.session_state.goals = {}
+
+def show_goal_saved(saved, message, unlocked, confirmation):
+    """
+    Report a goal save: the error if it failed, otherwise the confirmation,
+    the points for setting a goal and any achievements it unlocked.
+    Returns saved.
+    """
+    if not saved:
+        st.error(message)
+        return False
+    st.success(confirmation)
+    for achievement_id in unlocked:
+        st.balloons()
+        st.success(f"🏆 Achievement Unlocked: {ACHIEVEMENTS[achievement_id]['name']}!")
+    
+    # Add points for setting a goal
+    if 'points' in st.session_state:
+        st.session_state.points += 2
+        st.success("You earned 2 points for setting a goal!")
+    return True
 
 students = StudentService.get_all_students()
 if not students:
@@ -29,21 +57,23 @@ if not students:
     st.page_link("1_Add_Student", label="Go to Add Student", icon="➕")
 else:
     # Student selection
-    student_options = StudentService.get_student_options_dict()
+    student_options = StudentService.get_student_options_dict(students)
     selected_student = st.selectbox("Select Student", list(student_options.keys()))
     student_id = student_options[selected_student]
     student_name = selected_student.split(" (ID")[0]
+    
+    # Loaded once and shared by every tab below
+    context = StudentAnalyticsContext(student_id, days=30)
+    goals = GoalService.get_goals(student_id)
 
     # Create tabs for different goal types
-    tab1, tab2, tab3 = st.tabs(["Steps Goals", "Activity Goals", "Weight Goals"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Steps Goals", "Activity Goals", "Weight Goals", "School Report"])
     
     with tab1:
         st.subheader("Daily Steps Goal")
         
-        # Get current goal from session state or set default
-        current_steps_goal = 7500
-        if student_id in st.session_state.goals and 'steps' in st.session_state.goals[student_id]:
-            current_steps_goal = st.session_state.goals[student_id]['steps']
+        # Get the saved goal or the default
+        current_steps_goal = GoalService.get_daily_goal(student_id, 'steps', goals)
         
         # Set new goal
         col1, col2 = st.columns([3, 1])
@@ -52,32 +82,22 @@ else:
         
         with col2:
             if st.button("Set Steps Goal", key="set_steps"):
-                if student_id not in st.session_state.goals:
-                    st.session_state.goals[student_id] = {}
-                st.session_state.goals[student_id]['steps'] = new_steps_goal
-                st.success(f"Steps goal set to {new_steps_goal:,} steps per day")
-                
-                # Add points for setting a goal
-                if 'points' in st.session_state:
-                    st.session_state.points += 2
-                    st.success("You earned 2 points for setting a goal!")
+                saved, message, unlocked = GoalService.set_goal(student_id, 'steps', new_steps_goal)
+                if show_goal_saved(saved, message, unlocked,
+                                   f"Steps goal set to {new_steps_goal:,} steps per day"):
+                    goals['steps'] = new_steps_goal
         
-        # Get activity data for this student
-        student_data = AnalyticsService.get_student_metrics(student_id, days=30)
-        if student_data and student_data["activity_data"]:
-            activity_data = student_data["activity_data"]
-            df_activity = pd.DataFrame(activity_data)
+        if context.has_activity:
+            df_activity = context.daily
             if len(df_activity) > 0:
-                df_activity["date"] = pd.to_datetime(df_activity["date"])
-                df_activity = df_activity.sort_values("date")
                 
                 # Calculate goal achievement
-                if student_id in st.session_state.goals and 'steps' in st.session_state.goals[student_id]:
-                    goal = st.session_state.goals[student_id]['steps']
-                    df_activity["goal_achieved"] = df_activity["steps"] >= goal
-                    days_achieved = df_activity["goal_achieved"].sum()
-                    total_days = len(df_activity)
-                    achievement_rate = (days_achieved / total_days * 100) if total_days > 0 else 0
+                if goals['steps']:
+                    goal = goals['steps']
+                    attainment = context.goal_attainment("steps", goal)
+                    days_achieved = attainment["days_achieved"]
+                    total_days = attainment["total_days"]
+                    achievement_rate = attainment["rate"]
                     
                     # Display achievement metrics
                     st.metric(
@@ -110,7 +130,7 @@ else:
                         mode="markers+lines",
                         marker=dict(
                             size=10,
-                            color=df_activity["steps"].apply(lambda x: "green" if x >= goal else "red")
+                            color=attainment["frame"]["goal_achieved"].map({True: "green", False: "red"})
                         )
                     )
                     
@@ -118,14 +138,6 @@ else:
                     
                     # Progress bar 
                     st.progress(achievement_rate/100)
-                    
-                    # Achievement badges
-                    if achievement_rate >= 80 and 'steps_achiever' not in st.session_state.achievements:
-                        st.session_state.achievements.append('steps_achiever')
-                        st.balloons()
-                        st.success("🏆 Achievement Unlocked: Steps Champion!")
-                        # Add bonus points
-                        st.session_state.points += 20
                 else:
                     st.info("Set a steps goal above to track progress.")
             else:
@@ -136,10 +148,8 @@ else:
     with tab2:
         st.subheader("Active Minutes Goal")
         
-        # Get current goal from session state or set default
-        current_active_goal = 30
-        if student_id in st.session_state.goals and 'active_minutes' in st.session_state.goals[student_id]:
-            current_active_goal = st.session_state.goals[student_id]['active_minutes']
+        # Get the saved goal or the default
+        current_active_goal = GoalService.get_daily_goal(student_id, 'active_minutes', goals)
         
         # Set new goal
         col1, col2 = st.columns([3, 1])
@@ -148,31 +158,22 @@ else:
         
         with col2:
             if st.button("Set Activity Goal", key="set_active"):
-                if student_id not in st.session_state.goals:
-                    st.session_state.goals[student_id] = {}
-                st.session_state.goals[student_id]['active_minutes'] = new_active_goal
-                st.success(f"Activity goal set to {new_active_goal} minutes per day")
-                
-                # Add points for setting a goal
-                if 'points' in st.session_state:
-                    st.session_state.points += 2
+                saved, message, unlocked = GoalService.set_goal(student_id, 'active_minutes', new_active_goal)
+                if show_goal_saved(saved, message, unlocked,
+                                   f"Activity goal set to {new_active_goal} minutes per day"):
+                    goals['active_minutes'] = new_active_goal
         
-        # Get activity data for this student
-        student_data = AnalyticsService.get_student_metrics(student_id, days=30)
-        if student_data and student_data["activity_data"]:
-            activity_data = student_data["activity_data"]
-            df_activity = pd.DataFrame(activity_data)
+        if context.has_activity:
+            df_activity = context.daily
             if len(df_activity) > 0:
-                df_activity["date"] = pd.to_datetime(df_activity["date"])
-                df_activity = df_activity.sort_values("date")
                 
                 # Calculate goal achievement
-                if student_id in st.session_state.goals and 'active_minutes' in st.session_state.goals[student_id]:
-                    goal = st.session_state.goals[student_id]['active_minutes']
-                    df_activity["goal_achieved"] = df_activity["active_minutes"] >= goal
-                    days_achieved = df_activity["goal_achieved"].sum()
-                    total_days = len(df_activity)
-                    achievement_rate = (days_achieved / total_days * 100) if total_days > 0 else 0
+                if goals['active_minutes']:
+                    goal = goals['active_minutes']
+                    attainment = context.goal_attainment("active_minutes", goal)
+                    days_achieved = attainment["days_achieved"]
+                    total_days = attainment["total_days"]
+                    achievement_rate = attainment["rate"]
                     
                     # Display achievement metrics
                     st.metric(
@@ -202,22 +203,13 @@ else:
                     
                     # Color code bars based on goal achievement
                     fig.update_traces(
-                        marker_color=df_activity["active_minutes"].apply(
-                            lambda x: "green" if x >= goal else "red"
-                        )
+                        marker_color=attainment["frame"]["goal_achieved"].map({True: "green", False: "red"})
                     )
                     
                     st.plotly_chart(fig, use_container_width=True)
                     
                     # Progress bar
                     st.progress(achievement_rate/100)
-                    
-                    # Achievement badges
-                    if achievement_rate >= 80 and 'activity_achiever' not in st.session_state.achievements:
-                        st.session_state.achievements.append('activity_achiever')
-                        st.success("🏆 Achievement Unlocked: Active Lifestyle Master!")
-                        # Add bonus points
-                        st.session_state.points += 20
                 else:
                     st.info("Set an activity goal above to track progress.")
             else:
@@ -228,16 +220,12 @@ else:
     with tab3:
         st.subheader("Weight Goal")
         
-        # Get activity data for this student to find current weight
-        student_data = AnalyticsService.get_student_metrics(student_id, days=30)
         current_weight = None
-        if student_data and student_data["metrics"]["latest_weight"]:
-            current_weight = student_data["metrics"]["latest_weight"]
+        if context.exists and context.metrics["latest_weight"]:
+            current_weight = context.metrics["latest_weight"]
             
-            # Get current goal from session state or set default based on current weight
-            current_weight_goal = current_weight
-            if student_id in st.session_state.goals and 'weight' in st.session_state.goals[student_id]:
-                current_weight_goal = st.session_state.goals[student_id]['weight']
+            # Get the saved goal or default to the current weight
+            current_weight_goal = goals['weight_kg'] or current_weight
             
             # Set new goal
             col1, col2 = st.columns([3, 1])
@@ -252,43 +240,25 @@ else:
             
             with col2:
                 if st.button("Set Weight Goal", key="set_weight"):
-                    if student_id not in st.session_state.goals:
-                        st.session_state.goals[student_id] = {}
-                    st.session_state.goals[student_id]['weight'] = new_weight_goal
-                    st.success(f"Weight goal set to {new_weight_goal} kg")
-                    
-                    # Add points for setting a goal
-                    if 'points' in st.session_state:
-                        st.session_state.points += 2
+                    saved, message, unlocked = GoalService.set_goal(student_id, 'weight_kg', new_weight_goal)
+                    if show_goal_saved(saved, message, unlocked, f"Weight goal set to {new_weight_goal} kg"):
+                        goals['weight_kg'] = new_weight_goal
             
             # Weight goal tracking
-            if student_data and student_data["activity_data"]:
-                activity_data = student_data["activity_data"]
-                df_activity = pd.DataFrame(activity_data)
+            if context.has_activity:
+                df_activity = context.daily
                 if len(df_activity) > 0 and "weight_kg" in df_activity and df_activity["weight_kg"].notnull().any():
-                    df_activity["date"] = pd.to_datetime(df_activity["date"])
-                    df_activity = df_activity.sort_values("date")
                     
                     # Calculate goal progress
-                    if student_id in st.session_state.goals and 'weight' in st.session_state.goals[student_id]:
-                        goal = st.session_state.goals[student_id]['weight']
+                    if goals['weight_kg']:
+                        goal = goals['weight_kg']
                         
                         # Get starting and current weight
-                        starting_weight = df_activity["weight_kg"].iloc[0]
-                        current_weight = df_activity["weight_kg"].iloc[-1]
-                        
-                        # Calculate progress
-                        if starting_weight > goal:  # Weight loss goal
-                            total_to_lose = starting_weight - goal
-                            lost_so_far = starting_weight - current_weight
-                            progress_pct = (lost_so_far / total_to_lose * 100) if total_to_lose > 0 else 0
-                        else:  # Weight gain goal
-                            total_to_gain = goal - starting_weight
-                            gained_so_far = current_weight - starting_weight
-                            progress_pct = (gained_so_far / total_to_gain * 100) if total_to_gain > 0 else 0
+                        starting_weight = context.weights["weight_kg"].iloc[0]
+                        current_weight = context.weights["weight_kg"].iloc[-1]
                         
-                        # Cap progress at 100%
-                        progress_pct = min(progress_pct, 100)
+                        # Progress towards a loss or gain goal, capped at 100%
+                        progress_pct = float(GoalService.weight_progress(starting_weight, current_weight, goal))
                         
                         # Display progress metrics
                         col1, col2 = st.columns(2)
@@ -345,14 +315,7 @@ else:
                         
                         fig.update_traces(mode="markers+lines")
                         st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Achievement badges
-                        if progress_pct >= 50 and 'weight_progress' not in st.session_state.achievements:
-                            st.session_state.achievements.append('weight_progress')
-                            st.balloons()
-                            st.success("🏆 Achievement Unlocked: Halfway There!")
-                            # Add bonus points
-                            st.session_state.points += 15
+
                     else:
                         st.info("Set a weight goal above to track progress.")
                 else:
@@ -360,13 +323,43 @@ else:
         else:
             st.info("No weight data available. Log some activities with weight measurements to track goal progress.")
     
+    with tab4:
+        st.subheader("Who Hit Their Goal This Week")
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            report_metric = st.radio(
+                "Goal", ["steps", "active_minutes"], horizontal=True,
+                format_func=lambda metric: metric.replace("_", " ").title()
+            )
+        with col2:
+            show_report = st.toggle("Run report", value=False)
+        
+        # School-wide, so only computed on request
+        if show_report:
+            report = GoalService.get_weekly_report(report_metric)
+            report_students = report["students"]
+            st.metric(
+                label=f"Week of {report['week_start']:%b %d}",
+                value=f"{int(report_students['hit'].sum()):,} of {len(report_students):,} students",
+                delta=f"met their goal on {report['min_days']}+ days",
+                delta_color="off"
+            )
+            st.dataframe(
+                report_students.reset_index()[["name", "goal", "days_logged", "days_achieved", "average", "hit"]].rename(columns={
+                    "name": "Student", "goal": "Goal", "days_logged": "Days Logged",
+                    "days_achieved": "Days Achieved", "average": "Daily Average", "hit": "Hit Goal"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+    
     # Goal recommendations
     st.markdown("---")
     st.subheader("Goal Recommendations")
     
-    student_data = AnalyticsService.get_student_metrics(student_id, days=30)
-    if student_data and student_data["activity_data"]:
-        metrics = student_data["metrics"]
+    if context.has_activity:
+        metrics = context.metrics
         
         st.markdown("""
         <div style="background-color:#f0f2f6; padding:15px; border-radius:10px;">
@@ -404,6 +397,8 @@ else:
     # Mobile view tip
     st.markdown("""
     <div style="background-color:#F0F2F6; padding: 10px; border-radius: 5px; margin-top: 20px;">
-    <strong>💡 Tip:</strong> Goals are saved for your session and will persist as you navigate through the app.
+    <strong>💡 Tip:</strong> Goals are saved to the student's profile and are checked for achievements as activities are logged.
     </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """, unsafe_allow_html=True)
+
+profiler.finish()
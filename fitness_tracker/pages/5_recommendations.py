@@ -3,7 +3,6 @@ Personalized recommendations page for student fitness.
 """
 import streamlit as st
 import sys
-import pandas as pd
 from pathlib import Path
 from datetime import datetime, date, timedelta
 
@@ -11,10 +10,19 @@ from datetime import datetime, date, timedelta
 sys.path.append(str(Path(__file__).parent.parent))
 from services.student_service import StudentService
 from services.activity_service import ActivityService
-from services.analytics_service import AnalyticsService
+from services.analytics_context import StudentAnalyticsContext
+from services.goal_service import GoalService
+from database.startup import startup
+from utils.profiler import start_page
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
 
 st.set_page_config(page_title="Recommendations", page_icon="💡")
 
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Recommendations")
+
 st.title("Personalized Recommendations")
 st.write("Get tailored fitness recommendations based on activity history and goals.")
 
@@ -25,24 +33,22 @@ if not students:
     st.page_link("1_Add_Student", label="Go to Add Student", icon="➕")
 else:
     # Student selection
-    student_options = StudentService.get_student_options_dict()
+    student_options = StudentService.get_student_options_dict(students)
     selected_student = st.selectbox("Select Student", list(student_options.keys()))
     student_id = student_options[selected_student]
     student_name = selected_student.split(" (ID")[0]
     
     # Get student data
-    student_data = AnalyticsService.get_student_metrics(student_id, days=30)
+    context = StudentAnalyticsContext(student_id, days=30)
     
-    if student_data and student_data["activity_data"]:
+    if context.has_activity:
         # Extract data
-        student = student_data["student"]
-        metrics = student_data["metrics"]
-        activity_data = student_data["activity_data"]
+        student = context.student
+        metrics = context.metrics
         
-        # Convert to DataFrame for analysis
-        df_activity = pd.DataFrame(activity_data)
+        # Activity comes back as a DataFrame with parsed dates
+        df_activity = context.activity_frame.copy()
         if len(df_activity) > 0:
-            df_activity["date"] = pd.to_datetime(df_activity["date"])
             
             # Analyze activity patterns
             if len(df_activity) >= 5:
@@ -196,12 +202,12 @@ else:
                 # Next steps and challenges
                 st.subheader("Next Steps & Challenges")
                 
-                # Get current goals from session state if they exist
-                has_goals = False
-                if 'goals' in st.session_state and student_id in st.session_state.goals:
-                    has_goals = True
-                    steps_goal = st.session_state.goals[student_id].get('steps', 7500)
-                    active_min_goal = st.session_state.goals[student_id].get('active_minutes', 30)
+                # Goals set on the Goals page (defaults where only one is set)
+                goals = GoalService.get_goals(student_id)
+                has_goals = bool(goals['steps'] or goals['active_minutes'])
+                if has_goals:
+                    steps_goal = GoalService.get_daily_goal(student_id, 'steps', goals)
+                    active_min_goal = GoalService.get_daily_goal(student_id, 'active_minutes', goals)
                     
                     if metrics['avg_steps'] >= steps_goal and metrics['avg_active_minutes'] >= active_min_goal:
                         # Exceeding goals
@@ -298,4 +304,6 @@ else:
     <div style="background-color:#F0F2F6; padding: 10px; border-radius: 5px; margin-top: 20px;">
     <strong>💡 Tip:</strong> Recommendations are updated based on your most recent activity data.
     </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    """, unsafe_allow_html=True)
+
+profiler.finish()
@@ -3,86 +3,63 @@ Achievements and gamification features for the fitness tracker.
 """
 import streamlit as st
 import sys
-import pandas as pd
-import plotly.express as px
 from pathlib import Path
-from datetime import datetime, date, timedelta
-import random
 
 # Add parent directory to path to import services
 sys.path.append(str(Path(__file__).parent.parent))
 from services.student_service import StudentService
 from services.activity_service import ActivityService
 from services.analytics_service import AnalyticsService
+from services.leaderboard_service import LeaderboardService
+from services.achievement_service import ACHIEVEMENTS, AchievementService
+from database.startup import startup
+from utils.profiler import start_page
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
 
 st.set_page_config(page_title="Achievements", page_icon="🏆")
 
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Achievements")
+
 st.title("Achievements & Rewards")
 st.write("Track your progress and earn rewards for consistency and meeting goals.")
 
-# Initialize achievements if they don't exist
-if 'achievements' not in st.session_state:
-    st.session_state.achievements = []
-
 if 'points' not in st.session_state:
     st.session_state.points = 0
 
-# Define all possible achievements
-all_achievements = {
-    'step_master': {
-        'name': 'Step Master',
-        'description': 'Logged over 10,000 steps in a single day',
-        'icon': '👣',
-        'points': 10
-    },
-    'steps_achiever': {
-        'name': 'Steps Champion',
-        'description': 'Achieved your steps goal on 80% of days',
-        'icon': '🥇',
-        'points': 20
-    },
-    'activity_achiever': {
-        'name': 'Active Lifestyle Master',
-        'description': 'Achieved your active minutes goal on 80% of days',
-        'icon': '⏱️',
-        'points': 20
-    },
-    'weight_progress': {
-        'name': 'Halfway There',
-        'description': 'Reached 50% of your weight goal',
-        'icon': '⚖️',
-        'points': 15
-    },
-    'consistent_logger': {
-        'name': 'Consistent Logger',
-        'description': 'Logged activity for 7 consecutive days',
-        'icon': '📝',
-        'points': 15
-    },
-    'data_analyst': {
-        'name': 'Data Analyst',
-        'description': 'Viewed all dashboard charts and analytics',
-        'icon': '📊',
-        'points': 5
-    },
-    'goal_setter': {
-        'name': 'Goal Setter',
-        'description': 'Set goals for steps, activity, and weight',
-        'icon': '🎯',
-        'points': 10
-    },
-    'early_adopter': {
-        'name': 'Early Adopter',
-        'description': 'One of the first to use the fitness tracker',
-        'icon': '🚀',
-        'points': 5
-    }
-}
+# Achievement definitions live with the rules that unlock them
+all_achievements = ACHIEVEMENTS
+
+students = StudentService.get_all_students()
+if not students:
+    st.warning("No students found in the system. Please add students first.")
+    profiler.finish()
+    st.stop()
+
+# Achievements and points belong to the selected student
+student_options = StudentService.get_student_options_dict(students)
+option_labels = list(student_options.keys())
+current_id = st.session_state.get('current_student_id')
+default_index = next(
+    (i for i, label in enumerate(option_labels) if student_options[label] == current_id), 0
+)
+selected_student = st.selectbox("Select Student", option_labels, index=default_index)
+student_id = student_options[selected_student]
+st.session_state.current_student_id = student_id
+
+standing = LeaderboardService.get_rank(student_id)
+unlocked = AchievementService.get_unlocked(student_id)
 
 # Header with total points
 st.markdown(f"""
 <div style="background-color:#f0f2f6; padding:20px; border-radius:10px; text-align:center; margin-bottom:20px;">
-    <h2>Your Total Points: {st.session_state.points}</h2>
+    <h2>Your Total Points: {standing['points']}</h2>
     <p>Keep tracking your activity to earn more points and unlock achievements!</p>
 </div>
 """, unsafe_allow_html=True)
@@ -94,12 +71,12 @@ with tab1:
     st.subheader("Your Achievements")
     
     # Display earned achievements
-    if st.session_state.achievements:
+    if unlocked:
         st.write("You've earned these achievements:")
         
         # Create a grid for achievements
         cols = st.columns(2)
-        for i, achievement_id in enumerate(st.session_state.achievements):
+        for i, achievement_id in enumerate(unlocked):
             if achievement_id in all_achievements:
                 achievement = all_achievements[achievement_id]
                 with cols[i % 2]:
@@ -116,7 +93,7 @@ with tab1:
     # Display locked achievements
     st.subheader("Achievements to Unlock")
     
-    locked_achievements = [aid for aid in all_achievements if aid not in st.session_state.achievements]
+    locked_achievements = [aid for aid in all_achievements if aid not in unlocked]
     
     if locked_achievements:
         cols = st.columns(2)
@@ -132,95 +109,30 @@ with tab1:
                 """, unsafe_allow_html=True)
     else:
         st.success("Congratulations! You've unlocked all available achievements!")
+
+with tab2:
+    st.subheader("Student Leaderboard")
     
-    # Add "Claim Achievement" button for demo purposes
-    st.markdown("---")
-    st.subheader("Quick Achievement (Demo)")
-    
-    col1, col2, col3 = st.columns([2, 1, 1])
-    
+    # Show where the selected student stands
+    col1, col2, col3 = st.columns(3)
     with col1:
-        # Create a dropdown of available achievements that haven't been claimed
-        available_to_claim = [
-            (aid, f"{achievement['name']} (+{achievement['points']} pts)") 
-            for aid, achievement in all_achievements.items() 
-            if aid not in st.session_state.achievements
-        ]
-        
-        if available_to_claim:
-            selected_achievement = st.selectbox(
-                "Select an achievement to claim (for demonstration)",
-                [item[1] for item in available_to_claim],
-                index=0
-            )
-            selected_id = available_to_claim[[item[1] for item in available_to_claim].index(selected_achievement)][0]
-        else:
-            selected_id = None
-            st.write("You've claimed all available achievements!")
-    
+        st.metric("My Rank", f"#{standing['rank']:,}", f"of {standing['total']:,}", delta_color="off")
     with col2:
-        if selected_id and st.button("Claim Achievement"):
-            # Add the achievement to the user's list
-            st.session_state.achievements.append(selected_id)
-            
-            # Add the points
-            st.session_state.points += all_achievements[selected_id]['points']
-            
-            st.success(f"🎉 Achievement claimed: {all_achievements[selected_id]['name']}")
-            st.balloons()
-    
+        st.metric("My Points", standing['points'])
     with col3:
-        if st.button("Random Achievement"):
-            # Select a random achievement that hasn't been claimed
-            unclaimed = [aid for aid in all_achievements if aid not in st.session_state.achievements]
-            
-            if unclaimed:
-                random_achievement = random.choice(unclaimed)
-                
-                # Add the achievement to the user's list
-                st.session_state.achievements.append(random_achievement)
-                
-                # Add the points
-                st.session_state.points += all_achievements[random_achievement]['points']
-                
-                st.success(f"🎉 Random achievement: {all_achievements[random_achievement]['name']}")
-                st.balloons()
-            else:
-                st.info("You've already claimed all achievements!")
-
-with tab2:
-    st.subheader("Student Leaderboard")
+        st.metric("Level", LeaderboardService.level(standing['points']))
     
-    # Get all students
-    students = StudentService.get_all_students()
+    # Top of the leaderboard, ranked from the persisted points
+    top_n = st.select_slider("Show top", options=[10, 25, 50, 100], value=10)
+    df_leaderboard = LeaderboardService.get_leaderboard(limit=top_n)
     
-    if students:
-        # Generate random points for other students for demo purposes
-        leaderboard_data = []
-        
-        for student in students:
-            # Use actual points for the active student, random for others
-            if 'current_student_id' in st.session_state and st.session_state.current_student_id == student.id:
-                points = st.session_state.points
-                achievements_count = len(st.session_state.achievements)
-            else:
-                # Generate random points and achievements for other students
-                points = random.randint(5, 100)
-                achievements_count = random.randint(0, len(all_achievements))
-            
-            leaderboard_data.append({
-                "Student": student.name,
-                "Points": points,
-                "Achievements": achievements_count,
-                "Level": 1 + (points // 20)  # Level up every 20 points
-            })
-        
-        # Convert to DataFrame and sort
-        df_leaderboard = pd.DataFrame(leaderboard_data)
-        df_leaderboard = df_leaderboard.sort_values("Points", ascending=False)
-        
-        # Add rank column
-        df_leaderboard.insert(0, "Rank", range(1, len(df_leaderboard) + 1))
+    if not df_leaderboard.empty:
+        # Highlight the selected student
+        df_leaderboard["Student"] = [
+            f"⭐ {name}" if sid == student_id else name
+            for name, sid in zip(df_leaderboard["Student"], df_leaderboard["student_id"])
+        ]
+        df_leaderboard = df_leaderboard.drop(columns="student_id")
         
         # Display the leaderboard
         st.dataframe(df_leaderboard, use_container_width=True, hide_index=True)
@@ -240,7 +152,7 @@ with tab2:
             
             st.plotly_chart(fig, use_container_width=True)
     else:
-        st.info("No students found to display on the leaderboard.")
+        st.info("No points have been earned yet. Log some activity to get on the leaderboard!")
 
 with tab3:
     st.subheader("Rewards Store")
@@ -274,6 +186,12 @@ with tab3:
         }
     ]
     
+    # Rewards spend from the student's stored points; redemptions are a
+    # demo and are only remembered for this session
+    spent = st.session_state.setdefault("points_spent", {})
+    available = LeaderboardService.get_points(student_id)["points"] - spent.get(student_id, 0)
+    st.write(f"Points available: **{available:,}**")
+    
     # Display available rewards
     cols = st.columns(2)
     for i, reward in enumerate(rewards):
@@ -287,35 +205,22 @@ with tab3:
             """, unsafe_allow_html=True)
             
             # Add redeem button
-            can_afford = st.session_state.points >= reward['cost']
+            can_afford = available >= reward['cost']
             
             if st.button(f"Redeem ({reward['cost']} pts)", key=f"redeem_{i}", disabled=not can_afford):
                 if can_afford:
                     # Deduct points
-                    st.session_state.points -= reward['cost']
+                    spent[student_id] = spent.get(student_id, 0) + reward['cost']
                     st.success(f"🎉 You've redeemed: {reward['name']}!")
                     st.balloons()
                 else:
-                    st.error(f"Not enough points. You need {reward['cost'] - st.session_state.points} more points.")
+                    st.error(f"Not enough points. You need {reward['cost'] - available} more points.")
     
     # Points history visualization
     st.subheader("Points History")
     
-    # Generate fake points history for demonstration
-    days = 14
-    history_dates = [(date.today() - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
-    
-    # Create some random but realistic points data
-    if 'points_history' not in st.session_state:
-        base_points = max(0, st.session_state.points - random.randint(5, 20))
-        daily_points = [random.randint(0, 5) for _ in range(days)]
-        cumulative_points = [sum(daily_points[:i+1]) + base_points for i in range(days)]
-        st.session_state.points_history = list(zip(history_dates, cumulative_points))
-    
-    # Create a DataFrame for the chart
-    df_history = pd.DataFrame(st.session_state.points_history, columns=["Date", "Points"])
-    df_history["Date"] = pd.to_datetime(df_history["Date"])
-    df_history = df_history.sort_values("Date")
+    # Points at the end of each of the last two weeks' days
+    df_history = LeaderboardService.get_points_history(student_id, days=14)
     
     # Plot the points history
     fig = px.line(
@@ -326,17 +231,6 @@ with tab3:
         markers=True
     )
     
-    # Add today's points as the final point
-    today = date.today().strftime("%Y-%m-%d")
-    if today not in df_history["Date"].dt.strftime("%Y-%m-%d").values:
-        fig.add_scatter(
-            x=[today],
-            y=[st.session_state.points],
-            mode="markers",
-            marker=dict(size=10, color="red"),
-            name="Today"
-        )
-    
     st.plotly_chart(fig, use_container_width=True)
 
 # Mobile view enhancement
@@ -344,4 +238,6 @@ st.markdown("""
 <div style="background-color:#F0F2F6; padding: 10px; border-radius: 5px; margin-top: 20px;">
 <strong>💡 Tip:</strong> Keep logging your activities consistently to earn more points and unlock achievements!
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+profiler.finish()
@@ -0,0 +1,104 @@
+"""
+Admin page for query performance: per-statement timings, the slow-query
+log with query plans, and startup/connection pool/cache statistics.
+"""
+import streamlit as st
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import services
+sys.path.append(str(Path(__file__).parent.parent))
+from services.analytics_service import AnalyticsService
+from database.db_manager import db_manager
+from database.startup import startup, get_startup_stats
+from utils.profiler import start_page
+from utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
+
+st.set_page_config(page_title="Admin", page_icon="🛠️", layout="wide")
+
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Admin")
+
+st.title("Admin: Query Performance")
+st.write("Statement timings and slow queries recorded by the database layer since the app started.")
+
+query_stats = db_manager.query_stats
+
+col1, col2 = st.columns([3, 1])
+with col1:
+    query_stats.enabled = st.toggle("Record query statistics", value=query_stats.enabled)
+with col2:
+    if st.button("Reset statistics"):
+        query_stats.reset()
+
+summary = query_stats.summary()
+slow_queries = query_stats.slow_queries()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Statements", f"{sum(row['calls'] for row in summary):,}")
+col2.metric("Statement Shapes", f"{len(summary):,}")
+col3.metric("Time in SQLite", f"{sum(row['total_ms'] for row in summary) / 1000:.2f} s")
+col4.metric("Slow Queries", len(slow_queries), help=f"Statements taking at least {query_stats.slow_ms} ms")
+
+tab1, tab2, tab3 = st.tabs(["Statements", "Slow Queries", "System"])
+
+with tab1:
+    if summary:
+        st.dataframe(
+            pd.DataFrame(summary),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "shape": st.column_config.TextColumn("Statement", width="large"),
+                "calls": st.column_config.NumberColumn("Calls", format="%d"),
+                "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.1f"),
+                "mean_ms": st.column_config.NumberColumn("Mean (ms)", format="%.2f"),
+                "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.2f"),
+                "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.2f"),
+                "p99_ms": st.column_config.NumberColumn("p99 (ms)", format="%.2f"),
+                "max_ms": st.column_config.NumberColumn("Max (ms)", format="%.2f"),
+                "rows": st.column_config.NumberColumn("Rows (avg)", format="%.1f"),
+                "params": st.column_config.NumberColumn("Params", format="%d"),
+                "callers": st.column_config.TextColumn("Top Callers (sampled)", width="medium"),
+            }
+        )
+        st.caption(f"Calls and totals are estimated from a random {query_stats.sample_rate:.0%} of statements; "
+                   f"percentiles cover the last {query_stats.sample_size:,} of those per statement, and "
+                   f"callers are recorded for every {query_stats.caller_every}th of them and every slow one.")
+    else:
+        st.info("No statements recorded yet. Use the app, then come back to this page.")
+
+with tab2:
+    st.write(f"Statements taking at least **{query_stats.slow_ms} ms**, newest first.")
+    if query_stats.log_path:
+        st.caption(f"Also appended to {query_stats.log_path}")
+    if slow_queries:
+        for entry in slow_queries:
+            with st.expander(f"{entry['ms']:.1f} ms · {entry['caller']} · {entry['at']}"):
+                st.code(entry["shape"], language="sql")
+                st.write(f"Rows: {entry['rows'] if entry['rows'] is not None else 'n/a'} · "
+                         f"Parameters: {entry['params']}")
+                if entry["plan"]:
+                    st.write("**Query plan**")
+                    st.code("\n".join(entry["plan"]), language="text")
+    else:
+        st.success("No slow queries recorded.")
+
+with tab3:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.subheader("Startup")
+        st.json(get_startup_stats() or {})
+    with col2:
+        st.subheader("Connection Pool")
+        st.json(db_manager.pool_stats())
+    with col3:
+        st.subheader("Analytics Cache")
+        st.json(AnalyticsService.cache_stats())
+
+profiler.finish()
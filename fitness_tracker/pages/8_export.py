@@ -0,0 +1,93 @@
+"""
+Export page for downloading activity data as CSV, JSON Lines or Parquet.
+"""
+import streamlit as st
+import sys
+from pathlib import Path
+from datetime import date, timedelta
+
+# Add parent directory to path to import services
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+from services.student_service import StudentService
+from services.export_service import ExportService
+from database.startup import startup
+from utils.profiler import start_page
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
+
+st.set_page_config(page_title="Export Data", page_icon="📤")
+
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Export Data")
+
+st.title("Export Data")
+st.write("Download activity data for selected students, grades and dates.")
+
+FORMAT_LABELS = {"csv": "CSV", "jsonl": "JSON Lines", "parquet": "Parquet"}
+
+students = StudentService.get_all_students()
+if not config.FEATURES.get("allow_data_export"):
+    st.info("Data export is disabled for this installation.")
+elif not students:
+    st.warning("No students found in the system. Please add students first.")
+else:
+    col1, col2 = st.columns(2)
+    with col1:
+        grades = sorted({s.grade for s in students if s.grade}, key=lambda g: (len(g), g))
+        selected_grades = st.multiselect("Grades", grades, placeholder="All grades")
+    with col2:
+        student_options = StudentService.get_student_options_dict(students)
+        selected_students = st.multiselect("Students", list(student_options.keys()), placeholder="All students")
+
+    limit_dates = st.checkbox("Limit to a date range")
+    date_from = date_to = None
+    if limit_dates:
+        col1, col2 = st.columns(2)
+        with col1:
+            date_from = st.date_input("From", value=date.today() - timedelta(days=30))
+        with col2:
+            date_to = st.date_input("To", value=date.today())
+
+    formats = ExportService.available_formats()
+    fmt = st.radio("Format", formats, format_func=FORMAT_LABELS.get, horizontal=True)
+    if "parquet" not in formats:
+        st.caption("Parquet export needs the pyarrow package.")
+
+    filters = {
+        "student_ids": [student_options[name] for name in selected_students] or None,
+        "grades": selected_grades or None,
+        "date_from": date_from.isoformat() if date_from else None,
+        "date_to": date_to.isoformat() if date_to else None,
+    }
+    row_count = ExportService.count(**filters)
+    st.metric("Activity Rows", f"{row_count:,}")
+
+    # Downloads are built in server memory, so big exports go to a file instead
+    too_large = row_count > config.EXPORT_DOWNLOAD_MAX_ROWS
+    if too_large:
+        st.warning(f"Exports of more than {config.EXPORT_DOWNLOAD_MAX_ROWS:,} rows are too large to "
+                   "download here. Narrow the selection, or write the file from the command line:")
+        st.code(ExportService.command(fmt, **filters), language="bash")
+
+    # The export runs only when the button is clicked, rather than being
+    # built on every rerun
+    st.download_button(
+        f"Download {FORMAT_LABELS[fmt]}",
+        data=lambda: ExportService.to_buffer(fmt, **filters),
+        file_name=ExportService.file_name(fmt, **filters),
+        mime=ExportService.FORMATS[fmt][0],
+        disabled=row_count == 0 or too_large,
+        on_click="ignore",
+        type="primary",
+    )
+
+# Add a tip
+st.markdown("""
+<div style="background-color:#F0F2F6; padding: 10px; border-radius: 5px; margin-top: 20px;">
+<strong>💡 Tip:</strong> Parquet files are much smaller than CSV and keep column types; use them for large exports.
+</div>
+""", unsafe_allow_html=True)
+
+profiler.finish()
@@ -0,0 +1,109 @@
+"""
+Import page for bulk loading activity from CSV, JSON Lines or wearable exports.
+"""
+import streamlit as st
+import sys
+import csv
+import io
+from pathlib import Path
+
+# Add parent directory to path to import services
+sys.path.append(str(Path(__file__).parent.parent))
+from services.student_service import StudentService
+from services.import_service import ImportService
+from database.startup import startup
+from utils.profiler import start_page
+
+# Initialize the database once per process (a no-op on reruns)
+startup()
+
+st.set_page_config(page_title="Import Data", page_icon="📥")
+
+# Time this render when page profiling is enabled (a no-op otherwise)
+profiler = start_page("Import Data")
+
+st.title("Import Data")
+st.write("Load daily activity for many students at once from a file.")
+
+students = StudentService.get_all_students()
+if not students:
+    st.warning("No students found in the system. Please add students first.")
+else:
+    uploaded = st.file_uploader("Activity file", type=["csv", "jsonl", "ndjson", "json", "xml"])
+    if uploaded is not None:
+        detected = ImportService.detect_format(uploaded.name, uploaded.getvalue()[:4096])
+        formats = list(ImportService.FORMATS)
+        fmt = st.selectbox("Format", formats, index=formats.index(detected),
+                           format_func=ImportService.FORMATS.get)
+
+        student_options = StudentService.get_student_options_dict(students)
+        col1, col2 = st.columns(2)
+        with col1:
+            if fmt in ImportService.SINGLE_STUDENT_FORMATS:
+                selected_student = st.selectbox("Student", list(student_options.keys()))
+            else:
+                selected_student = st.selectbox("Student (for rows without one)",
+                                                ["None"] + list(student_options.keys()))
+        with col2:
+            units = st.radio("Distance and weight units", ["metric", "imperial"],
+                             format_func=lambda u: "km / kg" if u == "metric" else "miles / lb",
+                             horizontal=True)
+        overwrite = st.radio("Days that already have activity", [True, False],
+                             format_func=lambda o: "Update them" if o else "Keep them", horizontal=True)
+
+        if st.button("Import", type="primary"):
+            bar = st.progress(0.0, text="Importing...")
+
+            def progress(records, fraction):
+                bar.progress(fraction or 0.0, text=f"Importing... {records:,} records read")
+
+            try:
+                result = ImportService.import_file(
+                    io.BytesIO(uploaded.getvalue()), fmt,
+                    student=student_options.get(selected_student), units=units,
+                    overwrite=overwrite, progress=progress
+                )
+            except ValueError as e:
+                bar.empty()
+                st.error(f"Import failed: {e}")
+            else:
+                bar.progress(1.0, text=f"Done in {result['seconds']:.1f}s")
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Imported", f"{result['imported']:,}")
+                col2.metric("Rejected", f"{result['rejected']:,}")
+                col3.metric("Students", f"{result['students']:,}")
+                if result["unlocked"]:
+                    st.success(f"🏆 {result['unlocked']:,} achievements unlocked!")
+
+                if result["rejected"]:
+                    shown = len(result["errors"])
+                    st.subheader("Rejected Records")
+                    if shown < result["rejected"]:
+                        st.caption(f"Showing the first {shown:,} of {result['rejected']:,} rejected records.")
+                    st.dataframe(result["errors"], use_container_width=True,
+                                 column_config={"row": "Record", "error": "Reason"})
+                    rejects = io.StringIO()
+                    writer = csv.DictWriter(rejects, fieldnames=("row", "error"))
+                    writer.writeheader()
+                    writer.writerows(result["errors"])
+                    st.download_button("Download Rejects", rejects.getvalue(),
+                                       file_name=f"{Path(uploaded.name).stem}_rejects.csv", mime="text/csv")
+
+    with st.expander("Supported formats"):
+        st.markdown(
+            "- **CSV / JSON Lines**: one row per student and day with `student_id` or `student` "
+            "(name), `date`, and any of `steps`, `active_minutes`, `distance`, `calories`, "
+            "`heart_rate`, `weight`. Unit suffixes such as `distance_mi` or `weight_lb` are converted.\n"
+            "- **Fitbit**: the activities CSV from a Fitbit data export.\n"
+            "- **Google Fit**: *Daily activity metrics.csv* from Google Takeout.\n"
+            "- **Apple Health**: *export.xml* from the Health app's export."
+        )
+
+# Add a tip
+st.markdown("""
+<div style="background-color:#F0F2F6; padding: 10px; border-radius: 5px; margin-top: 20px;">
+<strong>💡 Tip:</strong> Very large files import faster from the command line: <code>python manage.py import FILE</code>.
+</div>
+""", unsafe_allow_html=True)
+
+profiler.finish()
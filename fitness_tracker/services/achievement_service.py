@@ -0,0 +1,329 @@
+"""
+Achievement service: a declarative rules engine that unlocks achievements
+from activity data as it is logged.
+"""
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import models and config
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+from database.db_manager import db_manager
+from database.models.activity import Activity
+from database.models.goal import Goal
+from database.models.points import StudentPoints
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Every achievement a student can earn
+ACHIEVEMENTS = {
+    'step_master': {
+        'name': 'Step Master',
+        'description': 'Logged over 10,000 steps in a single day',
+        'icon': '👣',
+        'points': 10
+    },
+    'steps_achiever': {
+        'name': 'Steps Champion',
+        'description': 'Achieved your steps goal on 80% of days',
+        'icon': '🥇',
+        'points': 20
+    },
+    'activity_achiever': {
+        'name': 'Active Lifestyle Master',
+        'description': 'Achieved your active minutes goal on 80% of days',
+        'icon': '⏱️',
+        'points': 20
+    },
+    'weight_progress': {
+        'name': 'Halfway There',
+        'description': 'Reached 50% of your weight goal',
+        'icon': '⚖️',
+        'points': 15
+    },
+    'consistent_logger': {
+        'name': 'Consistent Logger',
+        'description': 'Logged activity for 7 consecutive days',
+        'icon': '📝',
+        'points': 15
+    },
+    'data_analyst': {
+        'name': 'Data Analyst',
+        'description': 'Viewed all dashboard charts and analytics',
+        'icon': '📊',
+        'points': 5
+    },
+    'goal_setter': {
+        'name': 'Goal Setter',
+        'description': 'Set goals for steps, activity, and weight',
+        'icon': '🎯',
+        'points': 10
+    },
+    'early_adopter': {
+        'name': 'Early Adopter',
+        'description': 'One of the first to use the fitness tracker',
+        'icon': '🚀',
+        'points': 5
+    }
+}
+
+
+class AchievementRule:
+    """
+    The unlock condition for one achievement.
+
+    qualify(frame, goals) takes daily activity rows ordered by student and
+    date (a datetime date column plus the columns in fields) and a
+    goals frame (see Goal.fetch_frame), and returns the ids of the students
+    who meet the condition. An insert can only affect the rule if it sets
+    one of fields. Rules with history=False are decided by the new rows
+    alone; the others see each affected student's full history. Rules with
+    no fields don't depend on activity and are checked with
+    AchievementService.evaluate_students.
+    """
+
+    __slots__ = ("achievement_id", "fields", "qualify", "history", "uses_goals")
+
+    def __init__(self, achievement_id, fields, qualify, history=True, uses_goals=False):
+        self.achievement_id = achievement_id
+        self.fields = frozenset(fields)
+        self.qualify = qualify
+        self.history = history
+        self.uses_goals = uses_goals
+
+
+def _day_numbers(frame):
+    """The date column as integer day numbers."""
+    return frame["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _any_day_over(metric, threshold):
+    """Students with at least one day where metric exceeds threshold."""
+    def qualify(frame, goals):
+        return frame["student_id"].to_numpy()[frame[metric].to_numpy() > threshold]
+    return qualify
+
+
+def _longest_run_at_least(days):
+    """Students with a run of at least days consecutive logged days."""
+    def qualify(frame, goals):
+        student_ids = frame["student_id"].to_numpy()
+        if not len(student_ids):
+            return student_ids
+        day_numbers = _day_numbers(frame)
+        run_starts = np.ones(len(student_ids), dtype=bool)
+        run_starts[1:] = (student_ids[1:] != student_ids[:-1]) | (np.diff(day_numbers) != 1)
+        run_lengths = np.bincount(np.cumsum(run_starts) - 1)
+        return student_ids[run_starts][run_lengths >= days]
+    return qualify
+
+
+def _goal_rate(metric, rate=0.8, window_days=30, min_days=7):
+    """
+    Students who met their daily metric goal on at least rate of the days
+    they logged in some trailing window_days window, counting only windows
+    with min_days or more logged days.
+    """
+    def qualify(frame, goals):
+        student_ids = frame["student_id"].to_numpy()
+        if not len(student_ids):
+            return student_ids
+        default = config.DEFAULT_GOALS.get(metric, np.nan)
+        goal = goals[metric].reindex(student_ids).fillna(default).to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            hits = frame[metric].to_numpy(dtype=np.float64) >= goal
+
+        # Rows sort by (student, day), so each row's window starts at the
+        # first row of the same student within window_days
+        keys = student_ids.astype(np.int64) * 1_000_000 + _day_numbers(frame)
+        starts = np.searchsorted(keys, keys - (window_days - 1), side="left")
+        cumulative = np.r_[0, np.cumsum(hits)]
+        positions = np.arange(len(keys))
+        window_hits = cumulative[positions + 1] - cumulative[starts]
+        window_days_logged = positions + 1 - starts
+        met = (window_days_logged >= min_days) & (window_hits >= rate * window_days_logged)
+        return student_ids[met]
+    return qualify
+
+
+def _weight_progress(share=50):
+    """Students whose latest weight covers share percent of the way from their first weight to their goal."""
+    def qualify(frame, goals):
+        weighed = frame[frame["weight_kg"].notna()]
+        if weighed.empty:
+            return np.array([], dtype=np.int64)
+        grouped = weighed.groupby("student_id", sort=False)["weight_kg"]
+        start, current = grouped.first(), grouped.last()
+        target = goals["weight_kg"].reindex(start.index)
+        progress = Goal.weight_progress(start, current, target)
+        return start.index.to_numpy()[(progress >= share) & target.notna().to_numpy()]
+    return qualify
+
+
+def _early_adopter(first_students=10):
+    """The first students registered, once they log any activity."""
+    def qualify(frame, goals):
+        student_ids = frame["student_id"].to_numpy()
+        return student_ids[student_ids <= first_students]
+    return qualify
+
+
+def _all_goals_set(frame, goals):
+    """Students with a goal for every goal metric."""
+    return goals.index.to_numpy()[goals[list(Goal.METRICS)].notna().all(axis=1).to_numpy()]
+
+
+# Achievements earned from data. data_analyst is awarded by the app itself
+# (see AchievementService.claim).
+RULES = (
+    AchievementRule("step_master", ["steps"], _any_day_over("steps", 10000), history=False),
+    AchievementRule("early_adopter", ["date"], _early_adopter(), history=False),
+    AchievementRule("consistent_logger", ["date"], _longest_run_at_least(7)),
+    AchievementRule("steps_achiever", ["steps"], _goal_rate("steps"), uses_goals=True),
+    AchievementRule("activity_achiever", ["active_minutes"], _goal_rate("active_minutes"),
+                    uses_goals=True),
+    AchievementRule("weight_progress", ["weight_kg"], _weight_progress(), uses_goals=True),
+    AchievementRule("goal_setter", [], _all_goals_set, uses_goals=True),
+)
+
+
+class AchievementService:
+    """Service class for evaluating and persisting achievements."""
+
+    @staticmethod
+    def get_unlocked(student_id):
+        """Ids of the achievements a student has unlocked, oldest first."""
+        return [row["achievement_id"] for row in StudentPoints.get_achievements(student_id)]
+
+    @staticmethod
+    def evaluate_rows(rows):
+        """
+        Evaluate the rules a batch of newly written activity rows can affect
+        and persist any unlocks.
+
+        Rows may be dicts, Activity objects or tuples in Activity.FIELDS
+        order. Only rules reading a column the rows set are considered, and
+        only for students who don't hold the achievement yet; history is
+        loaded once for the students and rules that remain. Returns the new
+        unlocks as (student_id, achievement_id, points) tuples.
+        """
+        records = [Activity._as_tuple(row) for row in rows]
+        if not records:
+            return []
+        new_rows = AchievementService._rows_frame(records)
+        set_fields = {field for field in Activity.FIELDS[1:] if new_rows[field].notna().any()}
+        rules = [rule for rule in RULES if rule.fields & set_fields]
+        if not rules:
+            return []
+
+        student_ids = np.unique(new_rows["student_id"].to_numpy()).tolist()
+        held = AchievementService._held(student_ids)
+        pending = {
+            rule: [sid for sid in student_ids if (sid, rule.achievement_id) not in held]
+            for rule in rules
+        }
+        pending = {rule: sids for rule, sids in pending.items() if sids}
+        if not pending:
+            return []
+
+        history_students = sorted({sid for rule, sids in pending.items() if rule.history for sid in sids})
+        history = AchievementService._load_activity(history_students, pending) if history_students else None
+        goal_students = sorted({sid for rule, sids in pending.items() if rule.uses_goals for sid in sids})
+        goals = Goal.fetch_frame(goal_students) if goal_students else None
+
+        unlocks = []
+        for rule, sids in pending.items():
+            frame = history if rule.history else new_rows
+            if len(sids) < len(student_ids):
+                frame = frame[frame["student_id"].isin(sids)]
+            qualified = np.unique(rule.qualify(frame, goals))
+            unlocks.extend(AchievementService._unlocks(rule, qualified))
+        return StudentPoints.unlock_many(unlocks)
+
+    @staticmethod
+    def evaluate_students(student_ids, achievement_ids=None):
+        """
+        Re-evaluate rules (all, or just achievement_ids) for specific
+        students from their stored data, e.g. after their goals change.
+        Returns the new unlocks.
+        """
+        rules = [rule for rule in RULES
+                 if achievement_ids is None or rule.achievement_id in achievement_ids]
+        return StudentPoints.unlock_many(AchievementService._evaluate(sorted(set(student_ids)), rules))
+
+    @staticmethod
+    def backfill(student_ids=None, batch_size=None, progress=None):
+        """
+        Re-evaluate every rule for every student (or student_ids) in
+        vectorized passes over batch_size students at a time, e.g. after a
+        bulk import or a rule change. Each pass loads the batch's activity
+        into one columnar frame and runs each rule over it once.
+        progress(done, total) is called after each pass. Returns the
+        number of new unlocks.
+        """
+        batch_size = batch_size or config.ACHIEVEMENT_BACKFILL_BATCH
+        if student_ids is None:
+            student_ids = [row["id"] for row in db_manager.fetchall("SELECT id FROM students ORDER BY id")]
+        student_ids = sorted(set(student_ids))
+
+        unlocked = 0
+        for start in range(0, len(student_ids), batch_size):
+            batch = student_ids[start:start + batch_size]
+            unlocked += len(StudentPoints.unlock_many(AchievementService._evaluate(batch, RULES)))
+            if progress:
+                progress(min(start + batch_size, len(student_ids)), len(student_ids))
+        return unlocked
+
+    @staticmethod
+    def _evaluate(student_ids, rules):
+        """Unlock tuples for students meeting rules, over their full history."""
+        if not student_ids or not rules:
+            return []
+        activity = AchievementService._load_activity(student_ids, rules)
+        goals = Goal.fetch_frame(student_ids)
+        unlocks = []
+        for rule in rules:
+            unlocks.extend(AchievementService._unlocks(rule, np.unique(rule.qualify(activity, goals))))
+        return unlocks
+
+    @staticmethod
+    def _rows_frame(records):
+        """
+        Activity tuples as a frame ordered by student and date, with numeric
+        columns coerced and rows lacking a valid student or date dropped.
+        """
+        columns = dict(zip(Activity.FIELDS, zip(*records)))
+        frame = pd.DataFrame({
+            field: pd.to_numeric(np.asarray(columns[field], dtype=object), errors="coerce")
+            for field in ("student_id",) + Activity.NUMERIC_FIELDS
+        })
+        dates = [str(value)[:10] if value is not None else None for value in columns["date"]]
+        frame.insert(1, "date", pd.to_datetime(dates, format="%Y-%m-%d", errors="coerce"))
+        frame = frame[frame["student_id"].notna() & frame["date"].notna()]
+        frame = frame.astype({"student_id": np.int64})
+        return frame.sort_values(["student_id", "date"], kind="stable")
+
+    @staticmethod
+    def _load_activity(student_ids, rules):
+        """Activity for students, with just the columns the rules read."""
+        fields = set().union(*(rule.fields for rule in rules)) - {"date"}
+        columns = ["student_id", "date"] + [field for field in Activity.FIELDS if field in fields]
+        return Activity.fetch_frame(student_ids, columns=columns)
+
+    @staticmethod
+    def _held(student_ids):
+        """(student_id, achievement_id) pairs already unlocked by the students."""
+        rows = db_manager.fetchall(
+            "SELECT student_id, achievement_id FROM student_achievements "
+            "WHERE student_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(student_ids),)
+        )
+        return {(row["student_id"], row["achievement_id"]) for row in rows}
+
+    @staticmethod
+    def _unlocks(rule, student_ids):
+        points = ACHIEVEMENTS[rule.achievement_id]["points"]
+        return [(int(student_id), rule.achievement_id, points) for student_id in student_ids]
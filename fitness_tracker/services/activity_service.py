@@ -8,6 +8,7 @@ from datetime import datetime
 # Add parent directory to path to import models
 sys.path.append(str(Path(__file__).parent.parent))
 from database.models.activity import Activity
+from services.achievement_service import AchievementService
 
 class ActivityService:
     """Service class for activity-related operations."""
@@ -17,6 +18,11 @@ class ActivityService:
         """Get activities for a student with optional filtering."""
         return Activity.get_by_student(student_id, limit, date_from, date_to)
     
+    @staticmethod
+    def get_activity_batch(student_id, limit=None, date_from=None, date_to=None):
+        """Get a student's activities as a compact, column-backed ActivityBatch."""
+        return Activity.get_batch_by_student(student_id, limit, date_from, date_to)
+    
     @staticmethod
     def get_activity_by_id(activity_id):
         """Get a single activity by ID."""
@@ -46,10 +52,35 @@ class ActivityService:
                 weight_kg=weight_kg
             )
             activity.save()
+            AchievementService.evaluate_rows([activity])
             return True, "Activity logged successfully!"
         except Exception as e:
             return False, f"Error logging activity: {str(e)}"
     
+    @staticmethod
+    def log_activities(batch):
+        """
+        Validate and save many activity logs in a single transaction.
+        Returns (success, message, errors) where errors lists the rejected
+        rows by their position in the batch.
+        """
+        batch = list(batch)
+        try:
+            result = Activity.bulk_insert(batch)
+        except Exception as e:
+            return False, f"Error logging activities: {str(e)}", []
+        
+        inserted, errors = result["inserted"], result["errors"]
+        if inserted:
+            rejected = {error["row"] for error in errors}
+            AchievementService.evaluate_rows(
+                row for position, row in enumerate(batch) if position not in rejected
+            )
+        message = f"{inserted} activities logged successfully!"
+        if errors:
+            message += f" {len(errors)} rows were rejected."
+        return inserted > 0 or not errors, message, errors
+    
     @staticmethod
     def update_activity(activity_id, **kwargs):
         """Update an existing activity."""
@@ -63,6 +94,7 @@ class ActivityService:
                 setattr(activity, key, value)
         
         activity.save()
+        AchievementService.evaluate_rows([activity])
         return True, "Activity updated successfully!"
     
     @staticmethod
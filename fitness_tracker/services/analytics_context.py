@@ -0,0 +1,109 @@
+"""
+Per-render analytics context for a single student.
+"""
+import sys
+from functools import cached_property
+from pathlib import Path
+
+# Add parent directory to path to import services
+sys.path.append(str(Path(__file__).parent.parent))
+from services.analytics_service import AnalyticsService
+from services.goal_service import GoalService
+
+class StudentAnalyticsContext:
+    """
+    Everything a page needs about one student over one window, loaded on
+    first use and then shared by every section of the render.
+
+    Create one per page run and pass it around instead of calling
+    AnalyticsService repeatedly. Derived frames (the date-ordered daily
+    series, weight readings, goal attainment) are computed once and
+    memoized; like the cached results they come from, treat them as
+    read-only.
+    """
+
+    def __init__(self, student_id, days=30):
+        self.student_id = student_id
+        self.days = days
+        self._attainment = {}
+        self._period_summaries = {}
+
+    @cached_property
+    def data(self):
+        """The get_student_metrics result, or None if the student doesn't exist."""
+        return AnalyticsService.get_student_metrics(self.student_id, days=self.days)
+
+    @property
+    def exists(self):
+        return self.data is not None
+
+    @property
+    def student(self):
+        return self.data["student"] if self.data else None
+
+    @property
+    def metrics(self):
+        return self.data["metrics"] if self.data else None
+
+    @cached_property
+    def activity_frame(self):
+        """Activity in the window, newest first (loaded on first use)."""
+        if not self.exists:
+            return None
+        return AnalyticsService.get_activity_frame(self.student_id, days=self.days)
+
+    @property
+    def has_activity(self):
+        return self.data is not None and self.metrics["days_logged"] > 0
+
+    @cached_property
+    def daily(self):
+        """Activity in the window, oldest first, with a fresh index."""
+        if not self.has_activity:
+            return None
+        return self.activity_frame.sort_values("date").reset_index(drop=True)
+
+    @cached_property
+    def weights(self):
+        """Daily rows that have a weight reading, oldest first."""
+        if not self.has_activity:
+            return None
+        return self.daily[self.daily["weight_kg"].notnull()]
+
+    @cached_property
+    def streaks(self):
+        """Current/longest streak and run history (see AnalyticsService.get_streaks)."""
+        return AnalyticsService.get_streaks(self.student_id)
+
+    def period_summary(self, period="week"):
+        """Per-week or per-month totals for the window, from the rollups."""
+        if period not in self._period_summaries:
+            self._period_summaries[period] = AnalyticsService.get_period_summary(
+                self.student_id, period, days=self.days
+            )
+        return self._period_summaries[period]
+
+    def goal_attainment(self, metric, goal):
+        """
+        Daily progress against a goal of at least goal for metric.
+
+        Returns {"frame": daily rows with a goal_achieved column,
+        "days_achieved", "total_days", "rate"} where rate is a percentage,
+        or None without activity.
+        """
+        if not self.has_activity:
+            return None
+        key = (metric, goal)
+        if key not in self._attainment:
+            frame = self.daily.assign(
+                goal_achieved=GoalService.attainment_mask(self.daily[metric], goal)
+            )
+            days_achieved = int(frame["goal_achieved"].sum())
+            total_days = len(frame)
+            self._attainment[key] = {
+                "frame": frame,
+                "days_achieved": days_achieved,
+                "total_days": total_days,
+                "rate": days_achieved / total_days * 100 if total_days else 0,
+            }
+        return self._attainment[key]
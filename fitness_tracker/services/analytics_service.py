@@ -1,19 +1,148 @@
 """
 Analytics service for calculating metrics and statistics.
 """
-import pandas as pd
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime, timedelta
 
 # Add parent directory to path to import models and services
 sys.path.append(str(Path(__file__).parent.parent))
+import config
+from database import events
 from database.models.activity import Activity
+from database.models.rollup import ActivityRollup
 from database.models.student import Student
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+class AnalyticsCache:
+    """
+    Process-wide LRU cache of per-student analytics results.
+
+    Entries are keyed by (student_id, window, result kind) and bounded by
+    both entry count and approximate memory. Writes to a student's data
+    drop that student's entries once committed, so readers never see stale
+    results. Cached values are shared between callers and must be treated
+    as read-only.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries or config.ANALYTICS_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or config.ANALYTICS_CACHE_MAX_BYTES
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._by_student = {}  # student_id -> set of keys
+        self._generations = {}  # student_id -> invalidation count
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def _sizeof(value):
+        """Estimate the memory held by a cached result."""
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(index=True, deep=False).sum())
+        if isinstance(value, dict):
+            return 64 + sum(AnalyticsCache._sizeof(item) for item in value.values())
+        if isinstance(value, (list, tuple)):
+            width = len(value[0]) if value and isinstance(value[0], (list, tuple)) else 1
+            return 64 + 64 * len(value) * width
+        return 64
+
+    def get(self, key):
+        """Return (True, value) for a cached key, or (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry[0]
+
+    def generation(self, student_id):
+        """Return a token that changes whenever the student's entries are invalidated."""
+        with self._lock:
+            return self._generations.get(student_id, 0)
+
+    def put(self, key, value, generation=None):
+        """
+        Cache value under key, evicting least recently used entries past the
+        limits. A value computed before the student's data last changed (its
+        generation token is out of date) is not stored.
+        """
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key[0], 0):
+                return
+            self._discard(key)
+            self._entries[key] = (value, size)
+            self._by_student.setdefault(key[0], set()).add(key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self._stats["evictions"] += 1
+
+    def _discard(self, key):
+        """Remove one entry. Caller holds the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        keys = self._by_student.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_student[key[0]]
+        return True
+
+    def invalidate(self, student_ids):
+        """Drop every entry for the given students."""
+        with self._lock:
+            for student_id in student_ids:
+                self._generations[student_id] = self._generations.get(student_id, 0) + 1
+                for key in list(self._by_student.get(student_id, ())):
+                    if self._discard(key):
+                        self._stats["invalidations"] += 1
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._by_student.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return a snapshot of cache metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["max_entries"] = self.max_entries
+            stats["max_bytes"] = self.max_bytes
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+# Shared across sessions; kept in sync with writes through the model layer
+analytics_cache = AnalyticsCache()
+events.subscribe(analytics_cache.invalidate)
 
 class AnalyticsService:
     """Service class for analytics and metrics calculations."""
     
+    # Activity columns loaded for per-student analytics
+    ACTIVITY_COLUMNS = ("date", "steps", "active_minutes", "distance",
+                        "calories", "heart_rate", "weight_kg")
+    
     @staticmethod
     def calculate_bmi(height_cm, weight_kg):
         """Calculate BMI from height and weight."""
@@ -22,6 +151,25 @@ class AnalyticsService:
         height_m = height_cm / 100
         return round(weight_kg / (height_m ** 2), 1)
     
+    @staticmethod
+    def calculate_bmi_array(height_cm, weight_kg):
+        """Vectorized calculate_bmi: NaN where height or weight is missing or zero."""
+        height_m = np.asarray(height_cm, dtype=np.float64) / 100
+        weight_kg = np.asarray(weight_kg, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bmi = np.round(weight_kg / height_m ** 2, 1)
+        return np.where((height_m > 0) & (weight_kg > 0), bmi, np.nan)
+    
+    @staticmethod
+    def get_bmi_category_array(bmi):
+        """Vectorized get_bmi_category."""
+        bmi = np.asarray(bmi, dtype=np.float64)
+        return np.select(
+            [np.isnan(bmi), bmi < 18.5, bmi < 25, bmi < 30],
+            ["N/A", "Underweight", "Normal weight", "Overweight"],
+            default="Obese"
+        )
+    
     @staticmethod
     def get_bmi_category(bmi):
         """Get the BMI category based on BMI value."""
@@ -36,28 +184,69 @@ class AnalyticsService:
         else:
             return "Obese"
     
+    @staticmethod
+    def linear_fit(x, y):
+        """
+        Ordinary least-squares line through the points where both x and y
+        are present: (slope, intercept), or None with fewer than two
+        distinct x values. Used for chart trend lines instead of plotly's
+        trendline="ols", which imports statsmodels.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        present = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[present], y[present]
+        if len(x) < 2 or np.ptp(x) == 0:
+            return None
+        slope, intercept = np.polyfit(x, y, 1)
+        return float(slope), float(intercept)
+
+    @staticmethod
+    def cache_stats():
+        """Return hit/miss/eviction counts and size of the analytics cache."""
+        return analytics_cache.stats()
+    
+    @staticmethod
+    def clear_cache():
+        """Drop all cached analytics results."""
+        analytics_cache.clear()
+    
     @staticmethod
     def get_student_metrics(student_id, days=30):
-        """Get key metrics for a student over a specified time period."""
+        """
+        Get key metrics for a student over a specified time period, from
+        the rollups (no activity rows are read). Results are cached until
+        the student's data changes; treat the returned dict as read-only.
+        """
+        end_date = datetime.now()
+        key = (int(student_id), "metrics", days, end_date.strftime("%Y-%m-%d"))
+        found, result = analytics_cache.get(key)
+        if found:
+            return result
+        
+        generation = analytics_cache.generation(key[0])
+        result = AnalyticsService._compute_student_metrics(student_id, days, end_date)
+        if result is not None:
+            analytics_cache.put(key, result, generation)
+        return result
+    
+    @staticmethod
+    def _compute_student_metrics(student_id, days, end_date):
+        """Calculate a student's metrics from the rollups covering the window."""
         # Get student info
         student = Student.get_by_id(student_id)
         if not student:
             return None
         
-        # Get activity data for time period
-        end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
-        activities = Activity.get_by_student(
-            student_id, 
-            date_from=start_date.strftime("%Y-%m-%d"),
-            date_to=end_date.strftime("%Y-%m-%d")
-        )
+        totals = ActivityRollup.get_window(student_id, start_date.date(), end_date.date())
         
         # If no activities, return basic student info
-        if not activities:
+        if not totals["days"]:
             return {
                 "student": student.to_dict(),
                 "metrics": {
+                    "days_logged": 0,
                     "total_steps": 0,
                     "avg_steps": 0,
                     "total_calories": 0,
@@ -65,23 +254,18 @@ class AnalyticsService:
                     "latest_weight": None,
                     "bmi": None,
                     "bmi_category": "N/A"
-                },
-                "activity_data": []
+                }
             }
         
-        # Convert to dataframe for easier analysis
-        activity_dicts = [a.to_dict() for a in activities]
-        df = pd.DataFrame(activity_dicts)
-        
-        # Calculate metrics
-        latest_weight = df["weight_kg"].iloc[0] if "weight_kg" in df and len(df) > 0 else None
+        latest_weight = totals["latest_weight"]
         bmi = AnalyticsService.calculate_bmi(student.height_cm, latest_weight)
         
         metrics = {
-            "total_steps": df["steps"].sum() if "steps" in df else 0,
-            "avg_steps": df["steps"].mean() if "steps" in df else 0,
-            "total_calories": df["calories"].sum() if "calories" in df else 0,
-            "avg_active_minutes": df["active_minutes"].mean() if "active_minutes" in df else 0,
+            "days_logged": totals["days"],
+            "total_steps": int(totals["steps_sum"]),
+            "avg_steps": totals["steps_avg"] or 0,
+            "total_calories": totals["calories_sum"],
+            "avg_active_minutes": totals["active_minutes_avg"] or 0,
             "latest_weight": latest_weight,
             "bmi": bmi,
             "bmi_category": AnalyticsService.get_bmi_category(bmi)
@@ -89,37 +273,249 @@ class AnalyticsService:
         
         return {
             "student": student.to_dict(),
-            "metrics": metrics,
-            "activity_data": activity_dicts
+            "metrics": metrics
         }
     
+    @staticmethod
+    def get_activity_frame(student_id, days=30):
+        """
+        A student's daily activity over the last days days as a DataFrame,
+        newest first, for charts and per-day analysis. Cached like
+        get_student_metrics; treat the frame as read-only.
+        """
+        end_date = datetime.now()
+        key = (int(student_id), "activity", days, end_date.strftime("%Y-%m-%d"))
+        found, result = analytics_cache.get(key)
+        if found:
+            return result
+        
+        generation = analytics_cache.generation(key[0])
+        start_date = end_date - timedelta(days=days)
+        result = Activity.fetch_frame(
+            student_id,
+            date_from=start_date.strftime("%Y-%m-%d"),
+            date_to=end_date.strftime("%Y-%m-%d"),
+            columns=AnalyticsService.ACTIVITY_COLUMNS,
+            descending=True
+        )
+        analytics_cache.put(key, result, generation)
+        return result
+    
     @staticmethod
     def get_trend_data(student_id, metric, days=30):
         """Get trend data for a specific metric over time."""
-        # Get activity data
+        if metric not in AnalyticsService.ACTIVITY_COLUMNS or metric == "date":
+            return []
+        
         end_date = datetime.now()
+        key = (int(student_id), ("trend", metric), days, end_date.strftime("%Y-%m-%d"))
+        found, result = analytics_cache.get(key)
+        if found:
+            return result
+        
+        generation = analytics_cache.generation(key[0])
+        result = AnalyticsService._compute_trend_data(student_id, metric, days, end_date)
+        analytics_cache.put(key, result, generation)
+        return result
+    
+    @staticmethod
+    def _compute_trend_data(student_id, metric, days, end_date):
+        """Load one metric's values over the window, oldest first."""
         start_date = end_date - timedelta(days=days)
-        activities = Activity.get_by_student(
-            student_id, 
+        df = Activity.fetch_frame(
+            student_id,
             date_from=start_date.strftime("%Y-%m-%d"),
-            date_to=end_date.strftime("%Y-%m-%d")
+            date_to=end_date.strftime("%Y-%m-%d"),
+            columns=["date", metric]
         )
         
-        if not activities:
+        if df.empty:
             return []
         
-        # Convert to dataframe
-        activity_dicts = [a.to_dict() for a in activities]
-        df = pd.DataFrame(activity_dicts)
+        return df[["date", metric]].values.tolist()
+    
+    @staticmethod
+    def get_window_totals(student_id, date_from, date_to):
+        """
+        Sums, counts, min/max and averages of every activity metric over an
+        inclusive date range, read from the day/week/month rollups.
+        """
+        return ActivityRollup.get_window(student_id, date_from, date_to)
+    
+    @staticmethod
+    def get_period_summary(student_id, period="week", days=30):
+        """
+        Per-week or per-month totals for the periods overlapping the last
+        days days, oldest first, as a DataFrame with one row per period.
+        The first and last periods only count their days inside the window.
+        """
+        end_date = datetime.now()
+        key = (int(student_id), ("periods", period), days, end_date.strftime("%Y-%m-%d"))
+        found, result = analytics_cache.get(key)
+        if found:
+            return result
+        
+        generation = analytics_cache.generation(key[0])
+        start_date = end_date - timedelta(days=days)
+        rollups = ActivityRollup.get_periods(
+            student_id, period,
+            date_from=start_date.strftime("%Y-%m-%d"),
+            date_to=end_date.strftime("%Y-%m-%d"),
+            clip=True
+        )
+        result = pd.DataFrame({
+            "period_start": pd.to_datetime([r.period_start for r in rollups]),
+            "days": [r.days for r in rollups],
+            "steps": pd.array([r.steps_sum for r in rollups], dtype="float64").astype("int64"),
+            "active_minutes": pd.array([r.active_minutes_sum for r in rollups], dtype="float64").astype("int64"),
+            "distance": [r.distance_sum for r in rollups],
+            "calories": [r.calories_sum for r in rollups],
+        })
+        analytics_cache.put(key, result, generation)
+        return result
+    
+    @staticmethod
+    def get_streaks(student_id):
+        """
+        A student's activity streaks over their whole history.
+        
+        Returns {"current": days, "longest": days, "history": [...]}, where
+        history lists every run of consecutive logged days, oldest first, as
+        {"start", "end", "length"} dicts. The current streak is the run
+        ending today or yesterday, so a day not logged yet doesn't break it.
+        """
+        today = datetime.now().date()
+        key = (int(student_id), "streaks", None, today.isoformat())
+        found, result = analytics_cache.get(key)
+        if found:
+            return result
         
-        # Ensure date is in datetime format and sort
-        if "date" in df:
-            df["date"] = pd.to_datetime(df["date"])
-            df = df.sort_values("date")
+        generation = analytics_cache.generation(key[0])
+        history = [
+            {"start": row["start_date"], "end": row["end_date"], "length": row["length"]}
+            for row in Activity.get_streak_runs(student_id)
+        ]
+        yesterday = (today - timedelta(days=1)).isoformat()
+        current = history[-1]["length"] if history and history[-1]["end"] >= yesterday else 0
+        result = {
+            "current": current,
+            "longest": max((run["length"] for run in history), default=0),
+            "history": history,
+        }
+        analytics_cache.put(key, result, generation)
+        return result
+    
+    @staticmethod
+    def get_all_streaks(student_ids=None):
+        """
+        Current and longest streak for many students (all by default) in one
+        grouped query. Returns a DataFrame with student_id, current_streak,
+        longest_streak and current_start; students with no activity are
+        omitted.
+        """
+        rows = Activity.get_streak_summary(student_ids)
+        return pd.DataFrame.from_records(
+            [tuple(row) for row in rows],
+            columns=["student_id", "current_streak", "longest_streak", "current_start"]
+        )
+    
+    # Columns of the frame returned by get_cohort_metrics
+    COHORT_COLUMNS = ("student_id", "name", "grade", "gender", "fitness_level",
+                      "days_logged", "total_steps", "avg_steps", "total_calories",
+                      "avg_active_minutes", "total_distance", "latest_weight", "bmi",
+                      "bmi_category", "consistency", "current_streak", "longest_streak")
+    
+    @staticmethod
+    def get_cohort_metrics(filters=None, days=30):
+        """
+        Metrics for every student matching filters over the last days days,
+        computed for the whole cohort at once.
+        
+        filters is passed to Student.fetch_frame (e.g. {"grade": "10"}).
+        Activity for the window is loaded in one columnar query and reduced
+        with grouped NumPy/pandas operations. Returns a tidy DataFrame with
+        one row per student in COHORT_COLUMNS order; students with no
+        activity get zero totals. consistency is the share of days in the
+        window with a log, and current_streak counts consecutive logged days
+        ending today or yesterday.
+        """
+        students = Student.fetch_frame(filters)
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days)
+        window_days = days + 1
+        
+        activity = Activity.fetch_frame(
+            None if not filters else students["id"].to_numpy(),
+            date_from=start_date.isoformat(),
+            date_to=end_date.isoformat(),
+            columns=["student_id", "date", "steps", "active_minutes",
+                     "distance", "calories", "weight_kg"],
+            ordered=False,
+            as_frame=False
+        )
+        
+        # Order rows by student, then date, without asking SQLite to sort
+        order = np.lexsort((activity["date"], activity["student_id"]))
+        activity = {column: values[order] for column, values in activity.items()}
+        student_ids = activity["student_id"].astype(np.int64)
+        day_numbers = activity["date"].astype(np.int64)
+        
+        frame = pd.DataFrame({
+            "student_id": student_ids,
+            "steps": activity["steps"].astype(np.float64),
+            "active_minutes": activity["active_minutes"].astype(np.float64),
+            "distance": activity["distance"],
+            "calories": activity["calories"],
+            "weight_kg": activity["weight_kg"],
+        })
+        grouped = frame.groupby("student_id", sort=True)
+        per_student = pd.DataFrame({
+            "days_logged": grouped.size(),
+            "total_steps": grouped["steps"].sum(),
+            "avg_steps": grouped["steps"].mean(),
+            "total_calories": grouped["calories"].sum(),
+            "avg_active_minutes": grouped["active_minutes"].mean(),
+            "total_distance": grouped["distance"].sum(),
+            "latest_weight": grouped["weight_kg"].last(),  # last non-null by date
+        })
+        
+        # Streaks: split each student's dates into runs of consecutive days
+        if len(student_ids):
+            run_starts = np.ones(len(student_ids), dtype=bool)
+            run_starts[1:] = ((student_ids[1:] != student_ids[:-1])
+                              | (np.diff(day_numbers) != 1))
+            run_ids = np.cumsum(run_starts) - 1
+            run_lengths = np.bincount(run_ids)
+            run_students = student_ids[run_starts]
+            run_ends = day_numbers[np.r_[np.flatnonzero(run_starts)[1:] - 1, len(day_numbers) - 1]]
+            runs = pd.DataFrame({"student_id": run_students, "length": run_lengths, "end": run_ends})
+            last_runs = runs.groupby("student_id").last()
+            yesterday = np.datetime64(end_date - timedelta(days=1), "D").astype(np.int64)
+            per_student["longest_streak"] = runs.groupby("student_id")["length"].max()
+            per_student["current_streak"] = np.where(last_runs["end"] >= yesterday,
+                                                     last_runs["length"], 0)
+        else:
+            per_student["longest_streak"] = pd.Series(dtype=np.int64)
+            per_student["current_streak"] = pd.Series(dtype=np.int64)
         
-        # Get data for requested metric
-        if metric in df:
-            trend_data = df[["date", metric]].values.tolist()
-            return trend_data
+        # Left join onto the cohort so students without activity are kept
+        cohort = per_student.reindex(students["id"].to_numpy())
+        counts = ["days_logged", "total_steps", "current_streak", "longest_streak"]
+        cohort[counts] = cohort[counts].fillna(0).astype(np.int64)
+        cohort[["total_calories", "total_distance"]] = cohort[["total_calories", "total_distance"]].fillna(0.0)
+        cohort[["avg_steps", "avg_active_minutes"]] = cohort[["avg_steps", "avg_active_minutes"]].fillna(0.0)
         
-        return []
+        result = pd.DataFrame({
+            "student_id": students["id"].to_numpy(),
+            "name": students["name"].to_numpy(),
+            "grade": students["grade"].to_numpy(),
+            "gender": students["gender"].to_numpy(),
+            "fitness_level": students["fitness_level"].to_numpy(),
+        })
+        for column in AnalyticsService.COHORT_COLUMNS[5:]:
+            if column in cohort:
+                result[column] = cohort[column].to_numpy()
+        result["bmi"] = AnalyticsService.calculate_bmi_array(students["height_cm"], result["latest_weight"])
+        result["bmi_category"] = AnalyticsService.get_bmi_category_array(result["bmi"])
+        result["consistency"] = result["days_logged"] / window_days
+        return result[list(AnalyticsService.COHORT_COLUMNS)]
@@ -0,0 +1,227 @@
+"""
+Export service for streaming activity data out of the database.
+
+Exports never hold the whole result: rows come off a server-side cursor
+(db_manager.fetch_chunks) config.EXPORT_CHUNK_SIZE at a time and each
+chunk is encoded to bytes and handed on before the next is fetched, so
+memory stays flat however many students and days are exported.
+"""
+import csv
+import io
+import json
+import shlex
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import models and config
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+from database.db_manager import db_manager
+from database.models.activity import Activity
+from utils.lazy_import import lazy_import
+
+# Parquet needs pyarrow, which is optional
+try:
+    pa = lazy_import("pyarrow")
+except ModuleNotFoundError:
+    pa = None
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only stream that collects bytes until drained; Parquet writes into it."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class ExportService:
+    """Service class for exporting activity data."""
+
+    # Exported columns and the SQL producing each, typed so every format agrees
+    COLUMNS = ("student_id", "name", "grade", "date") + Activity.NUMERIC_FIELDS
+    SELECT = (
+        "SELECT a.student_id, s.name, s.grade, a.date, "
+        + ", ".join(f"CAST(a.{field} AS {'REAL' if field in Activity.FLOAT_COLUMNS else 'INTEGER'})"
+                    for field in Activity.NUMERIC_FIELDS)
+        + " FROM activity a JOIN students s ON s.id = a.student_id"
+    )
+
+    # format -> (MIME type, file extension)
+    FORMATS = {
+        "csv": ("text/csv", "csv"),
+        "jsonl": ("application/x-ndjson", "jsonl"),
+        "parquet": ("application/vnd.apache.parquet", "parquet"),
+    }
+
+    @staticmethod
+    def available_formats():
+        """Formats that can be exported here (Parquet only with pyarrow installed)."""
+        return [fmt for fmt in ExportService.FORMATS if fmt != "parquet" or pa is not None]
+
+    @staticmethod
+    def _where(student_ids=None, grades=None, date_from=None, date_to=None):
+        """WHERE clause and parameters for the export filters (None means no filter)."""
+        clause = " WHERE 1=1"
+        params = []
+        if student_ids is not None:
+            clause += " AND a.student_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(i) for i in student_ids]))
+        if grades is not None:
+            clause += " AND s.grade IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([str(grade) for grade in grades]))
+        if date_from:
+            clause += " AND a.date >= ?"
+            params.append(str(date_from))
+        if date_to:
+            clause += " AND a.date <= ?"
+            params.append(str(date_to))
+        return clause, params
+
+    @staticmethod
+    def count(**filters):
+        """Number of activity rows an export with these filters would contain."""
+        clause, params = ExportService._where(**filters)
+        row = db_manager.fetchone(
+            "SELECT COUNT(*) FROM activity a JOIN students s ON s.id = a.student_id" + clause, params
+        )
+        return row[0]
+
+    @staticmethod
+    def row_chunks(chunk_size=None, **filters):
+        """
+        Yield the matching rows as lists of tuples in COLUMNS order, by
+        student and date. Filters: student_ids, grades, date_from, date_to.
+        """
+        clause, params = ExportService._where(**filters)
+        query = ExportService.SELECT + clause + " ORDER BY a.student_id, a.date"
+        yield from db_manager.fetch_chunks(query, tuple(params), size=chunk_size or config.EXPORT_CHUNK_SIZE)
+
+    @staticmethod
+    def stream(fmt, chunk_size=None, **filters):
+        """
+        Yield the export as byte chunks in fmt ("csv", "jsonl" or
+        "parquet"), one chunk (or Parquet row group) per fetched block.
+        """
+        if fmt not in ExportService.FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        if fmt not in ExportService.available_formats():
+            raise ValueError("Parquet export needs pyarrow to be installed")
+        encode = {"csv": ExportService._csv, "jsonl": ExportService._jsonl,
+                  "parquet": ExportService._parquet}[fmt]
+        return encode(ExportService.row_chunks(chunk_size, **filters))
+
+    @staticmethod
+    def _csv(chunks):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(ExportService.COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _jsonl(chunks):
+        columns = ExportService.COLUMNS
+        dumps = json.JSONEncoder(separators=(",", ":")).encode
+        for rows in chunks:
+            yield "".join(dumps(dict(zip(columns, row))) + "\n" for row in rows).encode("utf-8")
+
+    @staticmethod
+    def _parquet_schema():
+        types = {"student_id": pa.int64(), "name": pa.string(), "grade": pa.string(), "date": pa.date32()}
+        return pa.schema([
+            (column, types.get(column) or (pa.float64() if column in Activity.FLOAT_COLUMNS else pa.int64()))
+            for column in ExportService.COLUMNS
+        ])
+
+    @staticmethod
+    def _parquet(chunks):
+        import pyarrow.parquet as pq
+
+        schema = ExportService._parquet_schema()
+        date_position = ExportService.COLUMNS.index("date")
+        sink = _ByteSink()
+        with pq.ParquetWriter(sink, schema, compression="snappy") as writer:
+            for rows in chunks:
+                columns = list(zip(*rows))
+                arrays = [
+                    pa.array(values, type=pa.string()).cast(pa.date32()) if position == date_position
+                    else pa.array(values, type=field.type)
+                    for position, (values, field) in enumerate(zip(columns, schema))
+                ]
+                writer.write_batch(pa.record_batch(arrays, schema=schema), row_group_size=len(rows))
+                yield sink.drain()
+        # The footer is written when the writer closes
+        data = sink.drain()
+        if data:
+            yield data
+
+    @staticmethod
+    def write(file, fmt, chunk_size=None, **filters):
+        """Stream an export into a binary file object; returns the bytes written."""
+        written = 0
+        for data in ExportService.stream(fmt, chunk_size, **filters):
+            file.write(data)
+            written += len(data)
+        return written
+
+    @staticmethod
+    def to_buffer(fmt, **filters):
+        """
+        The whole export in an in-memory buffer, rewound, for
+        st.download_button, which accepts one (not a temporary file) and
+        takes its bytes without another copy. The export is held in memory,
+        so the export page caps it at config.EXPORT_DOWNLOAD_MAX_ROWS rows.
+        """
+        buffer = io.BytesIO()
+        ExportService.write(buffer, fmt, **filters)
+        buffer.seek(0)
+        return buffer
+
+    @staticmethod
+    def command(fmt, **filters):
+        """The manage.py export command line that writes the same export to a file."""
+        args = ["python", "manage.py", "export", "--format", fmt, "--output", ExportService.file_name(fmt, **filters)]
+        for student_id in filters.get("student_ids") or ():
+            args += ["--student", str(student_id)]
+        for grade in filters.get("grades") or ():
+            args += ["--grade", str(grade)]
+        if filters.get("date_from"):
+            args += ["--from", filters["date_from"]]
+        if filters.get("date_to"):
+            args += ["--to", filters["date_to"]]
+        return shlex.join(args)
+
+    @staticmethod
+    def file_name(fmt, **filters):
+        """A descriptive download file name for an export."""
+        parts = ["activity"]
+        if filters.get("grades"):
+            parts.append("grade-" + "-".join(str(grade) for grade in filters["grades"]))
+        if filters.get("student_ids") is not None:
+            parts.append(f"{len(filters['student_ids'])}-students")
+        if filters.get("date_from") or filters.get("date_to"):
+            parts.append(f"{filters.get('date_from') or 'start'}_to_{filters.get('date_to') or 'end'}")
+        return "_".join(parts) + "." + ExportService.FORMATS[fmt][1]
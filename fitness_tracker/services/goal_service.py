@@ -0,0 +1,145 @@
+"""
+Goal service for persisting student goals and measuring progress against them.
+"""
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add parent directory to path to import models and config
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+from database.db_manager import db_manager
+from database.models.goal import Goal
+from database.models.student import Student
+from services.achievement_service import RULES, AchievementService
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+class GoalService:
+    """Service class for goal-related operations."""
+
+    # Goals with a daily target, as opposed to the weight goal
+    DAILY_METRICS = ("steps", "active_minutes")
+
+    @staticmethod
+    def get_goals(student_id):
+        """A student's goals as {metric: value}, None where unset."""
+        return Goal.get(student_id).to_dict()
+
+    @staticmethod
+    def get_daily_goal(student_id, metric, goals=None):
+        """The student's daily goal for metric, or the configured default."""
+        goals = goals if goals is not None else GoalService.get_goals(student_id)
+        return goals.get(metric) or config.DEFAULT_GOALS[metric]
+
+    @staticmethod
+    def set_goal(student_id, metric, value):
+        """
+        Persist a goal and re-evaluate the achievements it can unlock.
+        Returns (success, message, unlocked achievement ids).
+        """
+        if metric not in Goal.METRICS:
+            return False, f"Unknown goal: {metric}", []
+        if value is not None and value <= 0:
+            return False, "Goals must be positive", []
+
+        Goal.set(student_id, metric, value)
+        goal_rules = [rule.achievement_id for rule in RULES if rule.uses_goals]
+        unlocks = AchievementService.evaluate_students([student_id], goal_rules)
+        return True, "Goal saved", [achievement_id for _, achievement_id, _ in unlocks]
+
+    @staticmethod
+    def weight_progress(start, current, target):
+        """Percent of the way from start to target weight covered (see Goal.weight_progress)."""
+        return Goal.weight_progress(start, current, target)
+
+    @staticmethod
+    def attainment_mask(values, goals):
+        """Which days met their goal: values and goals are aligned arrays (NaN never meets)."""
+        with np.errstate(invalid="ignore"):
+            return np.asarray(values, dtype=np.float64) >= np.asarray(goals, dtype=np.float64)
+
+    @staticmethod
+    def get_attainment(metric, student_ids=None, date_from=None, date_to=None):
+        """
+        Goal attainment for a daily metric over a date range, for every
+        student (or student_ids), in one pass over the daily activity rows.
+
+        Returns a DataFrame indexed by student_id with goal, goal_set,
+        days_logged, days_achieved, rate (percentage of logged days that met
+        the goal), average (daily mean of metric) and progress (average as
+        a percentage of the goal, capped at 100).
+        """
+        if metric not in GoalService.DAILY_METRICS:
+            raise ValueError(f"Not a daily goal: {metric}")
+        if student_ids is None:
+            index = np.array([row["id"] for row in db_manager.fetchall("SELECT id FROM students ORDER BY id")],
+                             dtype=np.int64)
+            stored = Goal.fetch_frame()[metric].reindex(index).to_numpy()
+        else:
+            index = np.unique(np.asarray(list(student_ids), dtype=np.int64))
+            stored = Goal.fetch_frame(index)[metric].to_numpy()
+        goal = np.where(np.isnan(stored), config.DEFAULT_GOALS[metric], stored)
+
+        # Days are counted per student inside SQLite, so one row per student
+        # crosses into Python instead of one per day
+        counts = Goal.day_counts(metric, config.DEFAULT_GOALS[metric],
+                                 None if student_ids is None else index, date_from, date_to)
+        # Activity can outlive its student (deleting a student doesn't
+        # cascade); only students in the index have a slot to count into
+        known = np.isin(counts["student_id"], index)
+        positions = np.searchsorted(index, counts["student_id"][known])
+        days_logged = np.zeros(len(index), dtype=np.int64)
+        days_achieved = np.zeros(len(index), dtype=np.int64)
+        totals = np.zeros(len(index))
+        days_logged[positions] = counts["days"][known]
+        days_achieved[positions] = counts["days_achieved"][known]
+        totals[positions] = counts["total"][known]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(days_logged > 0, days_achieved / days_logged * 100, 0.0)
+            average = np.where(days_logged > 0, totals / days_logged, 0.0)
+        return pd.DataFrame({
+            "goal": goal,
+            "goal_set": ~np.isnan(stored),
+            "days_logged": days_logged,
+            "days_achieved": days_achieved,
+            "rate": rate,
+            "average": average,
+            "progress": np.minimum(average / goal * 100, 100),
+        }, index=pd.Index(index, name="student_id"))
+
+    @staticmethod
+    def get_weekly_report(metric="steps", week_of=None, min_days=None, filters=None):
+        """
+        School-wide "who hit their goal this week": attainment for the ISO
+        week containing week_of (default today) for the students matching
+        filters (see Student.fetch_frame), with the students' names.
+
+        A student hit their goal if they met it on at least min_days days
+        (config.WEEKLY_GOAL_DAYS), capped at the days elapsed so far this
+        week. Returns {"week_start", "week_end", "min_days", "students"}
+        where students is the get_attainment frame plus name and hit
+        columns, sorted by days achieved, best first.
+        """
+        week_of = week_of or date.today()
+        if isinstance(week_of, str):
+            week_of = date.fromisoformat(week_of)
+        week_start = week_of - timedelta(days=week_of.weekday())
+        week_end = week_start + timedelta(days=6)
+        elapsed = (min(date.today(), week_end) - week_start).days + 1
+        min_days = min(min_days or config.WEEKLY_GOAL_DAYS, max(elapsed, 1))
+
+        students = Student.fetch_frame(filters, columns=["id", "name"])
+        report = GoalService.get_attainment(metric, students["id"] if filters else None,
+                                            week_start.isoformat(), week_end.isoformat())
+        report.insert(0, "name", students.set_index("id")["name"].reindex(report.index).to_numpy())
+        report["hit"] = report["days_achieved"] >= min_days
+        return {
+            "week_start": week_start,
+            "week_end": week_end,
+            "min_days": min_days,
+            "students": report.sort_values(["days_achieved", "average"], ascending=False, kind="stable"),
+        }
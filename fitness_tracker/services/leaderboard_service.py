@@ -0,0 +1,81 @@
+"""
+Leaderboard service for ranking students by their persisted points.
+"""
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add parent directory to path to import models
+sys.path.append(str(Path(__file__).parent.parent))
+from database.models.points import StudentPoints
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+class LeaderboardService:
+    """Service class for points and leaderboard operations."""
+
+    # Points needed for each level
+    POINTS_PER_LEVEL = 20
+
+    @staticmethod
+    def activity_points(steps):
+        """Points awarded for logging a day with this many steps."""
+        return StudentPoints.activity_points(steps)
+
+    @staticmethod
+    def level(points):
+        """Level reached with this many points, starting at 1."""
+        return 1 + max(points, 0) // LeaderboardService.POINTS_PER_LEVEL
+
+    @staticmethod
+    def get_points(student_id):
+        """A student's current points and achievement count."""
+        score = StudentPoints.get(student_id)
+        return {"points": score.points, "achievements": score.achievements}
+
+    @staticmethod
+    def get_leaderboard(limit=10, offset=0):
+        """
+        One page of the leaderboard as a DataFrame with Rank, Student,
+        Points, Achievements and Level columns (plus student_id).
+        """
+        rows = StudentPoints.top(limit, offset)
+        return pd.DataFrame({
+            "Rank": [row["rank"] for row in rows],
+            "Student": [row["name"] or f"Student {row['student_id']}" for row in rows],
+            "Points": [row["points"] for row in rows],
+            "Achievements": [row["achievements"] for row in rows],
+            "Level": [LeaderboardService.level(row["points"]) for row in rows],
+            "student_id": [row["student_id"] for row in rows],
+        })
+
+    @staticmethod
+    def get_points_history(student_id, days=14):
+        """
+        A student's points at the end of each of the last days days, as a
+        DataFrame with Date and Points columns, ending at their current total.
+        """
+        dates = pd.date_range(end=pd.Timestamp(date.today()), periods=days)
+        earned = StudentPoints.earned_by_day(student_id, dates[0].date())
+        days_earned = pd.to_datetime([row["day"] for row in earned])
+        points_earned = np.array([row["points"] for row in earned], dtype=np.int64)
+        total = StudentPoints.get(student_id).points
+        # Points held at the end of a day: the total less what was earned after it
+        points = [total - int(points_earned[days_earned > day].sum()) for day in dates]
+        return pd.DataFrame({"Date": dates, "Points": points})
+
+    @staticmethod
+    def get_rank(student_id):
+        """
+        A student's standing: {"rank", "points", "total", "top_percent"},
+        where top_percent places the rank within all ranked students.
+        """
+        rank, points, total = StudentPoints.rank(student_id)
+        return {
+            "rank": rank,
+            "points": points,
+            "total": total,
+            "top_percent": min(rank / total * 100, 100) if total else 100,
+        }
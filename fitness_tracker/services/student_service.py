@@ -22,9 +22,13 @@ class StudentService:
         return Student.get_by_id(student_id)
     
     @staticmethod
-    def get_student_options_dict():
-        """Get a dictionary of students for dropdown selection."""
-        students = Student.get_all()
+    def get_student_options_dict(students=None):
+        """
+        Get a dictionary of students for dropdown selection, reusing an
+        already loaded student list when one is passed.
+        """
+        if students is None:
+            students = Student.get_all()
         return {f"{s.name} (ID: {s.id})": s.id for s in students}
     
     @staticmethod
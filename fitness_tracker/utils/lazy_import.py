@@ -0,0 +1,56 @@
+"""
+Deferred imports for heavy libraries (pandas, NumPy, Plotly).
+
+Streamlit itself loads none of these, so importing them only when a page
+or service first uses them keeps them off the cold start of pages that
+never touch a DataFrame or chart. Usage, at module level:
+
+    np = lazy_import("numpy")
+"""
+import importlib.util
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that imports it on first attribute access. After
+    loading, the real module's attributes are copied onto the stand-in, so
+    later lookups are plain attribute reads with no extra indirection.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_loaded"] = False
+
+    def _load(self):
+        # importlib's per-module locks make concurrent first uses safe
+        module = importlib.import_module(self.__name__)
+        if not self.__dict__["_lazy_loaded"]:
+            self.__dict__.update(module.__dict__)
+            self.__dict__["_lazy_loaded"] = True
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_loaded"] else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """
+    The module called name, imported on first use. Returns the module itself
+    when it is already loaded; raises ModuleNotFoundError now, rather than at
+    first use, when it is not installed.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return LazyModule(name)
@@ -0,0 +1,294 @@
+"""
+Opt-in render profiler for the Streamlit pages.
+
+With config.FEATURES["page_profiling"] on, each page starts a
+PageProfiler at the top and finishes it at the bottom. In between, time
+is split into exclusive sections:
+
+- data load: inside DatabaseManager (SQL and fetching rows)
+- figure build: Plotly Express calls and go.Figure construction/updates
+- serialization: Streamlit chart and table elements (st.plotly_chart,
+  st.dataframe, ...), which convert figures and frames for the browser
+- transform: everything else the page does (pandas and Python work)
+
+Pages can time their own named sections with profiler.section(name).
+The breakdown is shown in the sidebar and appended to
+config.PROFILE_LOG_PATH as one JSON line per render. The sidebar also
+offers a sampling profiler for the next rerun, which writes the page
+thread's stacks in the folded format used by flamegraph tools.
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+# Add parent directory to path to import config and the database layer
+sys.path.append(str(Path(__file__).parent.parent))
+import config
+from database.db_manager import db_manager
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = Path(__file__).parent.parent
+SAMPLE_NEXT_KEY = "_profile_sample_next"
+
+# Section names used by the automatic hooks
+DATA_LOAD = "data load"
+TRANSFORM = "transform"
+FIGURE_BUILD = "figure build"
+SERIALIZATION = "serialization"
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = set()
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every interval seconds from a
+    background thread and counts identical stacks, for a flamegraph.
+    """
+
+    def __init__(self, thread_id, interval=None):
+        self.thread_id = thread_id
+        self.interval = interval or config.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    @staticmethod
+    def _frame_label(frame):
+        code = frame.f_code
+        try:
+            path = Path(code.co_filename).relative_to(APP_DIR).as_posix()
+        except ValueError:
+            path = Path(code.co_filename).name
+        return f"{code.co_name} ({path})"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        """Stacks in folded format: "outer;...;inner count" per line."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+class PageProfiler:
+    """
+    Exclusive time per section for one render of one page. Sections nest:
+    while an inner section runs, the outer one's clock is paused.
+    """
+
+    def __init__(self, page, sample=False):
+        self.page = page
+        self.totals = Counter()  # section -> seconds
+        self.calls = Counter()  # section -> times entered
+        self.started = time.perf_counter()
+        self.sampler = StackSampler(threading.get_ident()).start() if sample else None
+        self._stack = []  # [section, resumed at]
+        self._push(TRANSFORM)
+
+    def _push(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            outer = self._stack[-1]
+            self.totals[outer[0]] += now - outer[1]
+        self._stack.append([name, now])
+        self.calls[name] += 1
+
+    def _pop(self):
+        now = time.perf_counter()
+        name, resumed = self._stack.pop()
+        self.totals[name] += now - resumed
+        if self._stack:
+            self._stack[-1][1] = now
+
+    @contextmanager
+    def section(self, name):
+        """Time a block as its own named section."""
+        self._push(name)
+        try:
+            yield
+        finally:
+            self._pop()
+
+    def finish(self):
+        """Stop timing, then log the breakdown and show it in the sidebar."""
+        if getattr(_local, "profiler", None) is self:
+            _local.profiler = None
+        while self._stack:
+            self._pop()
+        total = time.perf_counter() - self.started
+
+        stacks_path = None
+        if self.sampler is not None:
+            self.sampler.stop()
+            stacks_path = self._write_stacks()
+
+        record = {
+            "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "page": self.page,
+            "total_ms": round(total * 1000, 2),
+            "sections_ms": {name: round(seconds * 1000, 2) for name, seconds in self.totals.most_common()},
+            "calls": dict(self.calls),
+            "stacks": stacks_path,
+        }
+        self._log(record)
+        self._render(record)
+        return record
+
+    def _write_stacks(self):
+        os.makedirs(config.PROFILE_STACKS_DIR, exist_ok=True)
+        name = "".join(c if c.isalnum() else "_" for c in self.page.lower())
+        path = os.path.join(config.PROFILE_STACKS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        with open(path, "w", encoding="utf-8") as stacks_file:
+            stacks_file.write(self.sampler.folded())
+        return path
+
+    @staticmethod
+    def _log(record):
+        logger.info("Rendered %s in %.1f ms: %s", record["page"], record["total_ms"],
+                    ", ".join(f"{name} {ms}" for name, ms in record["sections_ms"].items()))
+        if config.PROFILE_LOG_PATH:
+            os.makedirs(os.path.dirname(config.PROFILE_LOG_PATH), exist_ok=True)
+            with open(config.PROFILE_LOG_PATH, "a", encoding="utf-8") as log:
+                log.write(json.dumps(record) + "\n")
+
+    def _render(self, record):
+        import streamlit as st
+
+        total = record["total_ms"] or 1
+        lines = ["| Section | ms | % |", "|---|---:|---:|"]
+        lines += [f"| {name} | {ms:.1f} | {ms / total * 100:.0f}% |"
+                  for name, ms in record["sections_ms"].items()]
+        with st.sidebar.expander(f"⏱️ Render profile: {record['total_ms']:.0f} ms", expanded=True):
+            st.markdown("\n".join(lines))
+            if record["stacks"]:
+                st.caption(f"Sampled stacks written to {record['stacks']}")
+                st.download_button("Download stacks (.folded)", self.sampler.folded(),
+                                   file_name=os.path.basename(record["stacks"]), mime="text/plain")
+            st.button("Sample next rerun", help="Record stack samples of the next render for a flamegraph",
+                      on_click=lambda: st.session_state.update({SAMPLE_NEXT_KEY: True}))
+
+
+class _NullProfiler:
+    """Stand-in used when profiling is off: sections cost nothing."""
+
+    def section(self, name):
+        return nullcontext()
+
+    def finish(self):
+        return None
+
+
+def start_page(page):
+    """
+    Start profiling this render of page if config.FEATURES["page_profiling"]
+    is on; returns a profiler with section() and finish() either way.
+    """
+    if not config.FEATURES.get("page_profiling"):
+        return _NullProfiler()
+
+    import streamlit as st
+
+    _install_hooks()
+    abandoned = getattr(_local, "profiler", None)
+    if abandoned is not None and abandoned.sampler is not None:
+        # The previous render on this thread ended early (st.stop()) without finishing
+        abandoned.sampler.stop()
+    sample = bool(st.session_state.pop(SAMPLE_NEXT_KEY, False))
+    profiler = PageProfiler(page, sample=sample)
+    _local.profiler = profiler
+    return profiler
+
+
+def _timed(name, func):
+    """Wrap func so its time counts toward section name while a profiler is running."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = getattr(_local, "profiler", None)
+        if profiler is None:
+            return func(*args, **kwargs)
+        profiler._push(name)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler._pop()
+    return wrapper
+
+
+def _timed_generator(name, func):
+    """Like _timed for a generator function: only the time spent producing items counts."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        items = func(*args, **kwargs)
+        while True:
+            profiler = getattr(_local, "profiler", None)
+            if profiler is not None:
+                profiler._push(name)
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                if profiler is not None:
+                    profiler._pop()
+            yield item
+    return wrapper
+
+
+def _install_hooks():
+    """Wrap the database, Plotly and Streamlit entry points once per process."""
+    with _install_lock:
+        if "database" not in _installed:
+            for method in ("execute", "executemany", "fetchone", "fetchall"):
+                setattr(db_manager, method, _timed(DATA_LOAD, getattr(db_manager, method)))
+            db_manager.fetch_chunks = _timed_generator(DATA_LOAD, db_manager.fetch_chunks)
+            _installed.add("database")
+
+        if "streamlit" not in _installed:
+            import streamlit as st
+            from streamlit.delta_generator import DeltaGenerator
+
+            for method in ("plotly_chart", "dataframe", "data_editor", "table", "json",
+                           "altair_chart", "line_chart", "bar_chart"):
+                setattr(DeltaGenerator, method, _timed(SERIALIZATION, getattr(DeltaGenerator, method)))
+                setattr(st, method, _timed(SERIALIZATION, getattr(st, method)))
+            _installed.add("streamlit")
+
+        if "plotly" not in _installed:
+            # Imported here, before any page touches its lazy px, so the
+            # pages' lazy modules pick up the wrapped functions
+            import plotly.express as px
+            import plotly.graph_objects as go
+
+            for name in px.__all__:
+                func = getattr(px, name)
+                if inspect.isfunction(func):
+                    setattr(px, name, _timed(FIGURE_BUILD, func))
+            for method in ("__init__", "add_trace", "add_traces", "update_layout", "update_traces",
+                           "add_hline", "add_vline"):
+                setattr(go.Figure, method, _timed(FIGURE_BUILD, getattr(go.Figure, method)))
+            _installed.add("plotly")
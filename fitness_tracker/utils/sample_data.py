@@ -21,15 +21,12 @@ def load_sample_data():
     ]
     
     # Add sample students
+    existing_students = {s.name: s.id for s in Student.get_all()}
     student_ids = []
     for student_data in sample_students:
         # Check if student already exists
-        existing_students = Student.get_all()
-        if any(s.name == student_data["name"] for s in existing_students):
-            # Find the existing student ID
-            for s in existing_students:
-                if s.name == student_data["name"]:
-                    student_ids.append(s.id)
+        if student_data["name"] in existing_students:
+            student_ids.append(existing_students[student_data["name"]])
         else:
             # Create new student
             student = Student(**student_data)
@@ -39,41 +36,29 @@ def load_sample_data():
     # Generate 30 days of activity data for each student
     num_days = 30
     start_date = date.today() - timedelta(days=num_days - 1)
+    base_weights = {"Alice": 55.0, "Bob": 65.0}
+    rows = []
     
-    for student_id in student_ids:
-        # Get student to determine baseline weight
-        student = Student.get_by_id(student_id)
-        base_weight = 55.0 if student.name == "Alice" else 65.0 if student.name == "Bob" else 50.0
+    for student_data, student_id in zip(sample_students, student_ids):
+        # Baseline weight depends on the student
+        base_weight = base_weights.get(student_data["name"], 50.0)
         
         for i in range(num_days):
             current_day = start_date + timedelta(days=i)
             
             # Generate random activity data with some patterns
-            steps = random.randint(3000, 15000)
-            active_minutes = random.randint(10, 120)
-            distance = round(random.uniform(2, 10), 2)
-            calories = round(random.uniform(100, 800), 1)
-            heart_rate = random.randint(60, 160)
-            weight = round(base_weight + random.uniform(-0.5, 0.5), 1)
-            
-            # Check if activity already exists for this student and date
-            activities = Activity.get_by_student(
-                student_id, 
-                date_from=current_day.isoformat(),
-                date_to=current_day.isoformat()
-            )
-            
-            if not activities:
-                # Create activity record
-                Activity(
-                    student_id=student_id,
-                    date=current_day.isoformat(),
-                    steps=steps,
-                    active_minutes=active_minutes,
-                    distance=distance,
-                    calories=calories,
-                    heart_rate=heart_rate,
-                    weight_kg=weight
-                ).save()
+            rows.append((
+                student_id,
+                current_day.isoformat(),
+                random.randint(3000, 15000),  # steps
+                random.randint(10, 120),  # active minutes
+                round(random.uniform(2, 10), 2),  # distance
+                round(random.uniform(100, 800), 1),  # calories
+                random.randint(60, 160),  # heart rate
+                round(base_weight + random.uniform(-0.5, 0.5), 1)  # weight
+            ))
+    
+    # Days that already have activity are left as they are
+    Activity.upsert_many(rows, overwrite=False)
     
     return len(student_ids)
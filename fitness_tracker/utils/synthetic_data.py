@@ -0,0 +1,220 @@
+"""
+Synthetic load generator for benchmarks and demos.
+
+Builds a population of students and their daily activity with realistic
+shape rather than uniform noise: each student has a fitness level that
+sets their typical step count, a weekly rhythm (a PE day, quieter or
+busier weekends), seasonal variation, weight that drifts slowly with
+day-to-day scatter, and gaps where no activity is logged (single missed
+days and multi-day breaks). Steps, active minutes, distance, calories
+and heart rate are derived from each other so they stay consistent.
+
+Output is deterministic: the same seed, population size, number of days
+and end date always produce the same rows. Students are generated in
+blocks with numpy, and everything is written through Student.bulk_insert
+and Activity.bulk_insert in a single transaction.
+
+From the command line: python manage.py generate-data --students N --days D --seed S
+"""
+import math
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add parent directory to path to import models and services
+sys.path.append(str(Path(__file__).parent.parent))
+from database.db_manager import db_manager
+from database.models.activity import Activity
+from database.models.student import Student
+from utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Students generated (and kept in memory as students x days arrays) at a time
+BLOCK_SIZE = 1000
+
+FIRST_NAMES = (
+    "Aiden", "Amara", "Ava", "Caleb", "Chloe", "Daniel", "Elena", "Ethan", "Fatima", "Gabriel",
+    "Grace", "Hana", "Isaac", "Isla", "Jacob", "Jade", "Kai", "Layla", "Leo", "Lucas",
+    "Maya", "Mia", "Noah", "Nora", "Oliver", "Priya", "Quinn", "Rafael", "Ruby", "Samuel",
+    "Sofia", "Theo", "Uma", "Victor", "Wei", "Xavier", "Yara", "Yusuf", "Zara", "Zoe",
+)
+LAST_NAMES = (
+    "Adams", "Ahmed", "Brown", "Chen", "Clark", "Davis", "Diaz", "Evans", "Garcia", "Green",
+    "Hall", "Hernandez", "Ito", "Johnson", "Kim", "Kowalski", "Lee", "Lopez", "Martin", "Miller",
+    "Moore", "Nguyen", "Okafor", "Patel", "Perez", "Reed", "Rossi", "Santos", "Schmidt", "Singh",
+    "Smith", "Taylor", "Thomas", "Walker", "White", "Williams", "Wilson", "Wright", "Young", "Zhang",
+)
+GENDERS = ("Female", "Male", "Other")
+GENDER_SHARES = (0.48, 0.48, 0.04)
+FITNESS_LEVELS = ("Beginner", "Intermediate", "Advanced")
+FITNESS_SHARES = (0.45, 0.38, 0.17)
+
+# Typical daily steps and resting heart rate per fitness level
+LEVEL_STEPS = (6500.0, 8500.0, 11000.0)
+LEVEL_RESTING_HR = (76.0, 69.0, 61.0)
+# Relative activity Monday..Friday; weekends are set per student
+WEEKDAY_FACTORS = (1.0, 1.02, 1.0, 0.98, 0.94)
+
+# Logging gaps: chance per day of starting a break, and of ending one
+BREAK_START = 0.012
+BREAK_END = 0.2
+
+
+def generate_students(rng, first_id, count):
+    """
+    Student attributes for ids first_id..first_id+count-1, as numpy arrays
+    keyed by Student column, plus the hidden traits activity is drawn from.
+    """
+    gender = rng.choice(len(GENDERS), size=count, p=GENDER_SHARES)
+    level = rng.choice(len(FITNESS_LEVELS), size=count, p=FITNESS_SHARES)
+    age = rng.integers(13, 19, size=count)
+    male = gender == 1
+
+    # Taller with age until the mid-teens, boys more so
+    growth = np.minimum(age, 16) - 13
+    height = rng.normal(np.where(male, 163.0, 157.0) + growth * np.where(male, 3.5, 1.5), 6.5)
+    height = np.clip(height, 135.0, 205.0).round(1)
+    bmi = np.clip(rng.normal(19.5 + (age - 13) * 0.4, 2.8), 15.0, 34.0)
+
+    return {
+        "id": np.arange(first_id, first_id + count),
+        "first_name": rng.integers(len(FIRST_NAMES), size=count),
+        "last_name": rng.integers(len(LAST_NAMES), size=count),
+        "age": age,
+        "grade": np.clip(age - 5, 8, 12),
+        "gender": gender,
+        "fitness_level": level,
+        "height_cm": height,
+        # Hidden traits
+        "base_steps": np.take(LEVEL_STEPS, level) * rng.lognormal(0.0, 0.25, size=count),
+        "weekend_factor": np.clip(rng.normal(0.85, 0.18, size=count), 0.4, 1.5),
+        "pe_day": rng.integers(5, size=count),
+        "adherence": rng.beta(9.0, 1.5, size=count),
+        "start_weight": bmi * (height / 100) ** 2,
+        "weight_trend": rng.normal(0.004, 0.004, size=count),  # kg per day
+        "resting_hr": np.take(LEVEL_RESTING_HR, level) + rng.normal(0.0, 5.0, size=count),
+        "stride_m": height / 100 * np.where(male, 0.415, 0.413),
+    }
+
+
+def student_rows(students):
+    """Rows in Student.COLUMNS order for generated students."""
+    names = (f"{FIRST_NAMES[first]} {LAST_NAMES[last]}"
+             for first, last in zip(students["first_name"].tolist(), students["last_name"].tolist()))
+    return list(zip(
+        students["id"].tolist(),
+        names,
+        students["age"].tolist(),
+        (str(grade) for grade in students["grade"].tolist()),
+        (GENDERS[gender] for gender in students["gender"].tolist()),
+        (FITNESS_LEVELS[level] for level in students["fitness_level"].tolist()),
+        students["height_cm"].tolist(),
+    ))
+
+
+def logged_days(rng, students, num_days):
+    """
+    Boolean students x days mask of days with activity. Students skip
+    single days at random (1 - adherence) and take multi-day breaks,
+    modelled as a two-state chain that starts a break with probability
+    BREAK_START a day and ends it with probability BREAK_END.
+    """
+    count = len(students["id"])
+    starts = rng.random((count, num_days)) < BREAK_START
+    ends = rng.random((count, num_days)) < BREAK_END
+    on_break = np.zeros((count, num_days), dtype=bool)
+    state = np.zeros(count, dtype=bool)
+    for day in range(num_days):
+        state = np.where(state, ~ends[:, day], starts[:, day])
+        on_break[:, day] = state
+    skipped = rng.random((count, num_days)) >= students["adherence"][:, None]
+    return ~(on_break | skipped)
+
+
+def generate_activity(rng, students, dates):
+    """
+    Daily activity rows in Activity.FIELDS order for a block of students,
+    student by student and day by day (the order of the unique
+    (student_id, date) index, which keeps inserts local).
+    """
+    count, num_days = len(students["id"]), len(dates)
+    weekdays = np.array([d.weekday() for d in dates])
+    day_of_year = np.array([d.timetuple().tm_yday for d in dates])
+
+    # Weekly rhythm: per-student weekend factor and a busier PE day
+    weekly = np.empty((count, 7))
+    weekly[:, :5] = WEEKDAY_FACTORS
+    weekly[:, 5:] = students["weekend_factor"][:, None]
+    weekly[np.arange(count), students["pe_day"]] *= 1.2
+    # A little more active in late spring and summer
+    season = 1.0 + 0.08 * np.sin(2 * math.pi * (day_of_year - 100) / 365.25)
+
+    steps = (students["base_steps"][:, None] * weekly[:, weekdays] * season
+             * rng.lognormal(0.0, 0.3, size=(count, num_days)))
+    steps = np.clip(steps, 0, 60000).round()
+    active_minutes = np.clip(steps / 110 * rng.normal(1.0, 0.15, size=(count, num_days))
+                             + rng.normal(0.0, 5.0, size=(count, num_days)), 0, 300).round()
+    distance = (steps * students["stride_m"][:, None] / 1000).round(2)
+
+    # Slow trend plus a random walk, with daily scale scatter on top
+    walk = np.cumsum(rng.normal(0.0, 0.05, size=(count, num_days)), axis=1)
+    weight = (students["start_weight"][:, None] + students["weight_trend"][:, None] * np.arange(num_days)
+              + walk + rng.normal(0.0, 0.3, size=(count, num_days)))
+    weight = np.clip(weight, 30.0, 150.0).round(1)
+
+    calories = (weight * steps * 0.0005 + active_minutes * weight * 0.035).round(1)
+    heart_rate = np.clip(students["resting_hr"][:, None] + active_minutes * 0.25
+                         + rng.normal(0.0, 4.0, size=(count, num_days)), 45, 200).round()
+
+    student_index, day_index = np.nonzero(logged_days(rng, students, num_days))
+    date_strings = np.array([d.isoformat() for d in dates], dtype=object)
+    return zip(
+        students["id"][student_index].tolist(),
+        date_strings[day_index].tolist(),
+        steps[student_index, day_index].astype(np.int64).tolist(),
+        active_minutes[student_index, day_index].astype(np.int64).tolist(),
+        distance[student_index, day_index].tolist(),
+        calories[student_index, day_index].tolist(),
+        heart_rate[student_index, day_index].astype(np.int64).tolist(),
+        weight[student_index, day_index].tolist(),
+    )
+
+
+def load_synthetic_data(num_students, num_days, seed=0, end_date=None, progress=None):
+    """
+    Add num_students synthetic students with up to num_days of activity
+    each, ending at end_date (default today). New students get ids after
+    the highest existing one. progress(done, total) is called after each
+    block of students. Returns {"students", "activities", "errors",
+    "seconds"}.
+    """
+    end_date = end_date or date.today()
+    dates = [end_date - timedelta(days=num_days - 1 - i) for i in range(num_days)]
+    start = time.perf_counter()
+
+    with db_manager.transaction():
+        first_id = (db_manager.fetchone("SELECT MAX(id) FROM students")[0] or 0) + 1
+
+        def rows():
+            for block_start in range(0, num_students, BLOCK_SIZE):
+                # One generator per block, so a block's data doesn't depend on the others
+                rng = np.random.default_rng([seed, block_start // BLOCK_SIZE])
+                students = generate_students(rng, first_id + block_start,
+                                             min(BLOCK_SIZE, num_students - block_start))
+                # Students go in as their activity is produced, inside the same transaction
+                Student.bulk_insert(student_rows(students))
+                yield from generate_activity(rng, students, dates)
+                if progress:
+                    progress(min(block_start + BLOCK_SIZE, num_students), num_students)
+
+        result = Activity.bulk_insert(rows())
+
+    return {
+        "students": num_students,
+        "activities": result["inserted"],
+        "errors": result["errors"],
+        "seconds": time.perf_counter() - start,
+    }
+